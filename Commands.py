@@ -67,6 +67,38 @@ class PC_CreateStock:
         return FreeCAD.ActiveDocument is not None
 
 
+class PC_AutoOperations:
+    """Commande : opérations automatiques de toute la pièce (panneau PartCosting)"""
+
+    def GetResources(self):
+        icon = os.path.join(
+            App.getUserAppDataDir(),
+            "Mod",
+            "PartCosting",
+            "Resources",
+            "icons",
+            "auto_operations.png",
+        )
+        return {
+            "Pixmap": icon,
+            "MenuText": "Opérations automatiques",
+            "ToolTip": "Détecte les features de la pièce et crée toutes les opérations chiffrées",
+        }
+
+    def Activated(self):
+        from panel import PartCostingPanel, show_panel
+
+        panel = FreeCADGui.getMainWindow().findChild(PartCostingPanel)
+        if panel is None:
+            show_panel()
+            panel = FreeCADGui.getMainWindow().findChild(PartCostingPanel)
+        panel.on_auto_operations()
+
+    def IsActive(self):
+        return FreeCAD.ActiveDocument is not None
+
+
 # Enregistrement des commandes dans FreeCAD
 FreeCADGui.addCommand("PC_AnalyzeGeometry", PC_AnalyzeGeometry())
 FreeCADGui.addCommand("PC_CreateStock", PC_CreateStock())
+FreeCADGui.addCommand("PC_AutoOperations", PC_AutoOperations())
@@ -28,13 +28,13 @@ class PartCostingWorkbench(FreeCADGui.Workbench):
         # Barre d'outils
         self.appendToolbar(
             "PartCosting Tools",
-            ["PC_AnalyzeGeometry", "PC_CreateStock"],
+            ["PC_AnalyzeGeometry", "PC_CreateStock", "PC_AutoOperations"],
         )
 
         # Menu principal
         self.appendMenu(
             "PartCosting",
-            ["PC_AnalyzeGeometry", "PC_CreateStock"],
+            ["PC_AnalyzeGeometry", "PC_CreateStock", "PC_AutoOperations"],
         )
 
         # Affichage du panneau latéral
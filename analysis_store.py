@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+analysis_store.py — Résultats d'analyse des pièces, partagés entre sessions
+
+Chaque pièce est identifiée par l'empreinte SHA-256 de sa géométrie
+exportée en BREP : la même pièce (même fichier STEP, même modèle) a la
+même clé sur tous les postes, quel que soit le nom du document.
+
+Le dépôt est un dossier (local ou partagé entre chiffreurs) :
+
+    <dossier>/ab/abcdef....pca     un fichier par pièce
+
+Format d'un fichier : en-tête MAGIC + version du format (struct), puis
+JSON compressé (zlib) ; chaque enregistrement porte aussi ANALYSIS_VERSION
+(version des algorithmes) : un enregistrement d'une autre version est
+ignoré et recalculé.
+
+Sections d'un enregistrement : "summary" (géométrie), "features"
+(milling_features), "mass" (mass_properties), "orientation:<matière>:..."
+(+ marges et empreinte du catalogue) / "turning" (brut proposé)... Une
+section déjà présente n'est jamais recalculée :
+
+    feats = cached_section(shape, "features", compute, encode, decode)
+
+Une feature (groupe de faces) a aussi son enregistrement, clé
+feature_key : sections "geometry:<opération>" (auto_ops), partagées par
+toutes les pièces qui contiennent ces faces telles quelles.
+
+Partage : écriture dans un fichier temporaire puis os.replace (un lecteur
+ne voit jamais un fichier à moitié écrit) ; deux postes qui écrivent la
+même pièce produisent le même contenu, le dernier gagne. Un fichier
+illisible (corrompu, autre version) est traité comme absent.
+
+Éviction : au-delà de max_bytes, les fichiers les moins récemment
+utilisés (mtime, mis à jour à chaque lecture) sont supprimés.
+
+Dossier : variable d'environnement PARTCOSTING_ANALYSIS_STORE ou
+use_store(path) ; use_store(None) désactive le dépôt.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+
+
+MAGIC = b"PCAS"
+FORMAT_VERSION = 1
+# À incrémenter quand un calcul stocké change (détection, orientation...)
+ANALYSIS_VERSION = 2
+
+_HEADER = struct.Struct("<4sHH")   # magic, version format, version analyse
+SUFFIX = ".pca"
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".partcosting", "analyses")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Intervalle mini entre deux passes d'éviction (s) pour un même processus
+EVICT_INTERVAL = 60.0
+
+
+# ======================================================================
+#  CLÉ : EMPREINTE BREP
+# ======================================================================
+
+_KEYS = {}  # mass_properties.shape_fingerprint → clé (pas de réexport BREP)
+
+
+def brep_key(shape):
+    """SHA-256 (hex) du BREP de la shape, fins de ligne normalisées."""
+    from mass_properties import shape_fingerprint
+
+    fp = shape_fingerprint(shape)
+    key = _KEYS.get(fp)
+    if key is None:
+        brep = shape.exportBrepToString().replace("\r\n", "\n")
+        key = _KEYS[fp] = hashlib.sha256(brep.encode("utf-8")).hexdigest()
+    return key
+
+
+def feature_key(faces):
+    """
+    Empreinte d'une feature (groupe de faces) : SHA-256 des clés BREP de
+    ses faces, indépendante de leur numérotation. Une feature inchangée
+    (même géométrie, même position) garde sa clé quand le reste de la
+    pièce change : d'une variante de famille à l'autre, par exemple.
+    """
+    keys = sorted(brep_key(f) for f in faces)
+    return hashlib.sha256("\n".join(keys).encode("ascii")).hexdigest()
+
+
+# ======================================================================
+#  DÉPÔT
+# ======================================================================
+
+def encode_record(record):
+    payload = zlib.compress(json.dumps(record, separators=(",", ":")).encode("utf-8"), 6)
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, ANALYSIS_VERSION) + payload
+
+
+def decode_record(data):
+    """dict, ou None si le contenu n'est pas un enregistrement valide de cette version."""
+    if len(data) < _HEADER.size:
+        return None
+    magic, fmt, version = _HEADER.unpack_from(data)
+    if magic != MAGIC or fmt != FORMAT_VERSION or version != ANALYSIS_VERSION:
+        return None
+    try:
+        return json.loads(zlib.decompress(data[_HEADER.size:]).decode("utf-8"))
+    except (zlib.error, ValueError):
+        return None
+
+
+class AnalysisStore:
+    """Enregistrements d'analyse par clé BREP, un fichier par pièce."""
+
+    def __init__(self, path=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self._last_evict = 0.0
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + SUFFIX)
+
+    def get(self, key):
+        """Enregistrement (dict de sections) ou None."""
+        path = self._file(key)
+        try:
+            with open(path, "rb") as f:
+                record = decode_record(f.read())
+        except OSError:
+            record = None
+        if record is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        try:
+            os.utime(path)  # récemment utilisé (éviction)
+        except OSError:
+            pass
+        return record
+
+    def put(self, key, record):
+        """Écrit l'enregistrement complet (atomique)."""
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(encode_record(record))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.stats["writes"] += 1
+
+        if time.monotonic() - self._last_evict > EVICT_INTERVAL:
+            self.evict()
+
+    def update(self, key, sections):
+        """Ajoute / remplace des sections (relit le fichier : autres postes)."""
+        record = self.get(key) or {}
+        record.update(sections)
+        self.put(key, record)
+        return record
+
+    def entries(self):
+        """[(mtime, taille, chemin)] des enregistrements du dépôt."""
+        out = []
+        for sub in os.scandir(self.path):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                if e.name.endswith(SUFFIX):
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    out.append((st.st_mtime, st.st_size, e.path))
+        return out
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """
+        Supprime les enregistrements les moins récemment utilisés jusqu'à
+        repasser sous 90 % de max_bytes. Retourne le nombre de fichiers supprimés.
+        """
+        self._last_evict = time.monotonic()
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= limit:
+            return 0
+
+        removed = 0
+        target = limit * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # déjà supprimé par un autre poste
+            total -= size
+            removed += 1
+        return removed
+
+
+# ======================================================================
+#  DÉPÔT PARTAGÉ
+# ======================================================================
+
+_STORE_DIR = os.environ.get("PARTCOSTING_ANALYSIS_STORE") or DEFAULT_DIR
+_STORE = None
+
+
+def use_store(path, max_bytes=DEFAULT_MAX_BYTES):
+    """Change le dossier du dépôt (None → dépôt désactivé)."""
+    global _STORE_DIR, _STORE
+    _STORE_DIR = path
+    _STORE = AnalysisStore(path, max_bytes) if path else None
+
+
+def get_store():
+    """Dépôt actif, ou None s'il est désactivé ou inaccessible."""
+    global _STORE, _STORE_DIR
+    if _STORE is None and _STORE_DIR:
+        try:
+            _STORE = AnalysisStore(_STORE_DIR)
+        except OSError:
+            _STORE_DIR = None  # dossier non créable : on travaille sans dépôt
+    return _STORE
+
+
+def cached_section(shape, name, compute, encode=None, decode=None):
+    """
+    Section `name` de l'analyse de `shape` : relue dans le dépôt si une
+    session (de n'importe quel poste) l'a déjà calculée, sinon compute()
+    puis enregistrée. encode / decode : conversion vers / depuis JSON.
+    """
+    if get_store() is None:
+        return compute()
+    return _cached(brep_key(shape), name, compute, encode, decode)[0]
+
+
+def cached_feature_section(faces, name, compute, encode=None, decode=None):
+    """
+    Comme cached_section, pour la feature formée de `faces` (feature_key) :
+    (valeur, relue) ; relue vraie si la section vient du dépôt.
+    """
+    if get_store() is None:
+        return compute(), False
+    return _cached(feature_key(faces), name, compute, encode, decode)
+
+
+def _cached(key, name, compute, encode, decode):
+    store = get_store()
+    record = store.get(key)
+    if record is not None and name in record:
+        return (decode(record[name]) if decode else record[name]), True
+
+    value = compute()
+    try:
+        store.update(key, {name: encode(value) if encode else value})
+    except OSError:
+        pass  # dépôt en lecture seule / plein : résultat non partagé
+    return value, False
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+auto_ops.py — Génération automatique des opérations d'une pièce
+
+À partir des features détectées par milling_features.detect_milling_features :
+- plan horizontal supérieur (ou inférieur, face retournée) → Surfaçage ;
+- autres plans horizontaux (fonds)                         → Poche,
+  profondeur = hauteur des parois si le fond appartient à une poche /
+  rainure / épaulement reconnu sur le graphe des faces ;
+- flancs verticaux (regroupés par direction)               → Contournage ;
+- trous cylindriques (regroupés par Ø et profondeur)       → Perçage.
+
+Les features sont relues dans le dépôt d'analyses (analysis_store) si la
+pièce a déjà été analysée, sur ce poste ou un autre ; la géométrie de
+chaque opération (profondeur, surface, contour) l'est sous l'empreinte de
+ses faces, donc aussi quand seul le reste de la pièce a changé.
+
+L'outil est choisi dans la bibliothèque indexée (ToolLibrary.find) et
+toutes les opérations sont chiffrées en une passe avec le même calcul
+que les objets opération (cost_graph.compute_operation).
+
+Le résultat est une liste de dicts au format d'OperationDialog.operation,
+directement utilisable par op_feature.create_operation.
+
+Les opérations Perçage sont chiffrées au modèle de cycles de
+costing_core.drilling (débourrage, plans de retrait, déplacements entre
+les trous du groupe dans l'ordre de visite optimisé) ; drilling_cycle_time
+donne le même calcul pour tous les trous de la pièce, changements
+d'outil compris.
+"""
+
+import json
+
+from cost_graph import compute_operation
+from geometry import faces_depth, faces_contour_length, faces_area, faces_outline
+from analysis_store import cached_feature_section, cached_section
+from milling_features import detect_milling_features, features_from_dict, features_to_dict
+from tracing import traced
+
+
+# Conditions de coupe par défaut des opérations générées
+AUTO_CUTTING = {
+    "Surfaçage": {"ae_pct": 70.0, "ap_max": 1.0},
+    "Poche": {"ae_pct": 40.0, "ap_max": 2.0},
+    "Contournage": {"ae_pct": 10.0, "ap_max": 5.0},
+    "Perçage": {"ae_pct": 100.0, "ap_max": 0.0},
+}
+
+# Type d'outil (colonne Type de tools.csv) par opération
+AUTO_TOOL_TYPES = {
+    "Surfaçage": ("Surfaceuse", "Fraise"),
+    "Poche": ("Fraise",),
+    "Contournage": ("Fraise",),
+    "Perçage": ("Foret",),
+}
+
+TOL_Z = 0.01        # mm : plans considérés au même niveau
+TOL_DRILL = 0.1     # mm : écart de Ø accepté entre trou et foret
+
+
+# ======================================================================
+#  CHOIX DE L'OUTIL
+# ======================================================================
+
+def choose_tool(library, op_type, size):
+    """
+    Outil de la bibliothèque pour une opération :
+    - Perçage     : foret de Ø = size (± TOL_DRILL), sinon None ;
+    - Poche       : plus grosse fraise de Ø ≤ size / 2 (size = largeur du fond) ;
+    - Surfaçage   : plus grosse surfaceuse de Ø ≤ size, sinon plus grosse fraise ;
+    - Contournage : plus grosse fraise.
+    """
+    if op_type == "Perçage":
+        drills = library.find(size - TOL_DRILL, size + TOL_DRILL, type="Foret")
+        if not drills:
+            return None
+        return min(drills, key=lambda t: abs(t.diam - size))
+
+    if op_type == "Contournage":
+        limit = None
+    else:
+        limit = size / 2.0 if op_type == "Poche" else size
+    for tool_type in AUTO_TOOL_TYPES[op_type]:
+        tools = library.find(None, limit, type=tool_type)
+        if not tools:
+            # rien d'assez petit : le plus petit outil du type
+            tools = library.find(type=tool_type)[:1]
+        if tools:
+            return tools[-1]
+    return None
+
+
+# ======================================================================
+#  GÉNÉRATION
+# ======================================================================
+
+def _face_names(shape):
+    """Face → "FaceN" (pour les liens PropertyLinkSubList)."""
+    return {f.hashCode(): f"Face{i}" for i, f in enumerate(shape.Faces, 1)}
+
+
+def _bound(faces):
+    bb = faces[0].BoundBox
+    for f in faces[1:]:
+        bb = bb.united(f.BoundBox)
+    return bb
+
+
+def part_features(shape):
+    """MillingFeatures de la pièce, relues dans le dépôt d'analyses si possible."""
+    return cached_section(
+        shape, "features",
+        lambda: detect_milling_features(shape),
+        lambda f: features_to_dict(f, shape),
+        lambda d: features_from_dict(d, shape),
+    )
+
+
+def _plan_operations(shape):
+    """
+    Liste de (op_type, faces, taille pour le choix d'outil, profondeur imposée,
+    nb, centres des trous ou None) déduite des features de la pièce.
+    """
+    feats = part_features(shape)
+    bb = shape.BoundBox
+    plans = []
+    recess_of = {f.hashCode(): r for r in feats.recesses for f in r.floors}
+
+    # Plans horizontaux : une opération par face
+    for plane in feats.planes:
+        for face in plane.faces:
+            fb = face.BoundBox
+            up = face.normalAt(0.5, 0.5).z > 0
+            if up:
+                depth = bb.ZMax - fb.ZMax
+            else:
+                depth = fb.ZMin - bb.ZMin
+            if depth <= TOL_Z:
+                plans.append(("Surfaçage", [face], max(fb.XLength, fb.YLength), 0.0, 1, None))
+            else:
+                recess = recess_of.get(face.hashCode())
+                if up and recess is not None:
+                    depth = recess.depth  # fond d'un creux : hauteur de ses parois
+                plans.append(("Poche", [face], min(fb.XLength, fb.YLength), depth, 1, None))
+
+    # Flancs verticaux
+    for flank in feats.flanks:
+        depth = _bound(flank.faces).ZLength
+        plans.append(("Contournage", flank.faces, 0.0, depth, 1, None))
+
+    # Trous : regroupés par Ø et profondeur
+    groups = {}
+    for hole in feats.holes:
+        key = (round(2 * hole.radius, 2), round(hole.ztop - hole.zbottom, 2))
+        groups.setdefault(key, []).append(hole)
+    for (diam, depth), holes in groups.items():
+        faces = [f for h in holes for f in h.faces]
+        centers = [[h.center.x, h.center.y] for h in holes]
+        plans.append(("Perçage", faces, diam, depth, len(holes), centers))
+
+    return plans
+
+
+def _compute_geometry(op_type, faces, count, centers):
+    """Grandeurs de l'opération tirées de ses faces (profondeur, surface, contour...)."""
+    contour = op_type == "Contournage"
+    geometry = {
+        "depth": faces_depth(faces),
+        "area": faces_area(faces) if op_type in ("Surfaçage", "Poche") else 0.0,
+        "length": faces_contour_length(faces) if contour else 0.0,
+        "count": count,
+    }
+    if op_type in ("Poche", "Contournage"):
+        geometry["outline"] = faces_outline(faces)
+    elif centers:
+        geometry["holes"] = centers
+    return geometry
+
+
+@traced("operations")
+def generate_operations(part, library, stock=None, stats=None):
+    """
+    Opérations de toute la pièce `part`, chiffrées.
+
+    stock : brut (objet PC_IsStock) dont les surépaisseurs sont appliquées
+    au surfaçage et au contournage.
+    stats : dict complété par {"features": opérations analysées,
+            "reused": géométries relues dans le dépôt}
+
+    Retourne (opérations, ignorées) ; ignorées = [(op_type, raison)].
+    """
+    shape = part.Shape
+    names = _face_names(shape)
+
+    margins = None
+    if stock is not None and hasattr(stock, "PC_MarginsJSON"):
+        margins = json.loads(stock.PC_MarginsJSON or "{}")
+
+    if stats is not None:
+        stats.update(features=0, reused=0)
+    ops, skipped = [], []
+    for op_type, faces, size, depth_user, count, centers in _plan_operations(shape):
+        tool = choose_tool(library, op_type, size)
+        if tool is None:
+            skipped.append((op_type, f"aucun outil adapté (Ø {size:.2f})"))
+            continue
+
+        cutting = dict(AUTO_CUTTING[op_type])
+        cutting.update({
+            "z_plus": 0.0,
+            "xy_surplus": 0.0,
+            "depth_user": depth_user,
+            "use_stock_margins": margins is not None and op_type in ("Surfaçage", "Contournage"),
+        })
+
+        # relue dans le dépôt sous l'empreinte des faces (feature_key) :
+        # une feature inchangée d'une variante à l'autre n'est pas réanalysée
+        geometry, reused = cached_feature_section(
+            faces, f"geometry:{op_type}",
+            lambda: _compute_geometry(op_type, faces, count, centers),
+        )
+        if stats is not None:
+            stats["features"] += 1
+            stats["reused"] += reused
+
+        try:
+            res = compute_operation(
+                op_type, (tool.diam, tool.z, tool.vc, tool.fz), cutting, geometry, margins
+            )
+        except ValueError as e:
+            skipped.append((op_type, str(e)))
+            continue
+
+        params = {"diam": tool.diam, "z": tool.z, "vc": tool.vc, "fz": tool.fz}
+        params.update(cutting)
+        ops.append({
+            "type": op_type,
+            "time_h": res["time_h"],
+            "source": "Auto",
+            "tool": tool.name,
+            "params": params,
+            "links": [(part, [names[f.hashCode()] for f in faces])],
+            "geometry": geometry,
+        })
+
+    return ops, skipped
+
+
+def drilling_cycle_time(part, library, rapid_feed_mm_min=None):
+    """
+    Temps de perçage de la pièce au modèle de cycles (costing_core.drilling),
+    forets choisis comme pour les opérations Perçage ; départ au coin
+    XMin / YMin de la pièce. Retourne le résultat de drilling_time, ou
+    None si la pièce n'a pas de trou.
+    """
+    from costing_core.drilling import RAPID_FEED, drilling_time
+
+    shape = part.Shape
+    holes = [(h.center.x, h.center.y, round(2 * h.radius, 2), h.ztop - h.zbottom, h.ztop)
+             for h in part_features(shape).holes]
+    if not holes:
+        return None
+    bb = shape.BoundBox
+    return drilling_time(
+        holes, lambda diam: choose_tool(library, "Perçage", diam),
+        rapid_feed_mm_min=rapid_feed_mm_min or RAPID_FEED, start=(bb.XMin, bb.YMin),
+    )
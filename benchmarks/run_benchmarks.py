@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+run_benchmarks.py — Banc de mesure du chiffrage (micro / macro)
+
+Usage (depuis le dossier du module) :
+
+    python benchmarks/run_benchmarks.py                   # calculs purs
+    FreeCADCmd benchmarks/run_benchmarks.py               # + géométrie
+    python benchmarks/run_benchmarks.py --quick -o new.json
+    python benchmarks/run_benchmarks.py --compare base.json --threshold 1.25
+
+Chaque cas est mesuré pour plusieurs tailles (repeat fois, on garde le
+meilleur temps et la médiane). Le résultat est écrit en JSON :
+
+    {"meta": {...}, "results": [{"case", "size", "best_s", "median_s", "repeat"}]}
+
+--compare : rapport temps / référence par (case, size) ; code de sortie 1
+si un cas dépasse le seuil (régression).
+
+Les cas "géométrie" (detect_milling_features, create_intelligent_stock)
+ne tournent que si FreeCAD est importable ; les autres (modèles de
+machining, parcours Path synthétiques, graphe de chiffrage, orientation
+du brut, catalogues) tournent partout.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import synthetic  # noqa: E402
+
+try:
+    import FreeCAD
+except ImportError:
+    FreeCAD = None
+
+
+# ======================================================================
+#  MESURE
+# ======================================================================
+
+def measure(fn, repeat):
+    """Temps (s) de `repeat` appels de fn() ; fn est préparé hors mesure."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), statistics.median(times)
+
+
+# ======================================================================
+#  CAS : CALCULS PURS
+# ======================================================================
+
+def case_machining_models(size):
+    """`size` appels de machining.compute_operation_time, tous types d'opération."""
+    import machining
+
+    ops = machining.OP_TYPES
+
+    def run():
+        for i in range(size):
+            op = ops[i % len(ops)]
+            machining.compute_operation_time(
+                op, 10.0 + i % 5, 4, 200.0, 0.05, 40.0, 2.0, 10.0 + i % 7,
+                xy_surplus=1.0, area=2500.0, length=400.0, count=1 + i % 4,
+            )
+    return run
+
+
+def case_path_segments(size):
+    """cam_calc._extract_path_segments (path.Commands) sur un surfaçage de `size` passes."""
+    from cam_calc import _extract_path_segments
+
+    path = synthetic.PathOp(synthetic.zigzag_facing(size)).Path
+    return lambda: _extract_path_segments(path)
+
+
+def case_gcode_arrays(size):
+    """timeline.gcode_arrays (path.toGCode() + NumPy), même parcours que ci-dessus."""
+    from costing_core.timeline import gcode_arrays
+
+    path = synthetic.PathOp(synthetic.zigzag_facing(size)).Path
+    return lambda: gcode_arrays(path.toGCode())
+
+
+def case_path_time(size):
+    """cam_calc.compute_time_from_path_op : poche spirale + perçages."""
+    from cam_calc import compute_time_from_path_op
+
+    op = synthetic.PathOp(synthetic.spiral_pocket(max(1, size // 64)) + synthetic.drilling_cycles(size // 8))
+    return lambda: compute_time_from_path_op(op, 800.0, rapid_feed_mm_min=5000.0, include_rapids=True)
+
+
+def case_path_timeline(size):
+    """costing_core.timeline : chronologie + agrégation par tranche de Z."""
+    from costing_core.timeline import by_z_band, path_timeline
+
+    op = synthetic.PathOp(synthetic.spiral_pocket(max(1, size // 64)) + synthetic.drilling_cycles(size // 8))
+
+    def run():
+        tl = path_timeline(op, 800.0, rapid_feed_mm_min=5000.0, include_rapids=True)
+        by_z_band(tl, 1.0)
+    return run
+
+
+def case_quote_graph(size):
+    """QuoteGraph de `size` opérations : changement d'outil puis total."""
+    from cost_graph import QuoteGraph
+
+    graph = QuoteGraph(60.0)
+    tools = [f"T{i}" for i in range(8)]
+    for name in tools:
+        graph.set_tool_params(name, (10.0, 4, 200.0, 0.05))
+    cutting = {"ae_pct": 40.0, "ap_max": 2.0, "z_plus": 0.0, "xy_surplus": 0.0,
+               "depth_user": 0.0, "use_stock_margins": False}
+    for i in range(size):
+        graph.add_operation(f"op{i}", "Poche", tools[i % len(tools)], cutting,
+                            {"depth": 5.0, "area": 1000.0, "length": 0.0, "count": 1})
+    graph.total_cost()
+    state = {"vc": 200.0}
+
+    def run():
+        state["vc"] += 1.0
+        graph.set_tool_params("T0", (10.0, 4, state["vc"], 0.05))
+        graph.total_cost()
+    return run
+
+
+def case_quote_uncertainty(size):
+    """Monte-Carlo (100 000 tirages) d'un devis de `size` opérations."""
+    from cost_graph import QuoteGraph
+    from costing_core.uncertainty import graph_uncertainty
+    from machining import OP_TYPES
+
+    graph = QuoteGraph(60.0)
+    for t in range(10):
+        graph.set_tool_params(f"T{t}", (4.0 + t, 2 + t % 3, 150.0 + 10 * t, 0.03 + 0.005 * t))
+    for i in range(size):
+        cutting = {"ae_pct": 30.0 + i % 20, "ap_max": 2.0, "z_plus": 0.0,
+                   "xy_surplus": 0.5 * (i % 5), "depth_user": 0.0, "use_stock_margins": False}
+        graph.add_operation(f"op{i}", OP_TYPES[i % len(OP_TYPES)], f"T{i % 10}", cutting,
+                            {"depth": 5.0 + i % 7, "area": 800.0 + 10 * i,
+                             "length": 300.0 + i, "count": 1 + i % 3})
+    return lambda: graph_uncertainty(graph)
+
+
+def case_pocket_path(size):
+    """costing_core.offsets : vidage d'une poche ondulée de `size` sommets (Ø10, ae 4)."""
+    from costing_core.offsets import pocket_path
+
+    outline = [((60.0 + 8.0 * math.sin(7 * a)) * math.cos(a),
+                (40.0 + 8.0 * math.sin(7 * a)) * math.sin(a))
+               for a in (2.0 * math.pi * i / size for i in range(size))]
+    return lambda: pocket_path(outline, (), 10.0, 4.0)
+
+
+def case_face_graph(size):
+    """costing_core.topology : graphe CSR + reconnaissance, size × size poches (5 faces chacune)."""
+    from costing_core.topology import FaceGraph, recesses
+
+    kinds, directions, pairs = synthetic.pocket_grid_graph(size, size)
+    return lambda: recesses(FaceGraph(kinds, directions, pairs))
+
+
+def case_drilling_time(size):
+    """costing_core.drilling : `size` trous de 5 Ø (forets de tools.csv), ordre 2-opt."""
+    import numpy as np
+    from costing_core.drilling import drilling_time
+    from machining_tools import get_library
+
+    library = get_library()
+    rng = np.random.default_rng(size)
+    diameters = (3.0, 5.0, 7.0, 10.0, 12.0)
+    holes = np.column_stack([
+        rng.random((size, 2)) * (600.0, 400.0),
+        rng.choice(diameters, size),
+        rng.uniform(3.0, 45.0, size),
+    ])
+    drills = {d: library.find(d - 0.1, d + 0.1, type="Foret")[0] for d in diameters}
+    return lambda: drilling_time(holes, drills.get)
+
+
+def _cloud(size):
+    """Nuage de `size` points dans une boîte 120 × 45 × 12 tournée autour de Z."""
+    import numpy as np
+
+    rng = np.random.default_rng(size)
+    c, s = math.cos(0.5), math.sin(0.5)
+    rot = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+    return (rng.random((size, 3)) * (120.0, 45.0, 12.0)) @ rot.T
+
+
+def case_oriented_box(size):
+    """stock_orientation.best_oriented_box sur un nuage tourné de `size` points."""
+    from stock_orientation import best_oriented_box
+
+    points = _cloud(size)
+    return lambda: best_oriented_box(points)
+
+
+def case_turning_axis(size):
+    """stock_orientation.best_turning_axis (cercle minimal de Welzl)."""
+    from stock_orientation import best_turning_axis
+
+    points = _cloud(size)
+    return lambda: best_turning_axis(points)
+
+
+def case_stock_catalog(size):
+    """`size` recherches du brut catalogue le moins cher."""
+    from stock_catalog import load_catalog
+
+    catalog = load_catalog()
+    reqs = [(20.0 + i % 180, 10.0 + (i * 7) % 90, 5.0 + (i * 3) % 40) for i in range(size)]
+
+    def run():
+        for r in reqs:
+            catalog.match(r, "Acier")
+    return run
+
+
+def case_tool_library(size):
+    """`size` requêtes ToolLibrary.find par plage de Ø."""
+    from machining_tools import get_library
+
+    library = get_library()
+
+    def run():
+        for i in range(size):
+            library.find(1.0 + i % 20, 4.0 + i % 20)
+    return run
+
+
+# ======================================================================
+#  CAS : GÉOMÉTRIE (FreeCAD)
+# ======================================================================
+
+def case_detect_features(part):
+    def factory(size):
+        from milling_features import detect_milling_features
+
+        shape = part(size)
+        return lambda: detect_milling_features(shape)
+    return factory
+
+
+def case_intelligent_stock(part):
+    def factory(size):
+        import analysis_store
+        from stock_intelligent import create_intelligent_stock
+
+        analysis_store.use_store(None)  # mesurer le calcul, pas le dépôt
+        shape = part(size)
+        doc = FreeCAD.ActiveDocument or FreeCAD.newDocument("PartCostingBench")
+
+        def run():
+            stock = create_intelligent_stock(shape)[0]
+            doc.removeObject(stock.Name)
+        return run
+    return factory
+
+
+# (nom, fabrique(size) → callable, tailles, tailles --quick)
+PURE_CASES = [
+    ("machining.compute_operation_time", case_machining_models, (1000, 10000, 100000), (1000,)),
+    ("cam_calc._extract_path_segments", case_path_segments, (100, 1000, 10000), (100,)),
+    ("timeline.gcode_arrays", case_gcode_arrays, (100, 1000, 10000), (100,)),
+    ("cam_calc.compute_time_from_path_op", case_path_time, (256, 4096, 32768), (256,)),
+    ("timeline.path_timeline", case_path_timeline, (256, 4096, 32768), (256,)),
+    ("cost_graph.QuoteGraph", case_quote_graph, (10, 100, 1000), (10,)),
+    ("uncertainty.graph_uncertainty", case_quote_uncertainty, (20, 200, 1000), (20,)),
+    ("drilling.drilling_time", case_drilling_time, (200, 2000, 20000), (200,)),
+    ("offsets.pocket_path", case_pocket_path, (64, 512, 4096), (64,)),
+    ("topology.recesses", case_face_graph, (10, 50, 200), (10,)),
+    ("stock_orientation.best_oriented_box", case_oriented_box, (10000, 100000, 1000000), (10000,)),
+    ("stock_orientation.best_turning_axis", case_turning_axis, (10000, 100000, 1000000), (10000,)),
+    ("stock_catalog.match", case_stock_catalog, (100, 1000, 10000), (100,)),
+    ("tool_library.find", case_tool_library, (100, 1000, 10000), (100,)),
+]
+
+GEOMETRY_CASES = [
+    ("detect_milling_features[plate_with_holes]",
+     case_detect_features(synthetic.plate_with_holes), (4, 36, 144), (4,)),
+    ("detect_milling_features[pocket_grid]",
+     case_detect_features(lambda n: synthetic.pocket_grid(n, n)), (2, 5, 10), (2,)),
+    ("detect_milling_features[filleted_block]",
+     case_detect_features(synthetic.filleted_block), (2, 5, 10), (2,)),
+    ("detect_milling_features[faceted_shell]",
+     case_detect_features(synthetic.faceted_shell), (8, 24, 48), (8,)),
+    ("create_intelligent_stock[plate_with_holes]",
+     case_intelligent_stock(synthetic.plate_with_holes), (4, 36, 144), (4,)),
+    ("create_intelligent_stock[faceted_shell]",
+     case_intelligent_stock(synthetic.faceted_shell), (8, 24, 48), (8,)),
+]
+
+
+# ======================================================================
+#  EXÉCUTION / COMPARAISON
+# ======================================================================
+
+def run_cases(cases, quick=False, repeat=5, only=None):
+    results = []
+    for name, factory, sizes, quick_sizes in cases:
+        if only and only not in name:
+            continue
+        for size in (quick_sizes if quick else sizes):
+            fn = factory(size)
+            fn()  # échauffement (imports, caches)
+            best, median = measure(fn, repeat)
+            results.append({"case": name, "size": size, "best_s": best,
+                            "median_s": median, "repeat": repeat})
+            print(f"{name:<48} {size:>8}  {best * 1000:10.3f} ms  (méd. {median * 1000:.3f})")
+    return results
+
+
+def metadata():
+    import numpy
+
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "freecad": ".".join(FreeCAD.Version()[:3]) if FreeCAD is not None else None,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Affiche les rapports temps / référence ; retourne les régressions."""
+    ref = {(r["case"], r["size"]): r["best_s"] for r in baseline.get("results", ())}
+    regressions = []
+    for r in results:
+        base = ref.get((r["case"], r["size"]))
+        if not base:
+            continue
+        ratio = r["best_s"] / base
+        flag = "  ⚠ RÉGRESSION" if ratio > threshold else ""
+        print(f"{r['case']:<48} {r['size']:>8}  × {ratio:5.2f}{flag}")
+        if ratio > threshold:
+            regressions.append((r["case"], r["size"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks PartCosting")
+    parser.add_argument("-o", "--output", help="fichier JSON de résultats")
+    parser.add_argument("--quick", action="store_true", help="petites tailles uniquement")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="ne lancer que les cas contenant ce texte")
+    parser.add_argument("--compare", help="JSON de référence")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="rapport temps / référence toléré (défaut 1.25)")
+    args = parser.parse_args(argv)
+
+    cases = list(PURE_CASES)
+    if FreeCAD is not None:
+        cases += GEOMETRY_CASES
+    else:
+        print("FreeCAD introuvable : cas géométriques ignorés.")
+
+    results = run_cases(cases, args.quick, args.repeat, args.only)
+    report = {"meta": metadata(), "results": results}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
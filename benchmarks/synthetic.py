@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+synthetic.py — Pièces et parcours synthétiques paramétrés (benchmarks)
+
+Deux familles de générateurs :
+
+- Pièces (nécessitent FreeCAD / Part, importé à l'appel) :
+    plate_with_holes(n)      plaque percée de n trous (grille)
+    pocket_grid(nx, ny)      bloc avec une grille de poches
+    filleted_block(r)        bloc aux arêtes congé r
+    faceted_shell(n)         coque libre facettée (n × n × 2 triangles)
+
+- Parcours Path (pur Python, sans FreeCAD) : flux de commandes G-code
+  au format attendu par cam_calc (objets .Name / .Parameters) :
+    zigzag_facing(passes, ...)     surfaçage en aller-retour
+    spiral_pocket(turns, ...)      poche en spirale (segments G1)
+    drilling_cycles(n, ...)        perçages (G0 / G1 / G0)
+    PathOp(commands)               opération factice : op.Path.Commands
+
+- Graphe d'adjacence des faces (pur Python) : arguments de
+  costing_core.topology.FaceGraph pour une pièce type pocket_grid :
+    pocket_grid_graph(nx, ny)      bloc, nx × ny poches fermées et une
+                                   rainure traversante par rangée
+
+Les commandes synthétiques ne sont que des structures de données : elles
+remplacent Path.Command là où cam_calc ne lit que Name et Parameters
+(comme Path.Command, chaque accès à Parameters rend un nouveau dict) ;
+PathOp.Path.toGCode() produit le texte au format de Path.toGCode(),
+mis en cache (dans FreeCAD c'est une sérialisation C++, hors mesure ici).
+"""
+
+import math
+from collections import namedtuple
+
+
+# ======================================================================
+#  COMMANDES PATH SYNTHÉTIQUES
+# ======================================================================
+
+class Command(namedtuple("Command", ("Name", "params"))):
+    __slots__ = ()
+
+    @property
+    def Parameters(self):
+        return dict(self.params)
+
+    def toGCode(self):
+        words = " ".join(f"{k}{v:.6f}" for k, v in sorted(self.params.items()))
+        return f"{self.Name} {words}" if words else self.Name
+
+
+class _Path:
+    __slots__ = ("Commands", "_gcode")
+
+    def __init__(self, commands):
+        self.Commands = commands
+        self._gcode = None
+
+    def toGCode(self):
+        if self._gcode is None:
+            self._gcode = "".join(c.toGCode() + "\n" for c in self.Commands)
+        return self._gcode
+
+
+class PathOp:
+    """Opération Path minimale pour cam_calc.compute_time_from_path_op."""
+
+    def __init__(self, commands, label="SyntheticOp"):
+        self.Path = _Path(list(commands))
+        self.Label = label
+
+
+def zigzag_facing(passes, width=100.0, step=5.0, z=0.0, safe_z=5.0, feed=800.0):
+    """Surfaçage aller-retour : `passes` lignes de `width` mm espacées de `step`."""
+    cmds = [Command("G0", {"X": 0.0, "Y": 0.0, "Z": safe_z}),
+            Command("G1", {"Z": z, "F": feed})]
+    for i in range(passes):
+        x = width if i % 2 == 0 else 0.0
+        cmds.append(Command("G1", {"X": x, "Y": i * step, "F": feed}))
+        cmds.append(Command("G1", {"Y": (i + 1) * step}))
+    cmds.append(Command("G0", {"Z": safe_z}))
+    return cmds
+
+
+def spiral_pocket(turns, radius=40.0, seg_per_turn=64, depth=-5.0, safe_z=5.0, feed=600.0):
+    """Poche en spirale d'Archimède approchée par des segments G1."""
+    n = turns * seg_per_turn
+    cmds = [Command("G0", {"X": 0.0, "Y": 0.0, "Z": safe_z}),
+            Command("G1", {"Z": depth, "F": feed})]
+    for i in range(1, n + 1):
+        a = 2.0 * math.pi * i / seg_per_turn
+        r = radius * i / n
+        cmds.append(Command("G1", {"X": r * math.cos(a), "Y": r * math.sin(a)}))
+    cmds.append(Command("G0", {"Z": safe_z}))
+    return cmds
+
+
+def drilling_cycles(n, pitch=10.0, depth=-12.0, safe_z=3.0, feed=150.0):
+    """n perçages en grille carrée : approche G0, descente G1, remontée G0."""
+    side = max(1, int(math.ceil(math.sqrt(n))))
+    cmds = []
+    for i in range(n):
+        x, y = (i % side) * pitch, (i // side) * pitch
+        cmds.append(Command("G0", {"X": x, "Y": y, "Z": safe_z}))
+        cmds.append(Command("G1", {"Z": depth, "F": feed}))
+        cmds.append(Command("G0", {"Z": safe_z}))
+    return cmds
+
+
+# ======================================================================
+#  GRAPHE D'ADJACENCE DES FACES
+# ======================================================================
+
+def pocket_grid_graph(nx, ny):
+    """
+    (kinds, directions, pairs) d'un bloc portant nx × ny poches
+    rectangulaires et, entre deux rangées, une rainure traversante suivant X.
+    """
+    from costing_core.topology import CEILING, CONCAVE, CONVEX, FLOOR, NO_DIRECTION, WALL
+
+    kinds = [FLOOR, CEILING, WALL, WALL, WALL, WALL]     # dessus, dessous, 4 flancs
+    directions = [NO_DIRECTION, NO_DIRECTION, 0, 90, 180, 270]
+    pairs = [(f, s, CONVEX) for f in (0, 1) for s in range(2, 6)]
+    pairs += [(2 + i, 2 + (i + 1) % 4, CONVEX) for i in range(4)]
+
+    def face(kind, direction=NO_DIRECTION):
+        kinds.append(kind)
+        directions.append(direction)
+        return len(kinds) - 1
+
+    for _ in range(nx * ny):
+        floor = face(FLOOR)
+        walls = [face(WALL, d) for d in (180, 270, 0, 90)]   # normales vers la poche
+        pairs += [(floor, w, CONCAVE) for w in walls]
+        pairs += [(0, w, CONVEX) for w in walls]
+        pairs += [(walls[i], walls[(i + 1) % 4], CONCAVE) for i in range(4)]
+
+    for _ in range(max(ny - 1, 0)):
+        floor, a, b = face(FLOOR), face(WALL, 90), face(WALL, 270)
+        pairs += [(floor, a, CONCAVE), (floor, b, CONCAVE), (0, a, CONVEX), (0, b, CONVEX)]
+        pairs += [(floor, 2, CONVEX), (floor, 4, CONVEX)]     # débouche sur les flancs X
+
+    return kinds, directions, pairs
+
+
+# ======================================================================
+#  PIÈCES (FreeCAD)
+# ======================================================================
+
+def plate_with_holes(n, diameter=6.0, pitch=12.0, thickness=10.0):
+    """Plaque percée de n trous débouchants en grille."""
+    import FreeCAD
+    import Part
+
+    side = max(1, int(math.ceil(math.sqrt(n))))
+    size = side * pitch + pitch
+    plate = Part.makeBox(size, size, thickness)
+    tools = [
+        Part.makeCylinder(diameter / 2.0, thickness + 2.0,
+                          FreeCAD.Vector(pitch + (i % side) * pitch, pitch + (i // side) * pitch, -1.0))
+        for i in range(n)
+    ]
+    if not tools:
+        return plate
+    return plate.cut(Part.makeCompound(tools))
+
+
+def pocket_grid(nx, ny, cell=20.0, wall=4.0, depth=8.0, height=15.0):
+    """Bloc avec nx × ny poches rectangulaires ouvertes vers le haut."""
+    import FreeCAD
+    import Part
+
+    block = Part.makeBox(nx * cell + wall, ny * cell + wall, height)
+    size = cell - wall
+    pockets = [
+        Part.makeBox(size, size, depth + 1.0,
+                     FreeCAD.Vector(wall + i * cell, wall + j * cell, height - depth))
+        for i in range(nx) for j in range(ny)
+    ]
+    return block.cut(Part.makeCompound(pockets))
+
+
+def filleted_block(radius, length=120.0, width=80.0, height=40.0):
+    """Bloc dont toutes les arêtes sont congées (faces cylindriques / toriques)."""
+    import Part
+
+    box = Part.makeBox(length, width, height)
+    return box.makeFillet(radius, box.Edges)
+
+
+def faceted_shell(n, size=200.0, amplitude=15.0):
+    """Coque libre facettée : surface z = f(x, y) triangulée (2 n² faces planes)."""
+    import FreeCAD
+    import Part
+
+    def point(i, j):
+        x, y = size * i / n, size * j / n
+        z = amplitude * math.sin(3.0 * x / size * math.pi) * math.cos(2.0 * y / size * math.pi)
+        return FreeCAD.Vector(x, y, z)
+
+    grid = [[point(i, j) for j in range(n + 1)] for i in range(n + 1)]
+    faces = []
+    for i in range(n):
+        for j in range(n):
+            a, b, c, d = grid[i][j], grid[i + 1][j], grid[i + 1][j + 1], grid[i][j + 1]
+            faces.append(Part.Face(Part.makePolygon([a, b, c, a])))
+            faces.append(Part.Face(Part.makePolygon([a, c, d, a])))
+    return Part.Shell(faces)
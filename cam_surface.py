@@ -3,7 +3,10 @@ import Path
 import PathScripts.PathJob as PathJob
 import PathScripts.PathOpFace as PathOpFace
 
+from tracing import traced
 
+
+@traced("cam")
 def compute_surface_cam(part_obj, face, tool_diam, vc, fz, z_depth, stock_obj=None):
     doc = FreeCAD.ActiveDocument
     if not doc:
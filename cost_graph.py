@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+cost_graph.py — Compatibilité : graphe de dépendances du chiffrage, dans costing_core.graph
+(paquet sans FreeCAD).
+"""
+
+from costing_core.graph import *  # noqa: F401,F403
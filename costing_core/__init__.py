@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+costing_core — Calculs du chiffrage, sans FreeCAD ni Qt
+
+Paquet importable seul (processus de calcul, service web, benchmarks) :
+il ne dépend que de la bibliothèque standard et ne lit aucun fichier à
+l'import. NumPy, s'il est présent, accélère la lecture des parcours Path
+(cam_time) et sert au modèle de cycles des opérations Perçage
+(machining → drilling ; temps au volume sans NumPy) ; il n'est importé
+qu'au premier parcours lu ou au premier Perçage chiffré.
+
+    chip       débit copeaux (ex chip_calc)
+    volumes    volumes à enlever par opération (ex machining_ops)
+    machining  temps des opérations Surfaçage / Contournage / Poche / Perçage
+    offsets    longueur des parcours de poche / contour par décalages du contour
+    cam_time   temps d'un parcours Path (commandes G0 / G1 / G2 / G3)
+    graph      graphe de dépendances du devis (ex cost_graph)
+    topology   graphe d'adjacence des faces (CSR) ; poches, rainures,
+               épaulements, lamages
+    uncertainty  Monte-Carlo du devis (P50 / P90, sensibilités) ; NumPy,
+               donc non importé ici
+    timeline   chronologie segment par segment d'un parcours Path
+               (tableau structuré NumPy, agrégations) ; idem
+    drilling   temps de perçage en cycles (débourrage, retraits) et ordre
+               des trous (plus proche voisin + 2-opt) ; idem
+
+Les modules historiques du workbench (chip_calc, machining_ops,
+machining, cam_calc, cost_graph) réexportent ces modules.
+"""
+
+from .cam_time import compute_time_from_path_op
+from .chip import compute_chip_based_time
+from .graph import CostGraph, QuoteGraph, compute_operation, effective_surplus
+from .machining import OP_TYPES, compute_operation_time
+from .volumes import MachiningOperation, compute_volume_mm3
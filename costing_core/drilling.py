@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+"""
+costing_core/drilling.py — Temps de perçage : cycles à débourrage et ordre des trous
+
+Le temps des opérations "Perçage" de machining (operation_time) et celui
+de tous les trous d'une pièce (drilling_time) suivent un cycle de
+perçeuse CN, avec l'avance du foret (Vc / Fz de tools.csv) :
+
+    profondeur ≤ PECK_DEPTH × Ø            G81 : une seule plongée
+    profondeur ≤ DEEP_HOLE_RATIO × Ø       G73 : brise-copeaux (recul CHIP_BREAK)
+    au-delà                                G83 : débourrage, remontée au plan R
+                                           à chaque becquée de PECK_DEPTH × Ø
+
+Plan R à RETRACT mm au-dessus du trou, reprise en avance CLEARANCE mm
+avant le fond précédent. Entre deux trous : rapide dans le plan de
+dégagement du groupe (plus haut plan R).
+
+Les trous sont regroupés par outil (un changement d'outil par groupe,
+Ø croissants) ; dans un groupe l'ordre de visite est une tournée du plus
+proche voisin améliorée par 2-opt :
+
+- voisins candidats (k plus proches approchés) : fenêtres de tri selon
+  des courbes de Morton décalées et selon X / Y, tout en NumPy (rôle du
+  KD-tree, sans dépendance à SciPy) ;
+- plus proche voisin : premier candidat non visité, sinon le plus proche
+  des non visités voisins dans les ordres de Morton ;
+- 2-opt du cycle sur les listes de voisins (gains calculés par tableaux,
+  MAX_PASSES passes au plus), puis coupure du cycle à l'arête qui donne
+  le chemin le plus court depuis la position précédente.
+
+    res = drilling_time(holes, tool_for, rapid_feed_mm_min=10000.0)
+    res = operation_time(diam, vf_mm_min, depth, count, positions)   # une opération
+    holes    : tableau (n, 4) x, y, Ø, profondeur (+ 5e colonne Z haut)
+    tool_for : Ø → outil (.name .diam .z .vc .fz) ou None
+
+Nécessite NumPy (importé par ce module seulement, pas par costing_core).
+"""
+
+import math
+
+import numpy as np
+
+from .chip import compute_feed, compute_rpm
+
+
+# Cycles
+PECK_DEPTH = 1.0          # becquée = PECK_DEPTH × Ø
+DEEP_HOLE_RATIO = 3.0     # au-delà de DEEP_HOLE_RATIO × Ø : G83
+RETRACT = 2.0             # mm : plan R au-dessus du trou
+CLEARANCE = 0.5           # mm : reprise en avance avant le fond précédent (G83)
+CHIP_BREAK = 0.5          # mm : recul du brise-copeaux (G73)
+TOOL_CHANGE_MIN = 0.15    # min par outil
+RAPID_FEED = 10000.0      # mm/min
+
+# Ordre de visite
+NEIGHBOURS = 8            # voisins candidats par trou
+WINDOW = 4                # demi-fenêtre dans chaque ordre de tri
+MAX_PASSES = 20           # passes 2-opt
+MORTON_SHIFTS = (0.0, 1.0 / 3.0, 2.0 / 3.0)
+MIN_GAIN = 1e-6           # mm
+
+CYCLES = ("G81", "G73", "G83")
+
+
+# ======================================================================
+#  VOISINS CANDIDATS
+# ======================================================================
+
+def _spread_bits(v):
+    """Intercale des zéros entre les 16 bits bas (code de Morton)."""
+    v = v.astype(np.uint32) & 0xFFFF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def _morton_order(xy, shift=0.0):
+    """Ordre des points le long d'une courbe de Morton (grille décalée de shift)."""
+    lo = xy.min(axis=0)
+    span = max(float((xy.max(axis=0) - lo).max()), 1e-9)
+    q = ((xy - lo) * (0.75 * 65535.0 / span) + shift * 16384.0).astype(np.int64)
+    return np.argsort(_spread_bits(q[:, 0]) | (_spread_bits(q[:, 1]) << 1), kind="stable")
+
+
+def _sort_orders(xy):
+    """Ordres de tri des points : Morton (3 décalages), X, Y."""
+    orders = [np.argsort(xy[:, 0], kind="stable"), np.argsort(xy[:, 1], kind="stable")]
+    orders += [_morton_order(xy, shift) for shift in MORTON_SHIFTS]
+    return orders
+
+
+def candidate_neighbours(xy, k=NEIGHBOURS, window=WINDOW):
+    """
+    (n, k) indices des k plus proches voisins approchés de chaque point,
+    triés par distance (candidats : ±window voisins dans chaque ordre de tri).
+    """
+    n = len(xy)
+    k = min(k, n - 1)
+    cands = []
+    for order in _sort_orders(xy):
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+        for off in range(-window, window + 1):
+            if off:
+                cands.append(order[np.clip(rank + off, 0, n - 1)])
+    cands = np.sort(np.column_stack(cands), axis=1)
+
+    d = np.hypot(*(xy[cands] - xy[:, None, :]).transpose(2, 0, 1))
+    d[cands == np.arange(n)[:, None]] = np.inf
+    d[:, 1:][cands[:, 1:] == cands[:, :-1]] = np.inf   # doublons
+    best = np.argpartition(d, k - 1, axis=1)[:, :k]
+    rows = np.arange(n)[:, None]
+    best = best[rows, np.argsort(d[rows, best], axis=1)]
+    return cands[rows, best]
+
+
+# ======================================================================
+#  TOURNÉE : PLUS PROCHE VOISIN + 2-OPT
+# ======================================================================
+
+def _find(parent, r):
+    """Représentant de r (union-find avec compression de chemin)."""
+    root = r
+    while parent[root] != root:
+        root = parent[root]
+    while parent[r] != root:
+        parent[r], r = root, parent[r]
+    return root
+
+
+def nearest_neighbour_tour(xy, neighbours, first=0, fallback=WINDOW):
+    """
+    Tournée ouverte du plus proche voisin partant de `first`.
+
+    Prochain point : premier candidat non visité de la liste de voisins ;
+    si tous sont visités, le plus proche des `fallback` points non visités
+    de part et d'autre dans chaque ordre de Morton (pointeurs de saut vers
+    le prochain non visité).
+    """
+    n = len(xy)
+    xs, ys = xy[:, 0].tolist(), xy[:, 1].tolist()
+    curves = []
+    for shift in MORTON_SHIFTS:
+        order = _morton_order(xy, shift).tolist()
+        rank = [0] * n
+        for r, i in enumerate(order):
+            rank[i] = r
+        # right : rang r → prochain non visité ≥ r (n : fin)
+        # left  : rang r + 1 → précédent non visité ≤ r, + 1 (0 : début)
+        curves.append((order, rank, list(range(n + 1)), list(range(n + 1))))
+    flags = bytearray(n)
+    lists = neighbours.tolist()
+    hypot = math.hypot
+
+    tour = []
+    cur = first
+    for _ in range(n):
+        tour.append(cur)
+        flags[cur] = 1
+        for _, rank, right, left in curves:
+            r = rank[cur]
+            right[r] = r + 1
+            left[r + 1] = r
+        for j in lists[cur]:
+            if not flags[j]:
+                cur = j
+                break
+        else:
+            found = []
+            for order, rank, right, left in curves:
+                r = rank[cur]
+                q = _find(right, r)
+                for _ in range(fallback):
+                    if q >= n:
+                        break
+                    found.append(order[q])
+                    q = _find(right, q + 1)
+                q = _find(left, r + 1)
+                for _ in range(fallback):
+                    if q <= 0:
+                        break
+                    found.append(order[q - 1])
+                    q = _find(left, q - 1)
+            if not found:
+                break
+            x0, y0 = xs[cur], ys[cur]
+            cur = min(found, key=lambda j: hypot(xs[j] - x0, ys[j] - y0))
+    return np.array(tour, dtype=np.int64)
+
+
+def _dist(x, y, a, b):
+    return np.hypot(x[a] - x[b], y[a] - y[b])
+
+
+def _reverse(tour, pos, s, e):
+    """
+    Inverse le segment circulaire tour[s .. e] (ou son complément, s'il est
+    plus court : même cycle). Retourne les points déplacés.
+    """
+    n = len(tour)
+    length = (e - s) % n + 1
+    if 2 * length > n:
+        s, e, length = (e + 1) % n, (s - 1) % n, n - length
+    if s + length <= n:
+        seg = tour[s:s + length][::-1].copy()
+        tour[s:s + length] = seg
+        pos[seg] = np.arange(s, s + length)
+    else:
+        idx = np.arange(s, s + length) % n
+        seg = tour[idx][::-1]
+        tour[idx] = seg
+        pos[seg] = idx
+    return seg
+
+
+def two_opt(xy, tour, neighbours, max_passes=MAX_PASSES):
+    """
+    2-opt d'un cycle sur les listes de voisins. À chaque passe, les gains
+    de tous les mouvements reliant un point à l'un de ses voisins (à la
+    place de l'arête vers son successeur, ou vers son prédécesseur) sont
+    calculés par tableaux ; les mouvements améliorants sont ensuite
+    appliqués du meilleur au moins bon, chacun revérifié sur le cycle
+    courant. Seuls les points déplacés à la passe précédente sont
+    réexaminés.
+    """
+    n = len(tour)
+    if n < 5:
+        return tour
+    x, y = np.ascontiguousarray(xy[:, 0]), np.ascontiguousarray(xy[:, 1])
+    xs, ys = x.tolist(), y.tolist()
+    hypot = math.hypot
+    tour = tour.copy()
+    k = neighbours.shape[1]
+    c_all = neighbours.ravel()
+    link_all = _dist(x, y, np.repeat(np.arange(n), k), c_all)   # nouvelle arête a – c
+    link_nk = link_all.reshape(n, k)
+    pos = np.empty(n, dtype=np.int64)
+    pos[tour] = np.arange(n)
+    active = np.ones(n, dtype=bool)
+    succ_len = np.empty(n)
+    pred_len = np.empty(n)
+
+    for _ in range(max_passes):
+        nxt = np.roll(tour, -1)
+        prv = np.roll(tour, 1)
+        edge = _dist(x, y, tour, nxt)                 # arête p → p+1
+        succ_len[tour] = edge
+        pred_len[nxt] = edge
+
+        # Mouvements utiles seulement si a – c est plus courte que l'arête
+        # remplacée en a (listes de voisins classiques)
+        moves = []
+        for side, length, other in ((0, succ_len, nxt), (1, pred_len, prv)):
+            rows = np.flatnonzero((link_nk < length[:, None]).ravel())
+            a_idx, c_idx = rows // k, c_all[rows]
+            keep = active[a_idx] | active[c_idx]
+            rows, a_idx, c_idx = rows[keep], a_idx[keep], c_idx[keep]
+            i, j = pos[a_idx], pos[c_idx]
+            gain = (length[a_idx] + length[c_idx] - link_all[rows]
+                    - _dist(x, y, other[i], other[j]))
+            gain[((j - i) % n <= 1) | ((i - j) % n <= 1)] = 0.0
+            moves.append((gain, a_idx, c_idx, np.full(len(rows), side, dtype=bool)))
+
+        gains = np.concatenate([m[0] for m in moves])
+        a_idx = np.concatenate([m[1] for m in moves])
+        c_idx = np.concatenate([m[2] for m in moves])
+        sides = np.concatenate([m[3] for m in moves])
+        good = np.flatnonzero(gains > MIN_GAIN)
+        if not len(good):
+            break
+        good = good[np.argsort(-gains[good], kind="stable")]
+
+        # Application séquentielle, gain recalculé sur le cycle courant
+        active[:] = False
+        applied = False
+        for a, c, before in zip(a_idx[good].tolist(), c_idx[good].tolist(), sides[good].tolist()):
+            i, j = pos.item(a), pos.item(c)
+            if (j - i) % n <= 1 or (i - j) % n <= 1:
+                continue
+            step = -1 if before else 1
+            u, v = tour.item((i + step) % n), tour.item((j + step) % n)
+            gain = (hypot(xs[a] - xs[u], ys[a] - ys[u]) + hypot(xs[c] - xs[v], ys[c] - ys[v])
+                    - hypot(xs[a] - xs[c], ys[a] - ys[c]) - hypot(xs[u] - xs[v], ys[u] - ys[v]))
+            if gain <= MIN_GAIN:
+                continue
+            if before:
+                seg = _reverse(tour, pos, i, (j - 1) % n)
+            else:
+                seg = _reverse(tour, pos, (i + 1) % n, j)
+            active[seg] = True
+            active[a] = active[c] = active[u] = active[v] = True
+            applied = True
+        if not applied:
+            break
+    return tour
+
+
+def open_tour(xy, cycle, start=None):
+    """
+    Chemin ouvert tiré d'un cycle : on retire l'arête qui minimise
+    (longueur du chemin + approche depuis start), dans un sens ou l'autre.
+    """
+    nxt = np.roll(cycle, -1)
+    edge = np.hypot(*(xy[nxt] - xy[cycle]).T)
+    if start is None:
+        approach_fwd = approach_back = np.zeros(len(cycle))
+    else:
+        approach_fwd = np.hypot(*(xy[nxt] - start).T)      # départ sur nxt, sens direct
+        approach_back = np.hypot(*(xy[cycle] - start).T)   # départ sur cycle[p], sens inverse
+    fwd = approach_fwd - edge
+    back = approach_back - edge
+    p = int(np.argmin(np.minimum(fwd, back)))
+    path = np.roll(cycle, -(p + 1))                # nxt[p] ... cycle[p]
+    return path if fwd[p] <= back[p] else path[::-1]
+
+
+def order_holes(xy, start=None):
+    """Ordre de visite (indices) des points xy, depuis `start` (x, y) ou le premier."""
+    xy = np.asarray(xy, dtype=float)
+    start = None if start is None else np.asarray(start, dtype=float)
+    if len(xy) <= 3:
+        return open_tour(xy, np.arange(len(xy)), start)
+    first = 0 if start is None else int(np.argmin(np.hypot(*(xy - start).T)))
+    neighbours = candidate_neighbours(xy)
+    cycle = two_opt(xy, nearest_neighbour_tour(xy, neighbours, first), neighbours)
+    return open_tour(xy, cycle, start)
+
+
+def tour_length(xy, order, start=None):
+    xy = np.asarray(xy, dtype=float)[order]
+    length = float(np.hypot(*np.diff(xy, axis=0).T).sum()) if len(xy) > 1 else 0.0
+    if start is not None and len(xy):
+        length += float(np.hypot(*(xy[0] - np.asarray(start))))
+    return length
+
+
+# ======================================================================
+#  CYCLES
+# ======================================================================
+
+def cycle_lengths(diam, depth):
+    """
+    Par trou : (cycle 0/1/2 = G81/G73/G83, longueur en avance, longueur
+    en rapide dans le trou) ; diam et depth sont des tableaux.
+    """
+    diam = np.asarray(diam, dtype=float)
+    depth = np.abs(np.asarray(depth, dtype=float))
+    peck = np.maximum(PECK_DEPTH * diam, 1e-3)
+    pecks = np.maximum(1, np.ceil(depth / peck - 1e-9))
+    extra = pecks - 1                      # becquées après la première
+
+    cycle = np.where(depth <= peck, 0, np.where(depth <= DEEP_HOLE_RATIO * diam, 1, 2))
+    g83 = cycle == 2
+    # G83 : remontée au plan R puis redescente jusqu'à CLEARANCE du fond
+    # précédent, à chaque becquée k (fond k × peck)
+    rapid_g83 = extra * (2.0 * RETRACT - CLEARANCE) + peck * extra * pecks
+    rapid_g73 = extra * 2.0 * CHIP_BREAK
+
+    feed = RETRACT + depth + np.where(g83, extra * CLEARANCE, np.where(cycle == 1, extra * CHIP_BREAK, 0.0))
+    rapid = depth + RETRACT + np.where(g83, rapid_g83, np.where(cycle == 1, rapid_g73, 0.0))
+    return cycle, feed, rapid
+
+
+# ======================================================================
+#  TEMPS D'UNE OPÉRATION PERÇAGE (un foret)
+# ======================================================================
+
+def operation_time(diam, vf_mm_min, depth, count=1, positions=None,
+                   rapid_feed_mm_min=RAPID_FEED):
+    """
+    Temps d'une opération Perçage : count trous de Ø diam et de profondeur
+    depth au même foret (avance vf_mm_min), cycle choisi par cycle_lengths.
+    positions : centres (x, y) des trous ; s'ils sont donnés, les
+    déplacements entre trous suivent l'ordre de visite optimisé (sans
+    approche depuis un point de départ). Le changement d'outil n'est pas
+    compté (comme pour les autres opérations).
+
+    Retourne {time_min, cut_min, retract_min, travel_min, travel_mm, cycle}.
+    """
+    count = max(int(count), 0)
+    if count == 0 or vf_mm_min <= 0:
+        return {"time_min": 0.0, "cut_min": 0.0, "retract_min": 0.0,
+                "travel_min": 0.0, "travel_mm": 0.0, "cycle": CYCLES[0]}
+    cycle, feed, rapid = cycle_lengths([diam], [depth])
+
+    travel = 0.0
+    if positions is not None and len(positions) > 1:
+        xy = np.asarray(positions, dtype=float)[:, :2]
+        travel = tour_length(xy, order_holes(xy))
+
+    cut_min = count * float(feed[0]) / vf_mm_min
+    retract_min = count * float(rapid[0]) / rapid_feed_mm_min
+    travel_min = travel / rapid_feed_mm_min
+    return {
+        "time_min": cut_min + retract_min + travel_min,
+        "cut_min": cut_min,
+        "retract_min": retract_min,
+        "travel_min": travel_min,
+        "travel_mm": travel,
+        "cycle": CYCLES[int(cycle[0])],
+    }
+
+
+# ======================================================================
+#  TEMPS DE PERÇAGE D'UNE PIÈCE
+# ======================================================================
+
+def drilling_time(holes, tool_for, rapid_feed_mm_min=RAPID_FEED, start=(0.0, 0.0)):
+    """
+    Temps de perçage de tous les trous.
+
+    holes    : (n, 4) x, y, Ø, profondeur ou (n, 5) avec Z du haut du trou
+    tool_for : fonction Ø → outil (.name, .diam, .z, .vc, .fz) ou None
+
+    Retourne {time_min, cut_min, retract_min, travel_min, tool_change_min,
+    travel_mm, holes, skipped: [Ø sans outil], groups: [{tool, diameter,
+    count, cycle, order, travel_mm, time_min}]}.
+    """
+    holes = np.asarray(holes, dtype=float)
+    if holes.size == 0:
+        return {"time_min": 0.0, "cut_min": 0.0, "retract_min": 0.0, "travel_min": 0.0,
+                "tool_change_min": 0.0, "travel_mm": 0.0, "holes": 0,
+                "skipped": [], "groups": []}
+    holes = np.atleast_2d(holes)
+    xy, diam, depth = holes[:, :2], holes[:, 2], np.abs(holes[:, 3])
+    top = holes[:, 4] if holes.shape[1] > 4 else np.zeros(len(holes))
+
+    # Groupes par outil, Ø croissants
+    groups = {}
+    skipped = []
+    for d in np.unique(diam).tolist():
+        tool = tool_for(d)
+        if tool is None:
+            skipped.append(d)
+            continue
+        groups.setdefault(tool.name, [tool, []])[1].append(d)
+
+    result = {"cut_min": 0.0, "retract_min": 0.0, "travel_min": 0.0,
+              "tool_change_min": 0.0, "travel_mm": 0.0, "holes": 0,
+              "skipped": skipped, "groups": []}
+    position = np.asarray(start, dtype=float)
+    for name, (tool, diams) in sorted(groups.items(), key=lambda g: g[1][0].diam):
+        idx = np.flatnonzero(np.isin(diam, diams))
+        vf = compute_feed(compute_rpm(tool.vc, tool.diam), tool.z, tool.fz)
+        if vf <= 0:
+            skipped.extend(diams)
+            continue
+
+        order = idx[order_holes(xy[idx], position)]
+        travel = tour_length(xy, order, position)
+        position = xy[order[-1]]
+
+        cycle, feed, rapid = cycle_lengths(diam[idx], depth[idx])
+        # descente / remontée entre le plan de dégagement et le plan R du trou
+        rapid = rapid + 2.0 * (top[idx].max() - top[idx])
+        cut_min = float(feed.sum()) / vf
+        retract_min = float(rapid.sum()) / rapid_feed_mm_min
+        travel_min = travel / rapid_feed_mm_min
+
+        result["cut_min"] += cut_min
+        result["retract_min"] += retract_min
+        result["travel_min"] += travel_min
+        result["tool_change_min"] += TOOL_CHANGE_MIN
+        result["travel_mm"] += travel
+        result["holes"] += len(idx)
+        result["groups"].append({
+            "tool": name,
+            "diameter": tool.diam,
+            "count": len(idx),
+            "cycle": CYCLES[int(cycle.max())],
+            "order": order,
+            "travel_mm": travel,
+            "time_min": cut_min + retract_min + travel_min + TOOL_CHANGE_MIN,
+        })
+
+    result["time_min"] = (result["cut_min"] + result["retract_min"]
+                          + result["travel_min"] + result["tool_change_min"])
+    return result
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+costing_core/graph.py — Graphe de dépendances du chiffrage
+
+Chaque grandeur du devis est un nœud mémoïsé :
+
+    geom:<op>    ─┐
+    cut:<op>     ─┼──► time:<op> ──► cost:<op> ◄── rate
+    tool:<nom>   ─┤        │
+    stock:<nom>  ─┘        └──► total_time ──► total_cost ◄── rate
+
+Le nœud time:<op> contient le résultat complet de l'opération
+(time_h, vf_mm_min, passes...) pour pouvoir le recopier dans l'objet.
+
+Modifier une entrée (taux horaire, Vc d'un outil, marge d'un brut...)
+marque "sales" uniquement les nœuds en aval ; ils sont réévalués à la
+demande (get). Les compteurs `stats` indiquent combien de nœuds ont été
+invalidés / recalculés.
+
+Module indépendant de FreeCAD et de Qt.
+"""
+
+import json
+
+from . import machining
+
+
+# ======================================================================
+#  GRAPHE GÉNÉRIQUE
+# ======================================================================
+
+class _Node:
+    __slots__ = ("name", "fn", "deps", "dependents", "value", "dirty")
+
+    def __init__(self, name, fn=None, deps=()):
+        self.name = name
+        self.fn = fn            # None → nœud d'entrée
+        self.deps = dict.fromkeys(deps)   # ordonné, retrait en O(1)
+        self.dependents = set()
+        self.value = None
+        self.dirty = fn is not None
+
+
+class CostGraph:
+    """Nœuds mémoïsés + propagation des drapeaux "sale"."""
+
+    def __init__(self):
+        self._nodes = {}
+        self.stats = {"evaluated": 0, "invalidated": 0}
+
+    def __contains__(self, name):
+        return name in self._nodes
+
+    def reset_stats(self):
+        self.stats["evaluated"] = 0
+        self.stats["invalidated"] = 0
+
+    # ----------------------------------------------------------
+    # Définition
+    # ----------------------------------------------------------
+    def set_input(self, name, value):
+        """Crée ou modifie une entrée ; sans effet si la valeur est identique."""
+        node = self._nodes.get(name)
+        if node is None:
+            node = self._nodes[name] = _Node(name)
+        elif node.fn is None and node.value == value:
+            return
+        node.fn = None
+        node.value = value
+        node.dirty = False
+        self._invalidate_dependents(node)
+
+    def define(self, name, fn, deps, value=None, dirty=True):
+        """
+        Crée ou redéfinit un nœud calculé fn(*valeurs des deps).
+        value / dirty=False permettent de reprendre un résultat déjà connu
+        (ex : relu dans le document) sans le recalculer.
+        """
+        node = self._nodes.get(name)
+        if node is None:
+            node = self._nodes[name] = _Node(name)
+        else:
+            for d in node.deps:
+                if d in self._nodes:
+                    self._nodes[d].dependents.discard(name)
+
+        node.fn = fn
+        node.deps = dict.fromkeys(deps)
+        for d in node.deps:
+            if d not in self._nodes:
+                self._nodes[d] = _Node(d)
+            self._nodes[d].dependents.add(name)
+
+        node.value = value
+        node.dirty = dirty
+        self._invalidate_dependents(node)
+
+    def add_dependency(self, name, dep):
+        """Ajoute une dépendance au nœud calculé `name` (sans le redéfinir)."""
+        node = self._nodes[name]
+        if dep in node.deps:
+            return
+        node.deps[dep] = None
+        if dep not in self._nodes:
+            self._nodes[dep] = _Node(dep)
+        self._nodes[dep].dependents.add(name)
+        self._mark_dirty(node)
+
+    def remove_dependency(self, name, dep):
+        """Retire une dépendance du nœud calculé `name`."""
+        node = self._nodes[name]
+        if dep not in node.deps:
+            return
+        del node.deps[dep]
+        if dep in self._nodes:
+            self._nodes[dep].dependents.discard(name)
+        self._mark_dirty(node)
+
+    def remove(self, name):
+        node = self._nodes.pop(name, None)
+        if node is None:
+            return
+        for d in node.deps:
+            if d in self._nodes:
+                self._nodes[d].dependents.discard(name)
+        self._invalidate_dependents(node)
+
+    # ----------------------------------------------------------
+    # Propagation / évaluation
+    # ----------------------------------------------------------
+    def _mark_dirty(self, node):
+        if not node.dirty:
+            node.dirty = True
+            self.stats["invalidated"] += 1
+            self._invalidate_dependents(node)
+
+    def _invalidate_dependents(self, node):
+        stack = list(node.dependents)
+        nodes = self._nodes
+        while stack:
+            n = nodes.get(stack.pop())
+            if n is None or n.dirty:
+                # déjà sale → son aval l'est aussi
+                continue
+            n.dirty = True
+            self.stats["invalidated"] += 1
+            stack.extend(n.dependents)
+
+    def get(self, name):
+        node = self._nodes[name]
+        if node.dirty:
+            args = [self.get(d) for d in node.deps]
+            node.value = node.fn(*args)
+            node.dirty = False
+            self.stats["evaluated"] += 1
+        return node.value
+
+    def is_dirty(self, name):
+        return self._nodes[name].dirty
+
+    def dirty_nodes(self, prefix=""):
+        return [n.name for n in self._nodes.values() if n.dirty and n.name.startswith(prefix)]
+
+
+# ======================================================================
+#  CALCUL D'UNE OPÉRATION (partagé avec op_feature)
+# ======================================================================
+
+def effective_surplus(cutting, margins=None):
+    """
+    Surépaisseurs (Z+, XY) effectives : celles de l'opération, ou celles
+    du brut si cutting["use_stock_margins"] est vrai.
+    """
+    z_plus = cutting.get("z_plus", 0.0)
+    xy_surplus = cutting.get("xy_surplus", 0.0)
+    if cutting.get("use_stock_margins") and margins:
+        z_plus = margins.get("z_plus", z_plus)
+        xy_surplus = max(margins.get(k, 0.0) for k in ("x_minus", "x_plus", "y_minus", "y_plus"))
+    return z_plus, xy_surplus
+
+
+def compute_operation(op_type, tool, cutting, geometry, margins=None):
+    """
+    tool     : (diam, z, vc, fz)
+    cutting  : {ae_pct, ap_max, z_plus, xy_surplus, depth_user, use_stock_margins}
+    geometry : {depth, area, length, count[, outline][, holes]} (grandeurs issues des faces)
+    margins  : dict de marges du brut (PC_MarginsJSON) ou None
+
+    Retourne le dict de machining.compute_operation_time (+ time_h).
+    """
+    diam, z_teeth, vc, fz = tool
+    z_plus, xy_surplus = effective_surplus(cutting, margins)
+
+    depth_user = cutting.get("depth_user", 0.0)
+    depth_total = depth_user if depth_user > 0 else geometry.get("depth", 0.0)
+    depth_total += abs(z_plus)
+
+    res = machining.compute_operation_time(
+        op_type, diam, z_teeth, vc, fz,
+        cutting.get("ae_pct", 0.0), cutting.get("ap_max", 0.0), depth_total,
+        xy_surplus=xy_surplus,
+        area=geometry.get("area", 0.0),
+        length=geometry.get("length", 0.0),
+        count=geometry.get("count", 1),
+        outline=geometry.get("outline"),
+        holes=geometry.get("holes"),
+    )
+    res["time_h"] = res["time_min"] / 60.0
+    return res
+
+
+# ======================================================================
+#  GRAPHE D'UN DEVIS
+# ======================================================================
+
+class QuoteGraph:
+    """
+    Graphe de chiffrage d'une pièce : opérations, outils, bruts, taux horaire.
+    """
+
+    def __init__(self, rate=0.0):
+        self.graph = CostGraph()
+        self.stats = self.graph.stats
+        self._ops = {}   # op_id → (tool_name, stock_name)
+        self._types = {}  # op_id → type d'opération
+        self.graph.set_input("rate", float(rate))
+        # totaux définis une fois ; chaque opération y est ajoutée / retirée
+        # comme dépendance (construction d'un devis de n opérations en O(n))
+        self.graph.define("total_time", lambda *results: sum(r["time_h"] for r in results), ())
+        self.graph.define("total_cost", lambda t, rate: t * rate, ("total_time", "rate"))
+
+    # ----- Entrées -----
+    def set_rate(self, rate):
+        self.graph.set_input("rate", float(rate))
+
+    def set_tool(self, tool):
+        self.set_tool_params(tool.name, (tool.diam, tool.z, tool.vc, tool.fz))
+
+    def set_tool_params(self, name, params):
+        """params : (diam, z, vc, fz)"""
+        self.graph.set_input(f"tool:{name}", tuple(params))
+
+    def set_stock(self, name, margins):
+        if isinstance(margins, str):
+            margins = json.loads(margins or "{}")
+        self.graph.set_input(f"stock:{name}", dict(margins or {}))
+
+    def set_geometry(self, op_id, geometry):
+        self.graph.set_input(f"geom:{op_id}", dict(geometry))
+
+    def set_cutting(self, op_id, cutting):
+        self.graph.set_input(f"cut:{op_id}", dict(cutting))
+
+    # ----- Opérations -----
+    def add_operation(self, op_id, op_type, tool_name, cutting, geometry,
+                      stock_name=None, result=None):
+        """
+        Ajoute (ou redéfinit) une opération. `result` (résultat déjà connu,
+        dict avec au moins time_h) évite tout calcul tant qu'aucune entrée
+        ne change.
+        """
+        g = self.graph
+        self.set_cutting(op_id, cutting)
+        self.set_geometry(op_id, geometry)
+
+        deps = [f"geom:{op_id}", f"cut:{op_id}", f"tool:{tool_name}"]
+        if stock_name:
+            deps.append(f"stock:{stock_name}")
+            if f"stock:{stock_name}" not in g:
+                g.set_input(f"stock:{stock_name}", {})
+
+        def _time(geom, cut, tool, margins=None):
+            if tool is None:
+                return {"time_h": 0.0}
+            try:
+                return compute_operation(op_type, tool, cut, geom, margins)
+            except ValueError:
+                return {"time_h": 0.0}
+
+        g.define(f"time:{op_id}", _time, deps,
+                 value=result, dirty=result is None)
+        g.define(f"cost:{op_id}", lambda r, rate: r["time_h"] * rate, (f"time:{op_id}", "rate"))
+
+        self._ops[op_id] = (tool_name, stock_name)
+        self._types[op_id] = op_type
+        g.add_dependency("total_time", f"time:{op_id}")
+
+    def remove_operation(self, op_id):
+        if self._ops.pop(op_id, None) is None:
+            return
+        self._types.pop(op_id, None)
+        self.graph.remove_dependency("total_time", f"time:{op_id}")
+        for prefix in ("cost", "time", "geom", "cut"):
+            self.graph.remove(f"{prefix}:{op_id}")
+
+    # ----- Résultats -----
+    def operations(self):
+        return list(self._ops)
+
+    def operation_inputs(self):
+        """
+        Entrées de chaque opération, au format de compute_operation :
+        [{id, op_type, tool_name, tool, cutting, geometry, margins}]
+        """
+        g = self.graph
+        return [
+            {
+                "id": op_id,
+                "op_type": self._types[op_id],
+                "tool_name": tool_name,
+                "tool": g.get(f"tool:{tool_name}"),
+                "cutting": g.get(f"cut:{op_id}"),
+                "geometry": g.get(f"geom:{op_id}"),
+                "margins": g.get(f"stock:{stock_name}") if stock_name else None,
+            }
+            for op_id, (tool_name, stock_name) in self._ops.items()
+        ]
+
+    def tools_used(self):
+        return {tool for tool, _ in self._ops.values()}
+
+    def stale_operations(self):
+        """Opérations dont le temps doit être recalculé."""
+        return [op_id for op_id in self._ops if self.graph.is_dirty(f"time:{op_id}")]
+
+    def result(self, op_id):
+        return self.graph.get(f"time:{op_id}")
+
+    def time_h(self, op_id):
+        return self.result(op_id)["time_h"]
+
+    def cost(self, op_id):
+        return self.graph.get(f"cost:{op_id}")
+
+    def rate(self):
+        return self.graph.get("rate")
+
+    def total_time_h(self):
+        return self.graph.get("total_time")
+
+    def total_cost(self):
+        return self.graph.get("total_cost")
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+costing_core/machining.py — Moteur de calcul corrigé et unifié pour le module PartCosting Pro
+"""
+
+import math
+
+from . import chip as chip_calc
+from .offsets import LEAD_MM, outline_length, outline_path
+from .volumes import MachiningOperation, compute_volume_mm3
+
+
+
+# ----------------------------------------------------------
+# Outil : calcul de Vf (avance) en mm/min
+# ----------------------------------------------------------
+def calc_feed_mm_min(z_teeth, fz, rpm):
+    try:
+        return float(z_teeth) * float(fz) * float(rpm)
+    except Exception:
+        return 0.0
+
+
+# ----------------------------------------------------------
+# Outil : nombre de passes profondeur
+# ----------------------------------------------------------
+def compute_passes_z(depth_total, ap_max):
+    depth_total = abs(float(depth_total))
+    ap_max = abs(float(ap_max))
+    if ap_max <= 0:
+        return 1
+    return max(1, int(math.ceil(depth_total / ap_max)))
+
+
+# ----------------------------------------------------------
+# Outil : nombre de passes radiales
+# ----------------------------------------------------------
+def compute_passes_radial(xy_surplus, ae_mm):
+    xy_surplus = abs(float(xy_surplus))
+    ae_mm = abs(float(ae_mm))
+
+    if ae_mm <= 0:
+        return 1
+
+    if xy_surplus <= 0:
+        return 1
+
+    return max(1, int(math.ceil(xy_surplus / ae_mm)))
+
+
+# ----------------------------------------------------------
+# Surfaçage — calcul rapide par surface & Vf
+# ----------------------------------------------------------
+def compute_face_time(surface_mm2, depth_total, ap_max, ae_mm, vf_mm_min):
+    """
+    surface_mm2 : surface à surfacer
+    depth_total : profondeur totale
+    ap_max       : passe max
+    ae_mm        : engagement radial
+    vf_mm_min    : avance
+    """
+    if vf_mm_min <= 0:
+        return 0.0, 0, 0
+
+    passes_z = compute_passes_z(depth_total, ap_max)
+    passes_rad = compute_passes_radial(ae_mm, ae_mm)  # radial = 1 pour le moment
+
+    length_equiv = surface_mm2 / max(ae_mm, 0.001)
+    time_min = length_equiv / vf_mm_min
+
+    return time_min, passes_z, passes_rad
+
+
+# ----------------------------------------------------------
+# Contournage — calcul (L total + passes Z + passes radiales)
+# ----------------------------------------------------------
+def compute_profile_time(length_total, depth_total, ap_max, xy_surplus, ae_mm, vf_mm_min,
+                         lead_mm=0.0, lead_pass_mm=0.0):
+    """
+    length_total : longueur usinée d'une passe (sans entrée / sortie)
+    lead_mm      : entrées / sorties parcourues une seule fois
+    lead_pass_mm : entrées / sorties reprises à chaque passe
+    """
+    if vf_mm_min <= 0:
+        return 0.0, 0, 0
+
+    passes_z = compute_passes_z(depth_total, ap_max)
+    passes_rad = compute_passes_radial(xy_surplus, ae_mm)
+    passes = passes_z * passes_rad
+
+    time_min = ((length_total + lead_pass_mm) * passes + lead_mm) / vf_mm_min
+    return time_min, passes_z, passes_rad
+
+
+# ----------------------------------------------------------
+# Poche — modèle approx (longueur équivalente)
+# ----------------------------------------------------------
+def compute_pocket_time(surface_mm2, depth_total, ap_max, xy_surplus, ae_mm, vf_mm_min,
+                        path_length=None):
+    if vf_mm_min <= 0:
+        return 0.0, 0, 0
+
+    passes_z = compute_passes_z(depth_total, ap_max)
+    passes_rad = compute_passes_radial(xy_surplus, ae_mm)
+
+    # longueur d'une passe en Z : parcours par décalages (offsets) si le
+    # contour est connu, sinon longueur équivalente = surface divisée par Ae
+    length_equiv = path_length if path_length else surface_mm2 / max(ae_mm, 0.001)
+
+    time_min = (length_equiv * passes_z * passes_rad) / vf_mm_min
+
+    return time_min, passes_z, passes_rad
+
+
+# ----------------------------------------------------------
+# Perçage — cycles du foret (costing_core.drilling)
+# ----------------------------------------------------------
+def compute_drilling_time(diam, z_teeth, vc, fz, depth, count=1, holes=None):
+    """
+    Cycle de perçage (drilling.operation_time) : plongées et débourrages en
+    avance, retraits au plan R et déplacements entre les trous `holes`
+    (centres x, y) en rapide.
+
+    Sans NumPy : volume (machining_ops) divisé par le débit copeaux
+    (chip_calc) ; la section du foret π·D²/4 est passée comme Ap = π·D/4, Ae = D.
+    """
+    try:
+        from .drilling import operation_time
+    except ImportError:
+        operation_time = None
+
+    if operation_time is not None:
+        vf = chip_calc.compute_feed(chip_calc.compute_rpm(vc, diam), z_teeth, fz)
+        return operation_time(diam, vf, depth, count, holes)["time_min"]
+
+    volume = compute_volume_mm3(
+        MachiningOperation("Perçage", depth, nb_holes=count, hole_diam=diam)
+    )
+    res = chip_calc.compute_chip_based_time(
+        diam, z_teeth, vc, fz, math.pi * diam / 4.0, diam, volume
+    )
+    return res["time_min"]
+
+
+# ----------------------------------------------------------
+# Opération complète — outil + conditions de coupe + géométrie
+# ----------------------------------------------------------
+OP_TYPES = ("Surfaçage", "Contournage", "Poche", "Perçage")
+
+
+def compute_operation_time(op_type, diam, z_teeth, vc, fz, ae_pct, ap_max,
+                           depth_total, xy_surplus=0.0, area=0.0, length=0.0, count=1,
+                           outline=None, holes=None):
+    """
+    Temps d'une opération Surfaçage / Contournage / Poche / Perçage.
+
+    area    : surface (mm²) pour Surfaçage et Poche
+    length  : longueur de contour (mm) pour Contournage
+    count   : nombre de trous (profondeur depth_total chacun) pour Perçage
+    outline : contour de la poche / du profil (geometry.faces_outline) ;
+              s'il est donné, la longueur parcourue de Poche et Contournage
+              est celle des décalages de ce contour (costing_core.offsets)
+    holes   : centres (x, y) des trous de Perçage (déplacements entre trous)
+
+    Retourne un dict {time_min, passes_z, passes_rad, vf_mm_min, ae_mm, length_mm}.
+    Lève ValueError si l'avance ne peut pas être calculée.
+    """
+    ae_mm = (ae_pct / 100.0) * diam
+    rpm = (1000 * vc) / (math.pi * diam) if diam > 0 else 0.0
+    vf_mm_min = calc_feed_mm_min(z_teeth, fz, rpm)
+    if vf_mm_min <= 0:
+        raise ValueError("Impossible de calculer l'avance Vf.")
+
+    if op_type == "Surfaçage":
+        time_min, passes_z, passes_rad = compute_face_time(
+            area, depth_total, ap_max, ae_mm, vf_mm_min
+        )
+        length_mm = area / max(ae_mm, 0.001)
+    elif op_type == "Contournage":
+        # entrée / sortie : une fois par contour fermé (passes en Z et
+        # radiales enchaînées sans quitter la matière), à chaque passe pour
+        # un profil ouvert (retour au départ)
+        path = outline_path(op_type, outline, diam, ae_mm)
+        if path:
+            length_mm = path["length_mm"]
+            cut_mm = path["cut_mm"]
+            lead_mm = LEAD_MM * (path["loops"] - path["open"])
+            lead_pass_mm = LEAD_MM * path["open"]
+        else:
+            # geometry.faces_contour_length : entrée / sortie LEAD_MM comprises
+            length_mm = length
+            cut_mm = max(length - LEAD_MM, 0.0)
+            lead_mm, lead_pass_mm = length - cut_mm, 0.0
+        time_min, passes_z, passes_rad = compute_profile_time(
+            cut_mm, depth_total, ap_max, xy_surplus, ae_mm, vf_mm_min,
+            lead_mm=lead_mm, lead_pass_mm=lead_pass_mm
+        )
+    elif op_type == "Poche":
+        length_mm = outline_length(op_type, outline, diam, ae_mm) or area / max(ae_mm, 0.001)
+        time_min, passes_z, passes_rad = compute_pocket_time(
+            area, depth_total, ap_max, xy_surplus, ae_mm, vf_mm_min, path_length=length_mm
+        )
+    elif op_type == "Perçage":
+        time_min = compute_drilling_time(diam, z_teeth, vc, fz, depth_total, count, holes)
+        passes_z, passes_rad = count, 1
+        length_mm = depth_total * count
+    else:
+        raise ValueError(f"Opération inconnue : {op_type}")
+
+    return {
+        "time_min": time_min,
+        "passes_z": passes_z,
+        "passes_rad": passes_rad,
+        "vf_mm_min": vf_mm_min,
+        "ae_mm": ae_mm,
+        "length_mm": length_mm,
+    }
@@ -0,0 +1,459 @@
+# -*- coding: utf-8 -*-
+"""
+costing_core/offsets.py — Longueur des parcours de poche et de contour par décalages
+
+Estimation purement géométrique, sans FAO, de la longueur parcourue par
+le centre de l'outil :
+
+- Poche (contours parallèles) : décalages successifs du bord vers
+  l'intérieur, à R (rayon outil) puis tous les ae, jusqu'à disparition de
+  la zone ; îlots décalés vers l'extérieur aux mêmes distances ; dernier
+  contour ajouté si le cœur restant dépasse le rayon de l'outil ;
+  liaisons d'un contour au suivant comptées ae chacune.
+- Contour : bord décalé de R du côté de l'outil (extérieur ou intérieur),
+  ouvert ou fermé ; entrée / sortie LEAD_MM par contour, reprise à chaque
+  passe pour un profil ouvert seulement (machining.compute_profile_time).
+
+Contours simplifiés avant décalage (Douglas–Peucker, écart SIMPLIFY_MM) :
+le coût d'un décalage croît avec le nombre de sommets, et un arc
+discrétisé en compte des centaines.
+
+Décalage d'un polygone (sens trigonométrique, distance d > 0 vers
+l'intérieur) : chaque côté est translaté de d suivant sa normale, les
+sommets sont les intersections des côtés voisins (raccord en pointe) ;
+un côté dont la longueur devient négative a disparu et il est retiré ;
+un polygone décalé qui se recoupe (goulet refermé) est coupé en deux
+zones, décalées ensuite séparément.
+Aux sommets où le décalage s'ouvre (angle rentrant vers l'intérieur,
+saillant vers l'extérieur) l'outil tourne autour du sommet : la pointe
+2·d·tan(φ/2) est remplacée par l'arc d·φ (φ : angle de changement de
+direction). Tant qu'aucun côté ne disparaît, le périmètre décalé vaut
+P(d) = P0 − 2·d·Σ cot(θi/2) aux sommets saillants (θi : angle intérieur).
+
+Polygones : listes de points (x, y) dans le plan d'usinage (voir
+geometry.faces_outline), sans répétition du premier point.
+
+Module de calcul pur (bibliothèque standard).
+"""
+
+import math
+
+
+EPS = 1e-9
+LEAD_MM = 4.0       # entrée + sortie du contour (2 + 2 mm, comme geometry.faces_contour_length)
+MAX_LOOPS = 10000   # garde-fou : nombre de contours d'une poche
+SIMPLIFY_MM = 0.05  # écart admis du contour simplifié (geometry.OUTLINE_DEFLECTION = 0.1)
+
+
+# ======================================================================
+#  POLYGONES
+# ======================================================================
+
+def polygon_area(points):
+    """Aire signée (> 0 en sens trigonométrique)."""
+    n = len(points)
+    s = 0.0
+    for i in range(n):
+        x0, y0 = points[i - 1]
+        x1, y1 = points[i]
+        s += x0 * y1 - x1 * y0
+    return 0.5 * s
+
+
+def polyline_length(points, closed=True):
+    n = len(points)
+    total = 0.0
+    for i in range(0 if closed else 1, n):
+        x0, y0 = points[i - 1]
+        x1, y1 = points[i]
+        total += math.hypot(x1 - x0, y1 - y0)
+    return total
+
+
+def _clean(points, closed=True):
+    """Points consécutifs confondus retirés (et fermeture répétée)."""
+    out = []
+    for x, y in points:
+        if not out or abs(x - out[-1][0]) > 1e-6 or abs(y - out[-1][1]) > 1e-6:
+            out.append((float(x), float(y)))
+    if closed and len(out) > 1 and abs(out[0][0] - out[-1][0]) <= 1e-6 and abs(out[0][1] - out[-1][1]) <= 1e-6:
+        out.pop()
+    return out
+
+
+def simplify(points, tol=SIMPLIFY_MM, closed=True):
+    """
+    Sommets retirés (Douglas–Peucker) tant que le contour simplifié reste à
+    moins de tol du contour d'origine : un contour discrétisé finement
+    (arcs, splines) garde quelques dizaines de sommets au lieu de milliers.
+    """
+    pts = _clean(points, closed)
+    n = len(pts)
+    if n < 4 or tol <= 0:
+        return pts
+    keep = bytearray(n + 1)
+    if closed:
+        # coupé en deux au sommet le plus éloigné du premier
+        x0, y0 = pts[0]
+        far = max(range(n), key=lambda i: (pts[i][0] - x0) ** 2 + (pts[i][1] - y0) ** 2)
+        pts = pts + [pts[0]]
+        todo = [(0, far), (far, n)]
+        keep[0] = keep[far] = 1
+    else:
+        todo = [(0, n - 1)]
+        keep[0] = keep[n - 1] = 1
+
+    tol2 = tol * tol
+    while todo:
+        a, b = todo.pop()
+        ax, ay = pts[a]
+        dx, dy = pts[b][0] - ax, pts[b][1] - ay
+        norm2 = dx * dx + dy * dy
+        worst, dmax = -1, tol2
+        for i in range(a + 1, b):
+            px, py = pts[i][0] - ax, pts[i][1] - ay
+            t = (px * dx + py * dy) / norm2 if norm2 > EPS else 0.0
+            t = 0.0 if t < 0.0 else (1.0 if t > 1.0 else t)
+            ex, ey = px - t * dx, py - t * dy
+            dist = ex * ex + ey * ey
+            if dist > dmax:
+                worst, dmax = i, dist
+        if worst >= 0:
+            keep[worst] = 1
+            todo.append((a, worst))
+            todo.append((worst, b))
+    return [pts[i] for i in range(n) if keep[i]]
+
+
+def ccw(points):
+    """Polygone en sens trigonométrique."""
+    points = _clean(points)
+    return points if polygon_area(points) >= 0 else points[::-1]
+
+
+def _turn(t0, t1):
+    """Angle signé de changement de direction entre deux directions unitaires."""
+    return math.atan2(t0[0] * t1[1] - t0[1] * t1[0], t0[0] * t1[0] + t0[1] * t1[1])
+
+
+def _round_correction(phi, d):
+    """Arc d·φ à la place de la pointe 2·d·tan(φ/2) (φ ≥ 0)."""
+    if phi >= math.pi - 1e-6:
+        return 0.0
+    return abs(d) * (phi - 2.0 * math.tan(0.5 * phi))
+
+
+# ======================================================================
+#  DÉCALAGE D'UN POLYGONE FERMÉ
+# ======================================================================
+# Un polygone à décaler est la liste de ses côtés (lignes) :
+# (x0, y0, tx, ty, nx, ny) = point de départ, direction, normale intérieure.
+
+def _edges(points):
+    pts = ccw(points)
+    edges = []
+    n = len(pts)
+    for i in range(n):
+        x0, y0 = pts[i]
+        x1, y1 = pts[(i + 1) % n]
+        length = math.hypot(x1 - x0, y1 - y0)
+        if length > EPS:
+            tx, ty = (x1 - x0) / length, (y1 - y0) / length
+            edges.append((x0, y0, tx, ty, -ty, tx))
+    return edges
+
+
+def _shift(edges, d):
+    """Côtés décalés de d : (x0, y0, tx, ty) en une passe."""
+    return [(x + d * nx, y + d * ny, tx, ty) for x, y, tx, ty, nx, ny in edges]
+
+
+def _meet(la, lb):
+    """Intersection des côtés décalés la puis lb (voir _shift)."""
+    px, py, atx, aty = la
+    qx, qy, btx, bty = lb
+    den = atx * bty - aty * btx
+    if abs(den) < 1e-12:
+        return qx, qy   # côtés parallèles : début du côté lb
+    s = ((qx - px) * bty - (qy - py) * btx) / den
+    return px + s * atx, py + s * aty
+
+
+def _offset(edges, d):
+    """
+    (polygone décalé de d, côtés restants) en retirant les côtés disparus ;
+    ([], []) si la zone a disparu. Le polygone peut se recouper (voir _loops).
+
+    Côtés chaînés (précédent / suivant) : retirer un côté ne recalcule que
+    le sommet entre ses deux voisins, puis la longueur de ces voisins.
+    """
+    n = len(edges)
+    if n < 3:
+        return [], []
+    prev = [k - 1 for k in range(n)]
+    prev[0] = n - 1
+    nxt = [k + 1 for k in range(n)]
+    nxt[-1] = 0
+    lines = _shift(edges, d)
+    vert = list(map(_meet, lines[-1:] + lines[:-1], lines))   # début du côté k
+
+    def collapsed(k):
+        (x0, y0), (x1, y1) = vert[k], vert[nxt[k]]
+        _, _, tx, ty = lines[k]
+        return (x1 - x0) * tx + (y1 - y0) * ty <= -EPS
+
+    alive = [True] * n
+    count = n
+    # côtés raccourcis jusqu'à s'inverser : testés en une passe sur les sommets
+    todo = [k for k, ((x0, y0), (x1, y1), (_, _, tx, ty))
+            in enumerate(zip(vert, vert[1:] + vert[:1], lines))
+            if (x1 - x0) * tx + (y1 - y0) * ty <= -EPS]
+    while todo and count >= 3:
+        k = todo.pop()
+        if not alive[k] or not collapsed(k):
+            continue
+        alive[k] = False
+        count -= 1
+        p, q = prev[k], nxt[k]
+        nxt[p], prev[q] = q, p
+        vert[q] = _meet(lines[p], lines[q])
+        todo.append(p)
+        todo.append(q)
+    if count < 3:
+        return [], []
+    keep = [k for k in range(n) if alive[k]]
+    return [vert[k] for k in keep], [edges[k] for k in keep]
+
+
+def _side(ax, ay, bx, by, cx, cy):
+    v = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    return 0 if abs(v) < 1e-7 else (1 if v > 0 else -1)
+
+
+def _touch(px0, py0, px1, py1, qx0, qy0, qx1, qy1):
+    """Segments sécants ou en contact (extrémité sur l'autre, recouvrement)."""
+    s1 = _side(px0, py0, px1, py1, qx0, qy0)
+    s2 = _side(px0, py0, px1, py1, qx1, qy1)
+    s3 = _side(qx0, qy0, qx1, qy1, px0, py0)
+    s4 = _side(qx0, qy0, qx1, qy1, px1, py1)
+    if s1 * s2 > 0 or s3 * s4 > 0:
+        return False
+    if s1 or s2 or s3 or s4:
+        return True
+    # alignés : recouvrement de longueur non nulle
+    tx, ty = px1 - px0, py1 - py0
+    a = (qx0 - px0) * tx + (qy0 - py0) * ty
+    b = (qx1 - px0) * tx + (qy1 - py0) * ty
+    return max(a, b) > 1e-9 and min(a, b) < tx * tx + ty * ty - 1e-9
+
+
+def _crossing(pts):
+    """
+    Premier couple (i, j), i < j, de segments non voisins qui se coupent ou
+    se touchent, ou None.
+    """
+    n = len(pts)
+    segs = []
+    for i in range(n):
+        x0, y0 = pts[i]
+        x1, y1 = pts[(i + 1) % n]
+        segs.append((min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1), i, x0, y0, x1, y1))
+    segs.sort()
+    for a in range(n):
+        ax0, ax1, ay0, ay1, i, px0, py0, px1, py1 = segs[a]
+        for b in range(a + 1, n):
+            bx0, bx1, by0, by1, j, qx0, qy0, qx1, qy1 = segs[b]
+            if bx0 > ax1:
+                break
+            if by0 > ay1 or by1 < ay0 or abs(i - j) <= 1 or abs(i - j) == n - 1:
+                continue
+            if _touch(px0, py0, px1, py1, qx0, qy0, qx1, qy1):
+                return (i, j) if i < j else (j, i)
+    return None
+
+
+def _loops(edges, d):
+    """
+    Contours décalés de d : [(points, côtés)]. Un polygone décalé qui se
+    recoupe (goulet refermé) est coupé au croisement des côtés i et j en
+    deux polygones (côtés i..j et j..i) ; les parties retournées (aire
+    négative) sont écartées.
+    """
+    pts, edges = _offset(edges, d)
+    if not pts:
+        return []
+    cross = _crossing(pts)
+    if cross is None:
+        return [(pts, edges)] if polygon_area(pts) > EPS else []
+    i, j = cross
+    return _loops(edges[i:j + 1], d) + _loops(edges[j:] + edges[:i + 1], d)
+
+
+def _loop_length(pts, edges, d):
+    """Longueur d'un contour décalé de d, raccords en arc là où le décalage s'ouvre."""
+    length = polyline_length(pts)
+    for k in range(len(edges)):
+        phi = _turn(edges[k - 1][2:4], edges[k][2:4])
+        # vers l'intérieur : sommets rentrants (φ < 0) ; vers l'extérieur : saillants
+        if (d > 0 and phi < 0) or (d < 0 and phi > 0):
+            length += _round_correction(abs(phi), d)
+    return length
+
+
+def offset_polygon(points, d):
+    """Polygones décalés de d (> 0 vers l'intérieur), raccords en pointe."""
+    return [pts for pts, _ in _loops(_edges(points), d)]
+
+
+def offset_length(points, d):
+    """Longueur totale des contours décalés de d (raccords en arc)."""
+    return sum(_loop_length(pts, edges, d) for pts, edges in _loops(_edges(points), d))
+
+
+def _collapse_distance(edges, d_lo, d_hi, iterations=30):
+    """Distance (entre d_lo non vide et d_hi vide) où la zone disparaît."""
+    for _ in range(iterations):
+        mid = 0.5 * (d_lo + d_hi)
+        if _loops(edges, mid):
+            d_lo = mid
+        else:
+            d_hi = mid
+    return d_lo
+
+
+# ======================================================================
+#  POCHE
+# ======================================================================
+
+def pocket_path(outer, islands=(), tool_diam=0.0, ae=0.0):
+    """
+    Parcours de vidage d'une poche en contours parallèles.
+
+    outer    : bord de la poche (polygone)
+    islands  : îlots (polygones) laissés dans la poche
+    tool_diam, ae : Ø outil et pas latéral (mm)
+
+    Retourne {loops, cut_mm, link_mm, length_mm} (longueurs du centre
+    de l'outil, une passe en Z).
+    """
+    r = 0.5 * tool_diam
+    ae = max(ae, 1e-3)
+    islands = [_edges(simplify(island)) for island in islands if len(_clean(island)) >= 3]
+
+    loops = 0
+    cut = 0.0
+    # zones en cours : (côtés, distance du dernier contour) ; les côtés
+    # disparus sont retirés au fil des décalages
+    fronts = [(_edges(simplify(outer)), None)]
+    d = r
+    while fronts and loops < MAX_LOOPS:
+        grown = []
+        for edges in islands:
+            for pts, kept in _loops(edges, -d):
+                grown.append((polygon_area(pts), _loop_length(pts, kept, -d)))
+        free = -sum(a for a, _ in grown)
+
+        level = []
+        for edges, last in fronts:
+            found = _loops(edges, d)
+            if found:
+                level += found
+                continue
+            # zone disparue : cœur hors de portée du dernier contour (sans îlot)
+            if last is not None and not islands:
+                core = _collapse_distance(edges, last, d)
+                if core - last > r + EPS:
+                    cut += sum(_loop_length(p, k, core - r) for p, k in _loops(edges, core - r))
+                    loops += 1
+
+        free += sum(polygon_area(pts) for pts, _ in level)
+        if not level or free <= EPS:
+            break
+        cut += sum(_loop_length(pts, kept, d) for pts, kept in level) + sum(l for _, l in grown)
+        loops += len(level)
+        fronts = [(kept, d) for _, kept in level]
+        d += ae
+
+    link = max(loops - 1, 0) * ae
+    return {"loops": loops, "cut_mm": cut, "link_mm": link, "length_mm": cut + link}
+
+
+# ======================================================================
+#  CONTOUR
+# ======================================================================
+
+def _open_offset_length(points, d):
+    """
+    Polyligne ouverte décalée de d (< 0 à droite du sens de parcours) :
+    longueur + arcs aux sommets où le décalage s'ouvre − pointes ailleurs.
+    """
+    pts = _clean(points, closed=False)
+    length = polyline_length(pts, closed=False)
+    dirs = []
+    for i in range(1, len(pts)):
+        x0, y0 = pts[i - 1]
+        x1, y1 = pts[i]
+        seg = math.hypot(x1 - x0, y1 - y0)
+        dirs.append(((x1 - x0) / seg, (y1 - y0) / seg))
+    for k in range(1, len(dirs)):
+        phi = _turn(dirs[k - 1], dirs[k])
+        if (d > 0) == (phi < 0):
+            length += abs(d) * abs(phi)                      # arc autour du sommet
+        else:
+            length -= 2.0 * abs(d) * math.tan(0.5 * min(abs(phi), math.pi - 1e-3))
+    return max(length, 0.0)
+
+
+def profile_path(profiles, tool_diam=0.0):
+    """
+    Parcours de contournage (une passe radiale, une passe en Z).
+
+    profiles : [{points, closed, outside}] — outside : outil à l'extérieur
+               du polygone fermé (ou à droite de la polyligne ouverte)
+
+    Retourne {loops, open, cut_mm, link_mm, length_mm} ; open : profils
+    ouverts parmi les loops contours ; link_mm : entrées et sorties
+    (LEAD_MM par contour).
+    """
+    r = 0.5 * tool_diam
+    cut = 0.0
+    loops = 0
+    opened = 0
+    for profile in profiles:
+        closed = profile.get("closed", True)
+        points = simplify(profile["points"], closed=closed)
+        d = -r if profile.get("outside", True) else r
+        if closed:
+            length = offset_length(points, d)
+        else:
+            length = _open_offset_length(points, d)
+        if length > 0:
+            cut += length
+            loops += 1
+            opened += not closed
+    link = loops * LEAD_MM
+    return {"loops": loops, "open": opened, "cut_mm": cut, "link_mm": link,
+            "length_mm": cut + link}
+
+
+def outline_path(op_type, outline, tool_diam, ae):
+    """
+    Parcours d'une passe en Z de Poche / Contournage tiré du contour
+    (geometry.faces_outline) : résultat de pocket_path / profile_path, ou
+    None si le contour ne s'applique pas.
+    """
+    if not outline:
+        return None
+    if op_type == "Poche" and outline.get("outer"):
+        res = pocket_path(outline["outer"], outline.get("islands", ()), tool_diam, ae)
+    elif op_type == "Contournage" and outline.get("profiles"):
+        res = profile_path(outline["profiles"], tool_diam)
+    else:
+        return None
+    return res if res["loops"] else None
+
+
+def outline_length(op_type, outline, tool_diam, ae):
+    """Longueur (length_mm) de outline_path, ou None."""
+    res = outline_path(op_type, outline, tool_diam, ae)
+    return res["length_mm"] if res else None
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+costing_core/timeline.py — Chronologie segment par segment d'un parcours Path
+
+compute_time_from_path_op ne rend que des totaux ; ici chaque déplacement
+est une ligne d'un tableau structuré NumPy (TIMELINE_DTYPE) :
+
+    x0 y0 z0 x1 y1 z1   extrémités (mm)
+    motion              0 = G0, 1 = G1, 2 = G2, 3 = G3, OTHER (cycles, M...)
+    feed                avance appliquée (mm/min)
+    length              longueur (mm, corde pour G2 / G3 comme cam_time)
+    time                temps (min)
+    op                  indice de l'opération
+
+    tl = path_timeline([op1, op2], feed_mm_min=(800.0, 300.0))
+    by_z_band(tl, 2.0)      # temps / longueur par tranche de Z
+    by_feed(tl), by_op(tl), by_motion(tl)
+
+Les avances et temps suivent compute_time_from_path_op (avance imposée
+pour G1 / G2 / G3, avance rapide pour G0, G0 comptés si include_rapids) ;
+program_feed=True utilise les mots F du programme (modaux).
+
+Lecture du parcours : un seul appel path.toGCode() ; le texte est
+lu d'un bloc : lettres d'adresse par masque sur les octets, nombres par
+un seul np.fromstring (lettres remplacées par des espaces), coordonnées
+modales reconstituées par colonnes. Sans toGCode (ou
+texte non reconnu), lecture commande par commande de path.Commands.
+
+Programmes très longs : filename="....npy" écrit la chronologie dans un
+fichier .npy mappé en mémoire (np.load(..., mmap_mode="r") pour relire) ;
+en lecture par path.Commands, par blocs de CHUNK commandes (seules les
+coordonnées d'un bloc sont gardées en mémoire).
+
+Les agrégations (np.unique + np.bincount) travaillent sur les colonnes,
+sans créer d'objet Python par déplacement. Nécessite NumPy (importé par
+ce module seulement, pas par costing_core).
+"""
+
+import re
+import warnings
+from array import array
+
+import numpy as np
+
+
+TIMELINE_DTYPE = np.dtype([
+    ("x0", "f8"), ("y0", "f8"), ("z0", "f8"),
+    ("x1", "f8"), ("y1", "f8"), ("z1", "f8"),
+    ("motion", "u1"),
+    ("feed", "f8"),
+    ("length", "f8"),
+    ("time", "f8"),
+    ("op", "u4"),
+])
+
+RAPID, LINEAR, ARC_CW, ARC_CCW = 0, 1, 2, 3
+OTHER = 255
+
+_MOTIONS = {
+    "G0": RAPID, "G00": RAPID,
+    "G1": LINEAR, "G01": LINEAR,
+    "G2": ARC_CW, "G02": ARC_CW,
+    "G3": ARC_CCW, "G03": ARC_CCW,
+}
+
+# FreeCAD Path stocke F en mm/s : facteur vers mm/min (program_feed)
+PATH_FEED_UNIT = 60.0
+# Commandes traitées par bloc (écriture dans le fichier mappé)
+CHUNK = 1 << 16
+
+
+# ======================================================================
+#  LECTURE DU G-CODE (toGCode)
+# ======================================================================
+
+# Lettres d'adresse ("e" / "E" exclus : exposants des nombres, 1e-05)
+_LETTERS = b"ABCDFGHIJKLMNOPQRSTUVWXYZabcdfghijklmnopqrstuvwxyz"
+# bytes.translate : lettres d'adresse → espaces (il ne reste que les nombres)
+_BLANK_LETTERS = bytes(32 if c in _LETTERS else c for c in range(256))
+_COMMENT = re.compile(r"\([^)]*\)|;[^\n]*")
+_NEWLINE = ord("\n")
+
+
+def gcode_arrays(text, program_feed=False, feed_unit=PATH_FEED_UNIT):
+    """
+    (motion, F programme, xyz) d'un texte G-code (une commande par ligne,
+    un nombre après chaque lettre d'adresse), sans objet Python par
+    commande ; None si le texte n'est pas reconnu.
+    """
+    if "(" in text or ";" in text:
+        text = _COMMENT.sub("", text)
+    if not text.endswith("\n"):
+        text += "\n"
+    try:
+        data = text.encode("ascii")
+    except UnicodeEncodeError:
+        return None
+
+    # Lettres (en majuscules) et ligne de chaque mot, par masque sur les octets
+    raw = np.frombuffer(data, dtype=np.uint8)
+    upper = raw & 0xDF
+    is_letter = (upper >= 65) & (upper <= 90) & (upper != 69)
+    codes = upper[is_letter]
+    newlines = np.flatnonzero(raw == _NEWLINE)
+    line = np.searchsorted(newlines, np.flatnonzero(is_letter))
+    n = len(newlines)
+
+    # Nombres : un seul np.fromstring sur le texte sans les lettres
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # caractère inattendu → None
+        try:
+            values = np.fromstring(data.translate(_BLANK_LETTERS), sep=" ")
+        except (ValueError, DeprecationWarning):
+            return None
+    if len(values) != len(codes):
+        return None
+
+    def modal(code, initial=0.0):
+        """Valeur par ligne de l'adresse `code`, reportée sur les lignes suivantes."""
+        mask = codes == code
+        last = np.full(n, -1)
+        last[line[mask]] = np.arange(int(mask.sum()))
+        np.maximum.accumulate(last, out=last)
+        out = np.full(n, initial)
+        set_ = last >= 0
+        out[set_] = values[mask][last[set_]]
+        return out
+
+    motion = np.full(n, OTHER, dtype=np.uint8)
+    gmask = codes == ord("G")
+    g_lines, first = np.unique(line[gmask], return_index=True)
+    g_values = values[gmask][first]
+    known = np.isin(g_values, (RAPID, LINEAR, ARC_CW, ARC_CCW))
+    motion[g_lines[known]] = g_values[known].astype(np.uint8)
+
+    xyz = np.column_stack((modal(ord("X")), modal(ord("Y")), modal(ord("Z"))))
+    feeds = modal(ord("F")) * feed_unit if program_feed else np.zeros(n)
+    return motion, feeds, xyz
+
+
+# ======================================================================
+#  CONSTRUCTION
+# ======================================================================
+
+def _path_size(path):
+    size = getattr(path, "Size", None)
+    if size is None:
+        size = len(getattr(path, "Commands", None) or ())
+    return size
+
+
+def _op_chunks(path, size, position, program_feed, feed_unit):
+    """
+    Blocs (motion, F programme, xyz) des `size` commandes d'un parcours ;
+    position est la dernière position connue ([x, y, z], mise à jour).
+    """
+    to_gcode = getattr(path, "toGCode", None)
+    arrays = gcode_arrays(to_gcode(), program_feed, feed_unit) if to_gcode is not None else None
+    if arrays is not None and len(arrays[0]) == size:
+        if len(arrays[0]):
+            position[:] = arrays[2][-1]
+            yield arrays
+        return
+
+    cmds = getattr(path, "Commands", None) or ()
+    x, y, z = position
+    f = 0.0
+    for start in range(0, len(cmds), CHUNK):
+        codes = array("B")
+        feeds = array("d")
+        coords = array("d")
+        for cmd in cmds[start:start + CHUNK]:
+            params = cmd.Parameters
+            x = params.get("X", x)
+            y = params.get("Y", y)
+            z = params.get("Z", z)
+            if program_feed and "F" in params:
+                f = params["F"] * feed_unit
+            codes.append(_MOTIONS.get(cmd.Name.upper(), OTHER))
+            feeds.append(f)
+            coords.extend((x, y, z))
+        position[:] = (x, y, z)
+        yield (np.frombuffer(codes, dtype=np.uint8),
+               np.frombuffer(feeds),
+               np.frombuffer(coords).reshape(-1, 3))
+
+
+def path_timeline(ops, feed_mm_min, rapid_feed_mm_min=None, include_rapids=False,
+                  program_feed=False, feed_unit=PATH_FEED_UNIT, filename=None):
+    """
+    Chronologie des déplacements d'une ou plusieurs opérations Path.
+
+    ops          : opération (objet avec .Path) ou liste d'opérations
+    feed_mm_min  : avance de coupe, une valeur ou une par opération ; avec
+                   program_feed, utilisée avant le premier mot F
+    filename     : fichier .npy mappé en mémoire (programmes très longs)
+
+    Retourne un tableau (ou memmap) de dtype TIMELINE_DTYPE.
+    """
+    if hasattr(ops, "Path"):
+        ops = [ops]
+    ops = list(ops)
+    feeds = list(feed_mm_min) if isinstance(feed_mm_min, (list, tuple)) else [feed_mm_min] * len(ops)
+    if len(feeds) != len(ops):
+        raise ValueError("Une avance par opération attendue.")
+    paths = []
+    for op in ops:
+        path = getattr(op, "Path", None)
+        if path is None:
+            raise ValueError("L'opération fournie ne possède pas de Path.")
+        paths.append(path)
+
+    sizes = [_path_size(p) for p in paths]
+    total = sum(max(size - 1, 0) for size in sizes)
+    if filename:
+        out = np.lib.format.open_memmap(filename, mode="w+", dtype=TIMELINE_DTYPE, shape=(total,))
+    else:
+        out = np.empty(total, dtype=TIMELINE_DTYPE)
+
+    row = 0
+    for index, (path, size, feed) in enumerate(zip(paths, sizes, feeds)):
+        if feed <= 0:
+            raise ValueError("L'avance de coupe (feed_mm_min) doit être > 0.")
+        rapid = rapid_feed_mm_min or feed
+        # Comme _extract_path_segments : chaque opération part de l'origine,
+        # sa première commande ne fait que poser la position
+        position = [0.0, 0.0, 0.0]
+        prev = None
+        for codes, prog_feeds, ends in _op_chunks(path, size, position, program_feed, feed_unit):
+            if prev is None:
+                prev = ends[0]
+                codes, prog_feeds, ends = codes[1:], prog_feeds[1:], ends[1:]
+            n = len(codes)
+            if not n:
+                continue
+            starts = np.empty_like(ends)
+            starts[0] = prev
+            starts[1:] = ends[:-1]
+            prev = ends[-1].copy()
+
+            seg = out[row:row + n]
+            for k, name in enumerate(("x", "y", "z")):
+                seg[name + "0"] = starts[:, k]
+                seg[name + "1"] = ends[:, k]
+            length = np.sqrt(((ends - starts) ** 2).sum(axis=1))
+
+            cut = (codes >= LINEAR) & (codes <= ARC_CCW)
+            seg_feed = np.zeros(n)
+            if program_feed:
+                seg_feed[cut] = np.where(prog_feeds[cut] > 0, prog_feeds[cut], feed)
+            else:
+                seg_feed[cut] = feed
+            rapids = codes == RAPID
+            seg_feed[rapids] = rapid
+
+            timed = cut | rapids if include_rapids else cut
+            seg_time = np.zeros(n)
+            seg_time[timed] = length[timed] / seg_feed[timed]
+
+            seg["motion"] = codes
+            seg["feed"] = seg_feed
+            seg["length"] = length
+            seg["time"] = seg_time
+            seg["op"] = index
+            row += n
+
+    if filename:
+        out.flush()
+    return out
+
+
+def load_timeline(filename, mmap=True):
+    """Relit une chronologie enregistrée (.npy), mappée en mémoire par défaut."""
+    return np.load(filename, mmap_mode="r" if mmap else None)
+
+
+# ======================================================================
+#  AGRÉGATIONS
+# ======================================================================
+
+AGGREGATE_DTYPE = [("count", "i8"), ("length", "f8"), ("time", "f8")]
+
+
+def aggregate(timeline, keys):
+    """
+    Regroupe les segments par clé (tableau de même longueur) ; retourne un
+    tableau structuré trié par clé : key, count, length (mm), time (min).
+    """
+    keys = np.asarray(keys)
+    groups, inverse = np.unique(keys, return_inverse=True)
+    out = np.empty(len(groups), dtype=[("key", groups.dtype)] + AGGREGATE_DTYPE)
+    out["key"] = groups
+    out["count"] = np.bincount(inverse, minlength=len(groups))
+    out["length"] = np.bincount(inverse, weights=timeline["length"], minlength=len(groups))
+    out["time"] = np.bincount(inverse, weights=timeline["time"], minlength=len(groups))
+    return out
+
+
+def by_z_band(timeline, band=1.0):
+    """Par tranche de Z (clé = Z bas de la tranche, milieu du segment)."""
+    zmid = (timeline["z0"] + timeline["z1"]) * 0.5
+    return aggregate(timeline, np.floor(zmid / band) * band)
+
+
+def by_feed(timeline):
+    return aggregate(timeline, timeline["feed"])
+
+
+def by_op(timeline):
+    return aggregate(timeline, timeline["op"])
+
+
+def by_motion(timeline):
+    return aggregate(timeline, timeline["motion"])
+
+
+def timeline_totals(timeline):
+    """Totaux au format de compute_time_from_path_op."""
+    motion = timeline["motion"]
+    cut = (motion >= LINEAR) & (motion <= ARC_CCW)
+    rapids = motion == RAPID
+    time_cut = float(timeline["time"][cut].sum())
+    time_rapid = float(timeline["time"][rapids].sum())
+    return {
+        "length_cut_mm": float(timeline["length"][cut].sum()),
+        "length_rapid_mm": float(timeline["length"][rapids].sum()),
+        "time_cut_min": time_cut,
+        "time_rapid_min": time_rapid,
+        "time_total_min": time_cut + time_rapid,
+    }
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+costing_core/topology.py — Graphe d'adjacence des faces, poches et rainures
+
+Le graphe est construit une fois par pièce (milling_features.build_face_graph)
+à partir de la table arête → faces : deux faces sont voisines si elles
+partagent une arête, et chaque arête porte sa convexité vue depuis la
+matière :
+
+    CONVEX   arête saillante (dessus / flanc extérieur, bord d'un trou)
+    CONCAVE  arête rentrante (fond / paroi d'une poche, coin intérieur)
+    SMOOTH   faces tangentes (congé, face découpée en plusieurs morceaux)
+
+Stockage compact (tableaux d'entiers, format CSR) : les voisins de la
+face i sont neighbours[indptr[i]:indptr[i + 1]], les convexités aux
+mêmes indices de convexity ; chaque arête partagée y figure deux fois.
+
+Reconnaissance (recesses) : un fond (plan horizontal tourné vers +Z) et
+les parois qui l'entourent forment une composante du graphe restreint
+aux arêtes rentrantes ou tangentes ; le parcours visite chaque face et
+chaque arête une seule fois (temps linéaire). La forme des parois et les
+arêtes saillantes du fond donnent le type :
+
+    pocket       fond fermé (poche), ou ouvert entouré de parois variées
+    slot         ouvert, parois planes sur deux directions opposées (rainure)
+    step         ouvert, parois planes sur une seule direction (épaulement)
+    counterbore  parois cylindriques, fond percé (lamage)
+
+Module de calcul pur (bibliothèque standard).
+"""
+
+from array import array
+
+
+# Convexité d'une arête
+CONVEX = 1
+SMOOTH = 0
+CONCAVE = -1
+
+# Type de face
+OTHER = 0
+FLOOR = 1       # plan horizontal, normale vers +Z (fond, dessus)
+CEILING = 2     # plan horizontal, normale vers −Z (dessous)
+WALL = 3        # plan vertical
+WALL_CYL = 4    # cylindre d'axe Z (paroi arrondie, alésage)
+
+NO_DIRECTION = -1   # direction des faces autres que les plans verticaux
+DIR_TOL_DEG = 3     # écart accepté entre directions de parois (degrés)
+
+
+# ======================================================================
+#  GRAPHE
+# ======================================================================
+
+class FaceGraph:
+    """
+    Graphe d'adjacence des faces (CSR).
+
+    kinds[i]      : type de la face i (OTHER, FLOOR, CEILING, WALL, WALL_CYL)
+    directions[i] : direction (degrés, 0..359) de la normale d'un plan
+                    vertical, NO_DIRECTION sinon
+    pairs         : (face a, face b, convexité) pour chaque arête partagée
+    """
+
+    __slots__ = ("kinds", "directions", "indptr", "neighbours", "convexity")
+
+    def __init__(self, kinds, directions, pairs):
+        n = len(kinds)
+        self.kinds = array("b", kinds)
+        self.directions = array("h", directions)
+
+        # tri par comptage : degré de chaque face, puis remplissage
+        pairs = list(pairs)
+        indptr = array("l", bytes(array("l").itemsize * (n + 1)))
+        for a, b, _ in pairs:
+            indptr[a + 1] += 1
+            indptr[b + 1] += 1
+        for i in range(n):
+            indptr[i + 1] += indptr[i]
+
+        size = indptr[n]
+        neighbours = array("l", bytes(array("l").itemsize * size))
+        convexity = array("b", bytes(size))
+        cursor = indptr[:n]
+        for a, b, c in pairs:
+            k = cursor[a]
+            neighbours[k] = b
+            convexity[k] = c
+            cursor[a] = k + 1
+            k = cursor[b]
+            neighbours[k] = a
+            convexity[k] = c
+            cursor[b] = k + 1
+
+        self.indptr = indptr
+        self.neighbours = neighbours
+        self.convexity = convexity
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def adjacent(self, i):
+        """[(face voisine, convexité)] de la face i."""
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        return list(zip(self.neighbours[lo:hi], self.convexity[lo:hi]))
+
+
+# ======================================================================
+#  RECONNAISSANCE
+# ======================================================================
+
+def _angle(a, b):
+    """Écart (degrés, 0..180) entre deux directions."""
+    d = abs(a - b) % 360
+    return 360 - d if d > 180 else d
+
+
+def _wall_kind(directions):
+    """"slot", "step" ou None d'après les directions des parois planes."""
+    first = directions[0]
+    opposite = False
+    for d in directions:
+        gap = _angle(d, first)
+        if gap > 180 - DIR_TOL_DEG:
+            opposite = True
+        elif gap > DIR_TOL_DEG:
+            return None
+    return "slot" if opposite else "step"
+
+
+def _classify(graph, walls, open_kinds):
+    kinds, directions = graph.kinds, graph.directions
+    planar = [directions[w] for w in walls if kinds[w] == WALL]
+    if not open_kinds:
+        return "pocket"
+    if not planar:
+        # paroi cylindrique, fond ouvert seulement sur des cylindres (trou)
+        return "counterbore" if open_kinds == {WALL_CYL} else "pocket"
+    if any(kinds[w] == WALL_CYL for w in walls):
+        return "pocket"
+    return _wall_kind(planar) or "pocket"
+
+
+def recesses(graph):
+    """
+    Poches, rainures, épaulements et lamages du graphe :
+    [{"kind", "floors": [faces], "walls": [faces]}].
+
+    Chaque fond (FLOOR) non encore attribué démarre un parcours en
+    profondeur : fonds voisins tangents (fond découpé), parois et congés
+    atteints par des arêtes rentrantes ou tangentes. Les arêtes saillantes
+    du fond (bord extérieur, bord d'un trou) rendent la forme « ouverte ».
+    Une face appartient au plus à une forme ; un fond sans paroi (dessus
+    de la pièce) n'est pas retenu.
+    """
+    kinds = graph.kinds
+    indptr, neighbours, convexity = graph.indptr, graph.neighbours, graph.convexity
+    n = len(kinds)
+    taken = bytearray(n)
+    out = []
+
+    for start in range(n):
+        if kinds[start] != FLOOR or taken[start]:
+            continue
+        taken[start] = 1
+        floors, walls = [], []
+        open_kinds = set()
+        stack = [start]
+        while stack:
+            i = stack.pop()
+            floor = kinds[i] == FLOOR
+            (floors if floor else walls).append(i)
+            for k in range(indptr[i], indptr[i + 1]):
+                j = neighbours[k]
+                c = convexity[k]
+                kj = kinds[j]
+                if c == CONVEX:
+                    if floor:
+                        open_kinds.add(kj)
+                    continue
+                if taken[j] or kj == CEILING:
+                    continue
+                if kj == FLOOR and not (floor and c == SMOOTH):
+                    continue
+                taken[j] = 1
+                stack.append(j)
+
+        if walls:
+            out.append({"kind": _classify(graph, walls, open_kinds),
+                        "floors": floors, "walls": walls})
+    return out
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+costing_core/uncertainty.py — Incertitude du devis (Monte-Carlo vectorisé)
+
+Le temps d'une opération est celui de machining.compute_operation_time
+aux conditions nominales ; les conditions réelles varient. Chaque
+paramètre reçoit une loi de facteur multiplicatif (1.0 = nominal) :
+
+    vc          vitesse de coupe        temps ∝ 1 / f
+    fz          avance par dent         temps ∝ 1 / f
+    ae          engagement radial       Surfaçage 1 / f, Poche passes(f) / f,
+                                        Contournage passes(f), Perçage sans effet
+    efficiency  rendement machine       temps ∝ 1 / f (modèle = 100 %)
+
+et une portée : "op" (tirage propre à chaque opération), "tool" (commun
+aux opérations d'un même outil), "part" (commun à toute la pièce).
+
+    res = quote_uncertainty(operations, rate=60.0)
+    res["cost"]["p90"], res["sensitivity"]["fz"]
+
+Tirages : SAMPLES valeurs par paramètre, puis chaque opération (ou outil)
+lit ce tirage avec un décalage circulaire distinct ; chaque opération a
+ainsi ses SAMPLES tirages sans nouveau tirage aléatoire, et le calcul
+d'une opération se réduit à deux passes NumPy (les opérations qui
+partagent leurs facteurs vc / fz / rendement sont sommées avant d'être
+multipliées par ces facteurs).
+
+Sensibilités : corrélation de rang (Spearman) entre le temps total et le
+facteur moyen de chaque paramètre pondéré par les temps nominaux ; une
+valeur négative signifie qu'une hausse du paramètre raccourcit le temps.
+
+Nécessite NumPy (importé par ce module seulement, pas par costing_core).
+"""
+
+import math
+
+import numpy as np
+
+from .graph import compute_operation, effective_surplus
+
+
+SAMPLES = 100_000
+# Plancher des facteurs tirés (queues des lois normales : pas de Vc ≤ 0)
+MIN_FACTOR = 0.05
+
+PARAMETERS = ("vc", "fz", "ae", "efficiency")
+SCOPES = ("op", "tool", "part")
+
+
+# ======================================================================
+#  LOIS DES FACTEURS
+# ======================================================================
+
+class Distribution:
+    """
+    Loi d'un facteur multiplicatif :
+        Distribution("fixed", 1.0)
+        Distribution("normal", moyenne, écart_type)
+        Distribution("uniform", mini, maxi)
+        Distribution("triangular", mini, mode, maxi)
+    """
+
+    KINDS = {"fixed": 1, "normal": 2, "uniform": 2, "triangular": 3}
+
+    __slots__ = ("kind", "params", "scope")
+
+    def __init__(self, kind, *params, scope="op"):
+        if self.KINDS.get(kind) != len(params):
+            raise ValueError(f"Loi inconnue ou paramètres invalides : {kind}{params}")
+        if scope not in SCOPES:
+            raise ValueError(f"Portée inconnue : {scope}")
+        self.kind = kind
+        self.params = tuple(float(p) for p in params)
+        self.scope = scope
+
+    @property
+    def is_fixed(self):
+        p = self.params
+        return (self.kind == "fixed"
+                or (self.kind == "normal" and p[1] <= 0)
+                or (self.kind != "normal" and p[0] == p[-1]))
+
+    def sample(self, rng, n):
+        p = self.params
+        if self.kind == "fixed":
+            values = np.full(n, p[0])
+        elif self.kind == "normal":
+            values = rng.normal(p[0], p[1], n)
+        elif self.kind == "uniform":
+            values = rng.uniform(p[0], p[1], n)
+        else:
+            values = rng.triangular(p[0], p[1], p[2], n)
+        return np.maximum(values, MIN_FACTOR, out=values)
+
+    def __repr__(self):
+        return f"Distribution({self.kind!r}, {', '.join(map(str, self.params))}, scope={self.scope!r})"
+
+
+# Écarts usuels : conditions de coupe d'un outil dérivant ensemble,
+# engagement propre à chaque opération, rendement de la machine.
+DEFAULT_SPEC = {
+    "vc": Distribution("normal", 1.0, 0.05, scope="tool"),
+    "fz": Distribution("normal", 1.0, 0.10, scope="tool"),
+    "ae": Distribution("uniform", 0.9, 1.1, scope="op"),
+    "efficiency": Distribution("triangular", 0.80, 0.90, 1.0, scope="part"),
+}
+
+
+# ======================================================================
+#  OUTILS VECTORISÉS
+# ======================================================================
+
+def _add_rolled(acc, values, shift, weight, tmp):
+    """acc += weight × values décalé circulairement de shift (sans copie de values)."""
+    head = len(values) - shift
+    np.multiply(values[shift:], weight, out=tmp[:head])
+    np.multiply(values[:shift], weight, out=tmp[head:])
+    acc += tmp
+
+
+def _rolled(values, shift, out):
+    head = len(values) - shift
+    out[:head] = values[shift:]
+    out[head:] = values[:shift]
+    return out
+
+
+def _shifts(keys, n, rng):
+    """Décalage distinct (si possible) par unité de portée."""
+    units = list(dict.fromkeys(keys))
+    if len(units) <= n:
+        offsets = rng.permutation(n)[:len(units)]
+    else:
+        offsets = rng.integers(0, n, len(units))
+    table = dict(zip(units, offsets.tolist()))
+    return [table[k] for k in keys]
+
+
+def _ranks(values):
+    ranks = np.empty(len(values))
+    ranks[np.argsort(values, kind="stable")] = np.arange(len(values))
+    return ranks
+
+
+def spearman(x, y):
+    """Corrélation de rang de deux tirages (0.0 si l'un est constant)."""
+    rx = _ranks(x)
+    ry = _ranks(y)
+    rx -= rx.mean()
+    ry -= ry.mean()
+    den = math.sqrt(float(rx @ rx) * float(ry @ ry))
+    return float(rx @ ry) / den if den > 0 else 0.0
+
+
+def _ae_transform(f, exponent, passes0, ratio):
+    """Facteur de temps dû à l'engagement : passes(f) / passes0 × f^-exponent."""
+    out = np.ones_like(f)
+    if ratio > 0:
+        np.divide(ratio, f, out=out)
+        np.ceil(out, out=out)
+        np.maximum(out, 1.0, out=out)
+        out /= passes0
+    if exponent:
+        out /= f
+    return out
+
+
+def _summary(values):
+    p10, p50, p90 = np.quantile(values, (0.10, 0.50, 0.90))
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "p10": float(p10),
+        "p50": float(p50),
+        "p90": float(p90),
+    }
+
+
+# ======================================================================
+#  MONTE-CARLO D'UN DEVIS
+# ======================================================================
+
+def _nominal(op):
+    """(temps h, exposant ae, passes radiales nominales, ratio surép./ae) ou None."""
+    tool = op.get("tool")
+    if tool is None:
+        return None
+    op_type = op["op_type"]
+    cutting = op.get("cutting") or {}
+    try:
+        res = compute_operation(op_type, tool, cutting, op.get("geometry") or {}, op.get("margins"))
+    except ValueError:
+        return None
+    if res["time_h"] <= 0:
+        return None
+
+    exponent = 1 if op_type in ("Surfaçage", "Poche") else 0
+    ratio = 0.0
+    if op_type in ("Contournage", "Poche"):
+        _, xy_surplus = effective_surplus(cutting, op.get("margins"))
+        if xy_surplus > 0 and res["ae_mm"] > 0:
+            ratio = abs(xy_surplus) / res["ae_mm"]
+    passes0 = max(1, math.ceil(ratio)) if ratio > 0 else 1
+    return res["time_h"], exponent, passes0, ratio
+
+
+def quote_uncertainty(operations, rate, spec=None, samples=SAMPLES, seed=0):
+    """
+    Distribution du temps et du coût d'une pièce.
+
+    operations : dicts {op_type, tool: (diam, z, vc, fz), tool_name,
+                 cutting, geometry, margins} (voir compute_operation)
+    rate       : taux horaire (€/h)
+    spec       : {paramètre: Distribution}, complète DEFAULT_SPEC
+
+    Retourne {samples, operations, nominal_h, nominal_cost,
+              time_h: {mean, std, p10, p50, p90}, cost: {...},
+              sensitivity: {paramètre: Spearman}}.
+    """
+    laws = dict(DEFAULT_SPEC)
+    for name, law in (spec or {}).items():
+        if name not in PARAMETERS:
+            raise ValueError(f"Paramètre inconnu : {name}")
+        laws[name] = law
+
+    ops = []
+    for i, op in enumerate(operations):
+        nominal = _nominal(op)
+        if nominal is not None:
+            ops.append((i, op.get("tool_name", ""), nominal))
+
+    n = int(samples)
+    rng = np.random.default_rng(seed)
+    pools = {name: laws[name].sample(rng, n) for name in PARAMETERS}
+
+    # Décalage de chaque opération dans le tirage de chaque paramètre
+    shifts = {}
+    for name in PARAMETERS:
+        scope = laws[name].scope
+        if scope == "part":
+            keys = [0] * len(ops)
+        elif scope == "tool":
+            keys = [tool_name for _, tool_name, _ in ops]
+        else:
+            keys = [i for i, _, _ in ops]
+        shifts[name] = _shifts(keys, n, rng)
+
+    tmp = np.empty(n)
+    transforms = {}
+    groups = {}          # (décalages vc, fz, rendement) → [somme tirée, constante, temps nominal]
+    ae_weights = {}      # décalage ae → temps nominal des opérations sensibles à ae
+    for j, (_, _, (t0, exponent, passes0, ratio)) in enumerate(ops):
+        key = (shifts["vc"][j], shifts["fz"][j], shifts["efficiency"][j])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = [None, 0.0, 0.0]
+        group[2] += t0
+
+        if not exponent and ratio <= 0:
+            group[1] += t0   # temps indépendant de ae
+            continue
+        tkey = (exponent, passes0, ratio)
+        factor = transforms.get(tkey)
+        if factor is None:
+            factor = transforms[tkey] = _ae_transform(pools["ae"], exponent, passes0, ratio)
+        if group[0] is None:
+            group[0] = np.zeros(n)
+        _add_rolled(group[0], factor, shifts["ae"][j], t0, tmp)
+        s = shifts["ae"][j]
+        ae_weights[s] = ae_weights.get(s, 0.0) + t0
+
+    # Facteurs 1 / f de vc, fz et du rendement, appliqués par groupe
+    inverse = {name: np.reciprocal(pools[name]) for name in ("vc", "fz", "efficiency")}
+    total = np.zeros(n)
+    drivers = {name: np.zeros(n) for name in PARAMETERS}
+    weights = {"vc": {}, "fz": {}, "efficiency": {}}
+    out = np.empty(n)
+    for (s_vc, s_fz, s_eff), (drawn, const, t0) in groups.items():
+        factor = _rolled(inverse["vc"], s_vc, out)
+        factor *= _rolled(inverse["fz"], s_fz, tmp)
+        factor *= _rolled(inverse["efficiency"], s_eff, tmp)
+        if drawn is None:
+            total += const * factor
+        else:
+            if const:
+                drawn += const
+            drawn *= factor
+            total += drawn
+        for name, s in (("vc", s_vc), ("fz", s_fz), ("efficiency", s_eff)):
+            weights[name][s] = weights[name].get(s, 0.0) + t0
+    weights["ae"] = ae_weights
+
+    sensitivity = {}
+    for name in PARAMETERS:
+        if laws[name].is_fixed or not weights[name]:
+            sensitivity[name] = 0.0
+            continue
+        for s, w in weights[name].items():
+            _add_rolled(drivers[name], pools[name], s, w, tmp)
+        sensitivity[name] = spearman(drivers[name], total)
+
+    nominal_h = sum(t0 for _, _, (t0, _, _, _) in ops)
+    time_h = _summary(total)
+    return {
+        "samples": n,
+        "operations": len(ops),
+        "nominal_h": nominal_h,
+        "nominal_cost": nominal_h * rate,
+        "time_h": time_h,
+        "cost": {k: v * rate for k, v in time_h.items()},
+        "sensitivity": sensitivity,
+    }
+
+
+def graph_uncertainty(quote_graph, spec=None, samples=SAMPLES, seed=0):
+    """quote_uncertainty des opérations et du taux horaire d'un QuoteGraph."""
+    return quote_uncertainty(quote_graph.operation_inputs(), quote_graph.rate(),
+                             spec=spec, samples=samples, seed=seed)
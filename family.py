@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+family.py — Chiffrage d'une famille de pièces paramétrée
+
+Une famille est pilotée par un tableur FreeCAD (Spreadsheet::Sheet) dont
+les cellules nommées (alias) portent les cotes : longueur, nombre de
+trous... On donne une liste de valeurs par alias ; chaque combinaison est
+une variante :
+
+    values = {"Longueur": parse_values("100:300:50"), "NbTrous": [4, 6]}
+    rows = quote_family(doc, values, material="Aluminium", rate=60.0)
+    header, lines = family_table(rows)
+
+Chaque variante est évaluée dans un processus de calcul, sur une copie du
+document (doc.saveCopy) : valeurs du tableur, recalcul, géométrie,
+features, brut (catalogue si matière) et chiffrage de toutes les
+opérations (auto_ops.generate_operations). Le document ouvert n'est
+jamais modifié.
+
+Réutilisation : les processus partagent le dépôt d'analyses
+(analysis_store). Une variante déjà analysée telle quelle (chiffrage
+précédent, autre poste) relit ses features et son brut ; sinon, chaque
+opération relit la géométrie de ses faces si une autre variante contient
+ces faces inchangées (même géométrie, même position) : colonne
+"Features réutilisées", k / n opérations.
+
+Processus : interpréteur Python de FreeCAD (bin/python), méthode
+"spawn". S'il est introuvable, les variantes sont évaluées l'une après
+l'autre dans FreeCAD. Le panneau attend les processus hors du thread de
+l'interface (evaluate_in_processes) ; seule la copie du document
+(copy_for_family) et l'évaluation dans FreeCAD y restent, les documents
+n'étant pas utilisables depuis un autre thread.
+"""
+
+import csv
+import itertools
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import FreeCAD
+except ImportError:
+    # Permet d'importer le module en dehors de FreeCAD (ex : tests)
+    FreeCAD = None
+
+
+# Processus de calcul par défaut (un cœur laissé à l'interface)
+FAMILY_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Colonnes de résultat (après les paramètres de la variante)
+COLUMNS = (
+    ("volume_mm3", "Volume (mm³)"),
+    ("mass_kg", "Masse (kg)"),
+    ("bbox", "Encombrement (mm)"),
+    ("features", "Plans / flancs / trous"),
+    ("stock", "Brut"),
+    ("stock_cost", "Matière (€)"),
+    ("operations", "Opérations"),
+    ("time_h", "Temps (h)"),
+    ("machining_cost", "Usinage (€)"),
+    ("total_cost", "Total (€)"),
+    ("reused", "Features réutilisées"),
+    ("seconds", "Durée (s)"),
+    ("error", "Erreur"),
+)
+
+
+# ======================================================================
+#  PARAMÈTRES DU TABLEUR
+# ======================================================================
+
+def _sheets(doc):
+    return [o for o in doc.Objects if o.TypeId == "Spreadsheet::Sheet"]
+
+
+def family_parameters(doc):
+    """{alias: valeur actuelle} des cellules nommées de tous les tableurs."""
+    params = {}
+    for sheet in _sheets(doc):
+        for cell in sheet.getUsedCells():
+            alias = sheet.getAlias(cell)
+            if alias and alias not in params:
+                params[alias] = sheet.get(alias)
+    return params
+
+
+def parse_values(text):
+    """
+    Valeurs d'un paramètre saisies en texte :
+        "10; 20; 35"      liste
+        "100:300:50"      de 100 à 300 inclus, pas de 50
+    """
+    text = text.strip()
+    if not text:
+        return []
+    if ":" in text:
+        start, stop, step = (float(v.replace(",", ".")) for v in text.split(":"))
+        if step <= 0:
+            raise ValueError(f"Pas invalide : {text}")
+        count = int((stop - start) / step + 1e-9) + 1
+        values = [start + i * step for i in range(count)]
+    else:
+        values = [float(v.replace(",", ".")) for v in text.replace(" ", "").split(";") if v]
+    return [int(v) if float(v).is_integer() else v for v in values]
+
+
+def enumerate_variants(values):
+    """{alias: [valeurs]} → liste de dicts {alias: valeur} (produit cartésien)."""
+    names = [k for k, v in values.items() if v]
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values[k] for k in names))]
+
+
+def apply_parameters(doc, params):
+    """Écrit les valeurs dans les tableurs (par alias) puis recalcule le document."""
+    owners = {}
+    for sheet in _sheets(doc):
+        for cell in sheet.getUsedCells():
+            alias = sheet.getAlias(cell)
+            if alias:
+                owners.setdefault(alias, sheet)
+    for alias, value in params.items():
+        sheet = owners.get(alias)
+        if sheet is None:
+            raise ValueError(f"Alias introuvable dans les tableurs : {alias}")
+        sheet.set(alias, str(value))
+    doc.recompute()
+
+
+# ======================================================================
+#  ÉVALUATION D'UNE VARIANTE
+# ======================================================================
+
+def _reference_part(doc):
+    """Premier solide du document qui n'est ni un brut ni une opération."""
+    for obj in doc.Objects:
+        shape = getattr(obj, "Shape", None)
+        if (shape is not None and not shape.isNull() and shape.Solids
+                and not getattr(obj, "PC_IsStock", False)
+                and not getattr(obj, "PC_IsOperation", False)):
+            return obj
+    return None
+
+
+def evaluate_variant(doc, params, material=None, rate=0.0):
+    """
+    Chiffre une variante dans `doc` (copie de travail : modifiée, le brut
+    créé est supprimé à la fin). Retourne la ligne de résultat (dict).
+    """
+    from auto_ops import generate_operations, part_features
+    from machining_tools import get_library
+    from mass_properties import get_engine
+    from stock_intelligent import compute_auto_margins, create_intelligent_stock
+
+    t0 = time.perf_counter()
+    row = dict(params)
+
+    apply_parameters(doc, params)
+    part = _reference_part(doc)
+    if part is None:
+        raise RuntimeError("Aucun solide dans le document.")
+    shape = part.Shape
+
+    # Géométrie
+    props = get_engine().properties(shape)
+    bb = shape.BoundBox
+    row["volume_mm3"] = props.volume_mm3
+    row["mass_kg"] = props.mass_kg(material) if material else None
+    row["bbox"] = f"{bb.XLength:.1f} × {bb.YLength:.1f} × {bb.ZLength:.1f}"
+
+    # Features (dépôt d'analyses partagé entre variantes et processus)
+    feats = part_features(shape)
+    row["features"] = f"{len(feats.planes)} / {len(feats.flanks)} / {len(feats.holes)}"
+
+    # Brut
+    FreeCAD.setActiveDocument(doc.Name)
+    stock, stock_type, _, _ = create_intelligent_stock(
+        shape, margins=compute_auto_margins(shape), material=material,
+    )
+    row["stock"] = getattr(stock, "PC_StockRef", "") or stock_type
+    row["stock_cost"] = getattr(stock, "PC_StockCost", 0.0)
+
+    # Chiffrage de toutes les opérations
+    stats = {}
+    ops, skipped = generate_operations(part, get_library(), stock, stats=stats)
+    doc.removeObject(stock.Name)
+    row["reused"] = f"{stats['reused']} / {stats['features']}"
+    time_h = sum(op["time_h"] for op in ops)
+    row["operations"] = f"{len(ops)} (+{len(skipped)} ignorée(s))" if skipped else len(ops)
+    row["time_h"] = time_h
+    row["machining_cost"] = time_h * rate
+    row["total_cost"] = row["machining_cost"] + row["stock_cost"]
+    row["seconds"] = time.perf_counter() - t0
+    return row
+
+
+# ----------------------------------------------------------
+# Processus de calcul
+# ----------------------------------------------------------
+_WORKER_DOCS = {}  # chemin de la copie → document ouvert dans ce processus
+
+
+def _init_worker(store_dir):
+    import analysis_store
+
+    analysis_store.use_store(store_dir)
+
+
+def _run_variant(path, index, params, material, rate):
+    """Point d'entrée d'un processus : (indice, ligne) ; erreurs rapportées dans la ligne."""
+    try:
+        doc = _WORKER_DOCS.get(path)
+        if doc is None:
+            doc = _WORKER_DOCS[path] = FreeCAD.openDocument(path)
+        return index, evaluate_variant(doc, params, material, rate)
+    except Exception as e:
+        return index, dict(params, error=f"{type(e).__name__}: {e}")
+
+
+def _python_executable():
+    """Interpréteur Python capable d'importer FreeCAD, ou None."""
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    bin_dir = os.path.join(FreeCAD.getHomePath(), "bin")
+    for name in ("python.exe", "python3", "python"):
+        path = os.path.join(bin_dir, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+# ======================================================================
+#  FAMILLE
+# ======================================================================
+
+def family_python():
+    """Interpréteur des processus de calcul, ou None (évaluation dans FreeCAD)."""
+    if FreeCAD is None:
+        raise RuntimeError("Ce module doit être exécuté dans FreeCAD (FreeCAD introuvable).")
+    return _python_executable()
+
+
+def copy_for_family(doc):
+    """Copie de travail du document (doc.saveCopy) dans un dossier temporaire : chemin."""
+    path = os.path.join(tempfile.mkdtemp(prefix="partcosting_family_"), "family.FCStd")
+    doc.saveCopy(path)
+    return path
+
+
+def remove_family_copy(path):
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def evaluate_in_freecad(path, variants, material=None, rate=0.0, progress=None):
+    """Variantes évaluées l'une après l'autre dans FreeCAD, sur la copie `path`."""
+    rows = []
+    active = FreeCAD.ActiveDocument
+    copy = FreeCAD.openDocument(path)
+    try:
+        for i, params in enumerate(variants):
+            try:
+                rows.append(evaluate_variant(copy, params, material, rate))
+            except Exception as e:
+                rows.append(dict(params, error=f"{type(e).__name__}: {e}"))
+            if progress:
+                progress(i + 1, len(variants))
+    finally:
+        FreeCAD.closeDocument(copy.Name)
+        if active is not None:
+            FreeCAD.setActiveDocument(active.Name)
+    return rows
+
+
+def evaluate_in_processes(path, variants, python, material=None, rate=0.0,
+                          workers=FAMILY_WORKERS, progress=None):
+    """
+    Variantes de la copie `path` évaluées dans des processus de calcul
+    (interpréteur `python`). N'utilise ni document ni interface : peut
+    tourner hors du thread de l'interface, progress est alors appelé
+    depuis ce thread.
+    """
+    from analysis_store import get_store
+
+    store = get_store()
+    rows = [None] * len(variants)
+    ctx = multiprocessing.get_context("spawn")
+    ctx.set_executable(python)
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(variants))), mp_context=ctx,
+                             initializer=_init_worker,
+                             initargs=(store.path if store else None,)) as pool:
+        futures = [pool.submit(_run_variant, path, i, params, material, rate)
+                   for i, params in enumerate(variants)]
+        for done, future in enumerate(as_completed(futures), 1):
+            i, row = future.result()
+            rows[i] = row
+            if progress:
+                progress(done, len(variants))
+    return rows
+
+
+def quote_family(doc, values, material=None, rate=0.0, workers=None, progress=None):
+    """
+    Chiffre toutes les variantes de `values` ({alias: [valeurs]}).
+
+    workers  : nombre de processus (défaut FAMILY_WORKERS)
+    progress : progress(faites, total) appelé après chaque variante
+
+    Retourne les lignes (dicts) dans l'ordre des variantes.
+    """
+    python = family_python()
+    variants = enumerate_variants(values)
+    if not variants:
+        return []
+    workers = FAMILY_WORKERS if workers is None else workers
+
+    path = copy_for_family(doc)
+    try:
+        if python is None:
+            return evaluate_in_freecad(path, variants, material, rate, progress)
+        return evaluate_in_processes(path, variants, python, material, rate, workers, progress)
+    finally:
+        remove_family_copy(path)
+
+
+# ======================================================================
+#  TABLEAU DE RÉSULTATS
+# ======================================================================
+
+def _columns(rows):
+    params = []
+    for row in rows:
+        for key in row:
+            if key not in params and all(key != c for c, _ in COLUMNS):
+                params.append(key)
+    return [(k, k) for k in params] + [c for c in COLUMNS if any(c[0] in r for r in rows)]
+
+
+def format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "oui" if value else ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def family_table(rows):
+    """(en-têtes, lignes de texte) du tableau de la famille."""
+    columns = _columns(rows)
+    header = [title for _, title in columns]
+    return header, [[format_value(row.get(key)) for key, _ in columns] for row in rows]
+
+
+def write_family_csv(rows, path):
+    header, lines = family_table(rows)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(header)
+        writer.writerows(lines)
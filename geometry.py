@@ -2,10 +2,18 @@
 # First module for Part Costing: geometry extraction
 # Minimal, beginner-friendly implementation
 
+import math
+
 import FreeCAD
 import FreeCADGui
 import Part
 
+from costing_core.offsets import polygon_area
+from tracing import traced
+
+OUTLINE_DEFLECTION = 0.1   # mm : chordal deviation of discretized outlines
+
+
 class GeometryExtractor:
     """
     Extracts basic geometric information from the active FreeCAD document.
@@ -15,6 +23,7 @@ class GeometryExtractor:
         self.doc = doc or FreeCAD.ActiveDocument
         self.shape = None
 
+    @traced("geometry")
     def load_part(self):
         """Load the first solid found in the document."""
         for obj in self.doc.Objects:
@@ -38,6 +47,7 @@ class GeometryExtractor:
             return []
         return self.shape.Faces
 
+    @traced("geometry")
     def summary(self):
         if not self.shape:
             return "No shape loaded."
@@ -52,6 +62,152 @@ class GeometryExtractor:
             "face_count": len(self.get_faces())
         }
 
+
+# ------------------------------------------------------------
+# Face-derived quantities used by machining operations
+# (shared by OperationDialog and the persisted operation objects)
+# ------------------------------------------------------------
+
+def faces_depth(faces):
+    """
+    Real depth = smallest dimension of the bounding box of all faces
+    (the machining axis, whatever the part orientation).
+    """
+    if not faces:
+        return 0.0
+
+    bb = FreeCAD.BoundBox()
+    for f in faces:
+        bb.add(f.BoundBox)
+
+    return abs(min(bb.XLength, bb.YLength, bb.ZLength))
+
+
+def faces_contour_length(faces):
+    """
+    Contour length:
+    - cylinders → perimeter 2πR
+    - planar faces → longest bbox side
+    - several faces → sum
+    - +2 mm lead-in, +2 mm lead-out
+    """
+    total = 0.0
+
+    for f in faces:
+        surf = f.Surface
+
+        if isinstance(surf, Part.Cylinder):
+            total += 2 * math.pi * surf.Radius
+            continue
+
+        bb = f.BoundBox
+        total += max(bb.XLength, bb.YLength, bb.ZLength)
+
+    if total > 0:
+        total += 4.0
+
+    return total
+
+
+def faces_area(faces):
+    """Area of the first face (0 if none)."""
+    try:
+        return float(faces[0].Area)
+    except Exception:
+        return 0.0
+
+
+def faces_hole_centers(faces):
+    """
+    Centres [x, y] of the holes among the faces: cylinders of vertical axis,
+    faces of the same hole (same axis, 0.1 mm) counted once.
+    """
+    centers = {}
+    for f in faces:
+        surf = f.Surface
+        if isinstance(surf, Part.Cylinder) and abs(abs(surf.Axis.z) - 1.0) < 1e-3:
+            c = surf.Center
+            centers.setdefault((round(c.x, 1), round(c.y, 1)), [round(c.x, 3), round(c.y, 3)])
+    return list(centers.values())
+
+
+def _xy(points):
+    return [[round(p.x, 3), round(p.y, 3)] for p in points]
+
+
+def _is_vertical_wall(face):
+    surf = face.Surface
+    if isinstance(surf, Part.Plane):
+        return abs(surf.Axis.z) < 1e-3
+    if isinstance(surf, Part.Cylinder):
+        return abs(abs(surf.Axis.z) - 1.0) < 1e-3
+    return False
+
+
+def _wall_side(face, edge, pts):
+    """
+    True if the tool stands outside the (counter-clockwise) closed profile,
+    or on the right of the open one: the face normal points to that side.
+    """
+    p = edge.valueAt(0.5 * (edge.FirstParameter + edge.LastParameter))
+    u, v = face.Surface.parameter(p)
+    n = face.normalAt(u, v)
+    # travel direction at the segment closest to p
+    i = min(range(len(pts) - 1),
+            key=lambda k: (pts[k][0] - p.x) ** 2 + (pts[k][1] - p.y) ** 2)
+    tx, ty = pts[i + 1][0] - pts[i][0], pts[i + 1][1] - pts[i][1]
+    return n.x * ty - n.y * tx > 0
+
+
+def faces_outline(faces):
+    """
+    Outline of the machined faces in the XY plane (machining axis Z), for
+    the offset-based path lengths of costing_core.offsets:
+    - horizontal planar first face (pocket floor) →
+      {"outer": [[x, y], ...], "islands": [[[x, y], ...], ...]}
+    - vertical walls (flanks) → {"profiles": [{points, closed, outside}]},
+      bottom edges chained into closed or open profiles
+    None for any other selection.
+    """
+    if not faces:
+        return None
+
+    first = faces[0]
+    if isinstance(first.Surface, Part.Plane) and abs(abs(first.Surface.Axis.z) - 1.0) < 1e-3:
+        outer = first.OuterWire
+        return {
+            "outer": _xy(outer.discretize(Deflection=OUTLINE_DEFLECTION)),
+            "islands": [_xy(w.discretize(Deflection=OUTLINE_DEFLECTION))
+                        for w in first.Wires if not w.isSame(outer)],
+        }
+
+    if not all(_is_vertical_wall(f) for f in faces):
+        return None
+    bottoms = []
+    for f in faces:
+        zmin = f.BoundBox.ZMin
+        for e in f.Edges:
+            bb = e.BoundBox
+            if bb.ZLength < 1e-3 and abs(bb.ZMin - zmin) < 1e-3:
+                bottoms.append((e, f))
+    if not bottoms:
+        return None
+
+    profiles = []
+    for group in Part.sortEdges([e for e, _ in bottoms]):
+        wire = Part.Wire(group)
+        closed = wire.isClosed()
+        pts = _xy(wire.discretize(Deflection=OUTLINE_DEFLECTION))
+        if closed and polygon_area(pts) < 0:
+            pts.reverse()
+        if len(pts) < 2:
+            continue
+        edge, face = next(((e, f) for e, f in bottoms if e.isSame(group[0])), bottoms[0])
+        profiles.append({"points": pts, "closed": closed,
+                         "outside": _wall_side(face, edge, pts)})
+    return {"profiles": profiles} if profiles else None
+
+
 # Example usage inside FreeCAD console:
 # extractor = GeometryExtractor()
 # extractor.load_part()
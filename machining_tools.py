@@ -1,46 +1,291 @@
+import contextlib
 import os
-import csv
+import weakref
 
-TOOLS = {}
+from tool_library import (
+    shared_library, open_library, library_stale, save_library, import_catalog, iter_catalog,
+)
 
-def load_tools():
-    """Charge les outils depuis tools.csv"""
-    global TOOLS
+TOOLS_CSV = os.path.join(os.path.dirname(__file__), "tools.csv")
 
-    base_dir = os.path.dirname(__file__)
-    csv_path = os.path.join(base_dir, "tools.csv")
+# Base SQLite partagée (optionnelle) : chemin via la variable d'environnement
+# PARTCOSTING_TOOLS_DB ou use_database(path). Sans base → tools.csv seul.
+TOOLS_DB = os.environ.get("PARTCOSTING_TOOLS_DB") or None
 
-    if not os.path.isfile(csv_path):
-        print(f"[PartCosting] ⚠️ tools.csv introuvable : {csv_path}")
-        return {}
+# Bibliothèque indexée (Ø, type, matière) partagée par tout le module
+# et par les dialogues (un seul parse par version de tools.csv). Lue au
+# premier accès (get_library, get_tool...), pas à l'import.
+LIBRARY = shared_library(TOOLS_CSV)
+
+# Accès nom → outil (même dict que LIBRARY.by_name, conservé pour compatibilité).
+# Pour modifier la bibliothèque, passer par add_tool / update_tool / remove_tool.
+TOOLS = LIBRARY.by_name
+
+_STORE = None          # SQLiteToolStore actif
+_STORE_VERSION = 0     # dernière version de la base appliquée à LIBRARY
+_LOADED = False        # bibliothèque lue (chargement au premier accès)
+_DIRTY = False         # modifications CSV non enregistrées dans tools.csv
+
+# Modèles Qt (ToolTableModel) branchés sur LIBRARY : réinitialisés
+# (beginResetModel / endResetModel) autour de chaque relecture complète,
+# signaux de la seule ligne touchée sinon (begin_row_change / end_row_change)
+_VIEWS = weakref.WeakSet()
+_RESETTING = 0
+
+
+def watch_library(model):
+    """Enregistre un modèle Qt à réinitialiser lors des relectures de LIBRARY."""
+    _VIEWS.add(model)
+
+
+@contextlib.contextmanager
+def _resetting():
+    """Relecture de LIBRARY : vues réinitialisées une seule fois (appels imbriqués)."""
+    global _RESETTING
+    views = list(_VIEWS) if _RESETTING == 0 else []
+    _RESETTING += 1
+    for v in views:
+        v.beginResetModel()
+    try:
+        yield
+    finally:
+        _RESETTING -= 1
+        for v in views:
+            v.endResetModel()
+
+
+@contextlib.contextmanager
+def _row_change(kind, row):
+    """Modification d'une ligne de LIBRARY ("insert", "remove", "update") : signaux de cette ligne."""
+    views = list(_VIEWS) if _RESETTING == 0 else []
+    for v in views:
+        v.begin_row_change(kind, row)
+    try:
+        yield
+    finally:
+        for v in views:
+            v.end_row_change(kind, row)
+
+
+def has_unsaved_changes():
+    """Modifications de la bibliothèque pas encore écrites dans tools.csv."""
+    return _DIRTY
+
+
+def _touch():
+    global _DIRTY
+    if _STORE is None:
+        _DIRTY = True
+
+
+def _ensure_loaded():
+    """Premier accès : lecture de la base (PARTCOSTING_TOOLS_DB) ou de tools.csv."""
+    if _LOADED:
+        return
+    if TOOLS_DB:
+        use_database(TOOLS_DB)
+    else:
+        load_tools()
+
+
+# ----------------------------------------------------------
+# Backend SQLite
+# ----------------------------------------------------------
+def use_database(path, wal=True):
+    """Bascule la bibliothèque sur une base SQLite partagée (None → retour au CSV)"""
+    global _STORE, _STORE_VERSION, _LOADED
+    from tool_store import SQLiteToolStore
+
+    _LOADED = True
+
+    if _STORE is not None:
+        _STORE.close()
+        _STORE = None
+
+    if path is None:
+        load_tools(force=True)
+        return
+
+    _STORE = SQLiteToolStore(path, wal=wal)
+
+    # Première utilisation : la base est initialisée depuis tools.csv
+    if _STORE.version() == 0 and os.path.isfile(TOOLS_CSV):
+        _STORE.import_csv(TOOLS_CSV)
 
-    with open(csv_path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f, delimiter=";")
-        for row in reader:
-            name = row["Name"]
-            try:
-                TOOLS[name] = {
-                    "name": name,
-                    "diam": float(row["Diam"]),
-                    "z": int(row["Z"]),
-                    "vc": float(row["Vc"]),
-                    "fz": float(row["Fz"]),
-                }
-            except Exception as e:
-                print(f"[PartCosting] Erreur dans tools.csv ligne {row}: {e}")
+    _STORE_VERSION, tools = _STORE.load_all()
+    with _resetting():
+        LIBRARY.clear()
+        LIBRARY.extend(tools)
 
+
+def refresh_tools():
+    """
+    Applique à LIBRARY uniquement les lignes modifiées en base par les autres
+    postes depuis la dernière synchronisation (signaux de ces lignes
+    seulement). Retourne les noms touchés.
+    """
+    global _STORE_VERSION
+    _ensure_loaded()
+    if _STORE is None or _STORE.version() == _STORE_VERSION:
+        return []
+
+    version, changed, deleted = _STORE.changes_since(_STORE_VERSION)
+    for name in deleted:
+        row = LIBRARY.row_of(name)
+        if row >= 0:
+            with _row_change("remove", row):
+                LIBRARY.remove(name)
+    for tool in changed:
+        row = LIBRARY.row_of(tool.name)
+        if row < 0:
+            with _row_change("insert", len(LIBRARY)):
+                LIBRARY.add(tool)
+        else:
+            with _row_change("update", row):
+                LIBRARY.replace(tool.name, tool)
+    _STORE_VERSION = version
+    return [t.name for t in changed] + deleted
+
+
+def _persist(write):
+    """Écrit en base (si active) ; si personne d'autre n'a écrit entre-temps,
+    la version locale avance sans relecture."""
+    global _STORE_VERSION
+    if _STORE is None:
+        return
+    version = write(_STORE)
+    if version == _STORE_VERSION + 1:
+        _STORE_VERSION = version
+
+
+# ----------------------------------------------------------
+# Chargement / sauvegarde
+# ----------------------------------------------------------
+def load_tools(force=False):
+    """
+    Charge les outils depuis tools.csv (relu seulement s'il a changé, ou si
+    force). Sans force, un tools.csv modifié sur disque n'écrase pas des
+    modifications non enregistrées (has_unsaved_changes).
+    """
+    global _STORE_VERSION, _LOADED, _DIRTY
+    if not _LOADED and TOOLS_DB and _STORE is None:
+        _ensure_loaded()  # base configurée : premier chargement depuis la base
+        return TOOLS
+    _LOADED = True
+    if _STORE is not None:
+        if force:
+            _STORE_VERSION, tools = _STORE.load_all()
+            with _resetting():
+                LIBRARY.clear()
+                LIBRARY.extend(tools)
+        else:
+            refresh_tools()
+        return TOOLS
+
+    if not os.path.isfile(TOOLS_CSV):
+        print(f"[PartCosting] ⚠️ tools.csv introuvable : {TOOLS_CSV}")
+        return {}
+
+    if force or (not _DIRTY and library_stale(TOOLS_CSV)):
+        with _resetting():
+            open_library(TOOLS_CSV, force=True)
+        _DIRTY = False
     return TOOLS
 
 
+def save_tools():
+    """Écrit tools.csv depuis la bibliothèque (écriture atomique)"""
+    global _DIRTY
+    _ensure_loaded()  # jamais d'écriture d'une bibliothèque non lue
+    save_library(TOOLS_CSV)
+    _DIRTY = False
+
+
+def import_tools(path, columns=None, delimiter=None):
+    """Importe un CSV / catalogue fournisseur dans la bibliothèque (et la base)"""
+    _ensure_loaded()
+    if _STORE is None:
+        _touch()
+        with _resetting():
+            return import_catalog(LIBRARY, path, columns, delimiter)
+
+    tools = list(iter_catalog(path, columns, delimiter))
+    _persist(lambda store: store.upsert_many(tools))
+    with _resetting():
+        LIBRARY.extend(tools)
+    return len(tools)
+
+
+# ----------------------------------------------------------
+# Modifications ligne par ligne
+# ----------------------------------------------------------
+# Vérification, puis écriture en base (transaction validée), puis seulement
+# LIBRARY et les vues : une écriture refusée (base verrouillée, disque
+# plein) laisse la bibliothèque telle qu'elle est en base.
+def add_tool(tool):
+    _ensure_loaded()
+    if not tool.name or tool.name in LIBRARY:
+        raise ValueError(f"Nom d'outil invalide ou déjà existant : {tool.name!r}")
+    _persist(lambda store: store.upsert(tool))
+    with _row_change("insert", len(LIBRARY)):
+        LIBRARY.add(tool)
+    _touch()
+
+
+def update_tool(name, tool):
+    """Remplace l'outil `name` ; retourne sa ligne"""
+    _ensure_loaded()
+    row = LIBRARY.row_of(name)
+    if row < 0:
+        raise KeyError(name)
+    if tool.name != name and tool.name in LIBRARY:
+        raise ValueError(f"Outil déjà existant : {tool.name}")
+    if tool.name == name:
+        _persist(lambda store: store.upsert(tool))
+    else:
+        _persist(lambda store: store.rename(name, tool))
+    with _row_change("update", row):
+        LIBRARY.replace(name, tool)
+    _touch()
+    return row
+
+
+def remove_tool(name):
+    """Supprime l'outil `name` ; retourne sa ligne"""
+    _ensure_loaded()
+    row = LIBRARY.row_of(name)
+    if row < 0:
+        raise KeyError(name)
+    _persist(lambda store: store.delete(name))
+    with _row_change("remove", row):
+        LIBRARY.remove(name)
+    _touch()
+    return row
+
+
+# ----------------------------------------------------------
+# Accès
+# ----------------------------------------------------------
+def get_library():
+    """Bibliothèque à jour (relit tools.csv / la base uniquement si modifiés)"""
+    load_tools()
+    return LIBRARY
+
+
 def get_tool(name):
     """Retourne un outil par son nom"""
+    _ensure_loaded()
     return TOOLS.get(name)
 
 
 def get_all_tool_names():
-    """Retourne la liste des outils"""
-    return list(TOOLS.keys())
+    """Retourne les noms des outils (tuple mis en cache, pas de copie)"""
+    _ensure_loaded()
+    return LIBRARY.names()
+
 
+def find_tools(diam_min=None, diam_max=None, type=None, material=None, z_min=None):
+    """Recherche par plage de Ø (+ type / matière / Z mini), triée par Ø"""
+    _ensure_loaded()
+    return LIBRARY.find(diam_min, diam_max, type=type, material=material, z_min=z_min)
 
-# Chargement automatique au démarrage
-load_tools()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+mass_properties.py — Propriétés de masse des solides du document
+
+Pour chaque objet solide du document : volume, surface, centre de masse
+et masse dans toutes les matières de MATERIALS (un seul calcul
+géométrique, les masses ne sont qu'un produit volume × densité).
+
+Les résultats sont mis en cache par empreinte de shape (hashCode de la
+TopoDS_Shape + nombre de sous-éléments + bbox) : changer de matière ou
+recliquer ne relance aucun calcul OCC ; seul un objet modifié (nouvelle
+shape) est recalculé. Les shapes manquantes sont calculées l'une après
+l'autre : les appels OCC gardent le GIL (des threads n'apporteraient
+rien) et ne sont pas sûrs en parallèle dans un même processus.
+
+    engine = get_engine()
+    props = engine.document_properties(doc)     # {Name: MassProperties}
+    props["Body"].mass_kg("Aluminium")
+
+Module indépendant de FreeCAD (n'utilise que les attributs des shapes).
+"""
+
+from collections import OrderedDict
+
+from materials import MATERIALS, density
+
+
+# Nombre d'entrées gardées en cache (anciennes shapes éliminées en premier)
+CACHE_SIZE = 4096
+
+MM3_TO_DM3 = 1e-6
+
+
+# ======================================================================
+#  PROPRIÉTÉS D'UNE SHAPE
+# ======================================================================
+
+class MassProperties:
+    """Volume (mm³), surface (mm²), centre de masse (mm) d'une shape."""
+
+    __slots__ = ("volume_mm3", "area_mm2", "center", "solids")
+
+    def __init__(self, volume_mm3, area_mm2, center, solids=1):
+        self.volume_mm3 = volume_mm3
+        self.area_mm2 = area_mm2
+        self.center = tuple(center)
+        self.solids = solids
+
+    def mass_kg(self, material):
+        return self.volume_mm3 * MM3_TO_DM3 * density(material)
+
+    def masses(self):
+        """{matière: masse (kg)} pour toutes les matières de MATERIALS."""
+        v = self.volume_mm3 * MM3_TO_DM3
+        return {name: v * rho for name, rho in MATERIALS.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["volume_mm3"], data["area_mm2"], data["center"], data.get("solids", 1))
+
+    def as_dict(self):
+        return {
+            "volume_mm3": self.volume_mm3,
+            "area_mm2": self.area_mm2,
+            "center": self.center,
+            "solids": self.solids,
+            "masses_kg": self.masses(),
+        }
+
+
+def shape_fingerprint(shape):
+    """
+    Clé de cache d'une shape : identique tant que l'objet n'est pas
+    recalculé (même TopoDS_Shape), différente dès que sa géométrie change.
+    """
+    bb = shape.BoundBox
+    return (
+        shape.hashCode(),
+        len(shape.Solids), len(shape.Faces), len(shape.Vertexes),
+        round(bb.XMin, 6), round(bb.YMin, 6), round(bb.ZMin, 6),
+        round(bb.XMax, 6), round(bb.YMax, 6), round(bb.ZMax, 6),
+    )
+
+
+def compute_mass_properties(shape):
+    """Calcul OCC (volume, surface, centre de masse) pondéré sur les solides."""
+    solids = shape.Solids or [shape]
+    volume = 0.0
+    cx = cy = cz = 0.0
+    for s in solids:
+        v = s.Volume
+        c = s.CenterOfMass
+        volume += v
+        cx += c.x * v
+        cy += c.y * v
+        cz += c.z * v
+    if volume > 0:
+        center = (cx / volume, cy / volume, cz / volume)
+    else:
+        c = shape.BoundBox.Center
+        center = (c.x, c.y, c.z)
+    return MassProperties(volume, shape.Area, center, len(shape.Solids))
+
+
+# ======================================================================
+#  MOTEUR AVEC CACHE
+# ======================================================================
+
+class MassEngine:
+    """Propriétés de masse mises en cache par empreinte de shape."""
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.stats = {"hits": 0, "computed": 0}
+
+    def clear(self):
+        self._cache.clear()
+
+    def _store(self, key, props):
+        self._cache[key] = props
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _lookup(self, key):
+        props = self._cache.get(key)
+        if props is not None:
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+        return props
+
+    def properties(self, shape):
+        key = shape_fingerprint(shape)
+        props = self._lookup(key)
+        if props is None:
+            props = compute_mass_properties(shape)
+            self.stats["computed"] += 1
+            self._store(key, props)
+        return props
+
+    def many(self, shapes):
+        """
+        Propriétés d'une liste de shapes (même ordre) ; chaque shape absente
+        du cache est calculée une seule fois, même si elle apparaît plusieurs fois.
+        """
+        keys = [shape_fingerprint(s) for s in shapes]
+        out = [self._lookup(k) for k in keys]
+
+        missing = {}
+        for i, (key, props) in enumerate(zip(keys, out)):
+            if props is None:
+                missing.setdefault(key, []).append(i)
+        if not missing:
+            return out
+
+        results = [compute_mass_properties(shapes[idx[0]]) for idx in missing.values()]
+
+        for (key, idx), props in zip(missing.items(), results):
+            self._store(key, props)
+            for i in idx:
+                out[i] = props
+        self.stats["computed"] += len(results)
+        return out
+
+    def document_properties(self, doc):
+        """{Name: MassProperties} de tous les objets solides du document."""
+        objs = [o for o in doc.Objects if _is_solid_object(o)]
+        return dict(zip((o.Name for o in objs), self.many([o.Shape for o in objs])))
+
+
+def _is_solid_object(obj):
+    shape = getattr(obj, "Shape", None)
+    return shape is not None and not shape.isNull() and bool(shape.Solids)
+
+
+# ======================================================================
+#  MOTEUR PARTAGÉ
+# ======================================================================
+
+_ENGINE = None
+
+
+def get_engine():
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = MassEngine()
+    return _ENGINE
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+materials.py — Matières usinées (partagé par le panneau et le catalogue bruts)
+"""
+
+# ======================================================================
+#  CONSTANTES MATIÈRES (densités kg/dm3)
+# ======================================================================
+
+MATERIALS = {
+    "Acier": 7.85,
+    "Aluminium": 2.70,
+    "Inox": 8.00,
+    "Fonte": 7.00,
+    "Laiton": 8.40,
+}
+
+
+def density(material, default=7.85):
+    """Densité (kg/dm3) d'une matière, insensible à la casse."""
+    key = (material or "").strip().lower()
+    for name, rho in MATERIALS.items():
+        if name.lower() == key:
+            return rho
+    return default
@@ -2,6 +2,9 @@ import FreeCAD
 import Part
 import math
 
+from costing_core import topology
+from tracing import traced
+
 # Axes
 XAXIS = FreeCAD.Vector(1, 0, 0)
 YAXIS = FreeCAD.Vector(0, 1, 0)
@@ -10,6 +13,7 @@ ZAXIS = FreeCAD.Vector(0, 0, 1)
 TOL_DIR = 0.1
 TOL_DIST = 0.5
 TOL_RADIUS = 0.2
+TOL_CONVEX = 0.05   # |n·d| en dessous : faces tangentes à l'arête (≈ 3°)
 
 
 # ─────────────────────────────────────────────────────────────
@@ -42,6 +46,7 @@ class PlaneFeature:
         self.kind = kind
 
 
+@traced("features")
 def detect_horizontal_planes(shape):
     planes = {}
     for face in shape.Faces:
@@ -73,6 +78,7 @@ class VerticalFlank:
         self.area = area
 
 
+@traced("features")
 def detect_vertical_flanks(shape):
     clusters = []
 
@@ -108,6 +114,7 @@ class CylindricalHole:
         self.kind = kind
 
 
+@traced("features")
 def detect_cylindrical_holes(shape):
     raw = []
 
@@ -190,26 +197,183 @@ def detect_cylindrical_holes(shape):
     return holes
 
 
+# ─────────────────────────────────────────────────────────────
+#  GRAPHE D'ADJACENCE DES FACES (costing_core.topology)
+# ─────────────────────────────────────────────────────────────
+
+def _face_kind(face):
+    """(type topology, direction de la normale en degrés) d'une face."""
+    surf = face.Surface
+    if isinstance(surf, Part.Plane):
+        n = face.normalAt(0.5, 0.5)
+        if is_horizontal(n):
+            return (topology.FLOOR if n.z > 0 else topology.CEILING), topology.NO_DIRECTION
+        if abs(n.z) <= TOL_DIR:
+            return topology.WALL, round(math.degrees(math.atan2(n.y, n.x))) % 360
+    elif isinstance(surf, Part.Cylinder) and is_parallel(surf.Axis, ZAXIS):
+        return topology.WALL_CYL, topology.NO_DIRECTION
+    return topology.OTHER, topology.NO_DIRECTION
+
+
+def _edge_side(face, edge):
+    """
+    (normale de la face, direction vers l'intérieur de la face) au milieu
+    de l'arête : la matière de la face est à gauche de l'arête orientée,
+    vue du côté de la normale.
+    """
+    u = 0.5 * (edge.FirstParameter + edge.LastParameter)
+    p = edge.valueAt(u)
+    t = edge.tangentAt(u)
+    if edge.Orientation == "Reversed":
+        t = -t
+    n = face.normalAt(*face.Surface.parameter(p))
+    return n, n.cross(t)
+
+
+def _convexity(na, da, nb, db):
+    """Convexité de l'arête : la face b monte-t-elle au-dessus de la face a ?"""
+    s = 0.5 * (na.dot(db) + nb.dot(da))
+    if s > TOL_CONVEX:
+        return topology.CONCAVE
+    if s < -TOL_CONVEX:
+        return topology.CONVEX
+    return topology.SMOOTH
+
+
+@traced("features")
+def build_face_graph(shape):
+    """
+    FaceGraph de la shape (indices de shape.Faces), construit en une passe
+    sur les arêtes des faces : table arête → faces, puis convexité de
+    chaque arête partagée par deux faces. Les arêtes de couture (même face
+    des deux côtés), libres ou non-manifold sont ignorées.
+    """
+    kinds, directions = [], []
+    sides = {}  # arête → [(face, normale, direction intérieure)]
+    for i, face in enumerate(shape.Faces):
+        kind, direction = _face_kind(face)
+        kinds.append(kind)
+        directions.append(direction)
+        for edge in face.Edges:
+            try:
+                n, d = _edge_side(face, edge)
+            except Exception:
+                continue  # arête dégénérée (pointe de cône...)
+            sides.setdefault(edge.hashCode(), []).append((i, n, d))
+
+    pairs = []
+    for s in sides.values():
+        if len(s) != 2 or s[0][0] == s[1][0]:
+            continue
+        (a, na, da), (b, nb, db) = s
+        pairs.append((a, b, _convexity(na, da, nb, db)))
+    return topology.FaceGraph(kinds, directions, pairs)
+
+
+# ─────────────────────────────────────────────────────────────
+#  DETECTION POCHES / RAINURES / ÉPAULEMENTS (graphe)
+# ─────────────────────────────────────────────────────────────
+
+class RecessFeature:
+    def __init__(self, floors, walls, kind, z, depth):
+        self.floors = floors
+        self.walls = walls
+        self.kind = kind      # pocket / slot / step / counterbore
+        self.z = z            # niveau du fond
+        self.depth = depth    # hauteur des parois au-dessus du fond
+
+
+@traced("features")
+def detect_recesses(shape, graph=None):
+    """Formes en creux reconnues sur le graphe d'adjacence (topology.recesses)."""
+    if graph is None:
+        graph = build_face_graph(shape)
+    all_faces = shape.Faces
+
+    out = []
+    for r in topology.recesses(graph):
+        floors = [all_faces[i] for i in r["floors"]]
+        walls = [all_faces[i] for i in r["walls"]]
+        z = max(f.BoundBox.ZMax for f in floors)
+        top = max(w.BoundBox.ZMax for w in walls)
+        out.append(RecessFeature(floors, walls, r["kind"], round(z, 3), round(top - z, 3)))
+    return out
+
+
 # ─────────────────────────────────────────────────────────────
 #  STRUCTURE DE RESULTATS
 # ─────────────────────────────────────────────────────────────
 
 class MillingFeatures:
-    def __init__(self, planes, flanks, holes):
+    def __init__(self, planes, flanks, holes, recesses=()):
         self.planes = planes
         self.flanks = flanks
         self.holes = holes
+        self.recesses = list(recesses)
 
 
 # ─────────────────────────────────────────────────────────────
 #  FONCTION PRINCIPALE
 # ─────────────────────────────────────────────────────────────
 
+@traced("features")
 def detect_milling_features(shape):
     planes = detect_horizontal_planes(shape)
     flanks = detect_vertical_flanks(shape)
     holes = detect_cylindrical_holes(shape)
-    return MillingFeatures(planes, flanks, holes)
+    recesses = detect_recesses(shape)
+    return MillingFeatures(planes, flanks, holes, recesses)
+
+
+# ─────────────────────────────────────────────────────────────
+#  SÉRIALISATION (analysis_store) : faces par indice
+# ─────────────────────────────────────────────────────────────
+
+def features_to_dict(features, shape):
+    """Features → dict JSON ; les faces sont remplacées par leur indice dans shape.Faces."""
+    index = {f.hashCode(): i for i, f in enumerate(shape.Faces)}
+
+    def ids(faces):
+        return [index[f.hashCode()] for f in faces]
+
+    return {
+        "planes": [
+            {"faces": ids(p.faces), "z": p.z, "area": p.area, "kind": p.kind}
+            for p in features.planes
+        ],
+        "flanks": [
+            {"faces": ids(f.faces), "normal": [f.normal.x, f.normal.y, f.normal.z], "area": f.area}
+            for f in features.flanks
+        ],
+        "holes": [
+            {"faces": ids(h.faces), "center": [h.center.x, h.center.y, h.center.z],
+             "radius": h.radius, "ztop": h.ztop, "zbottom": h.zbottom, "kind": h.kind}
+            for h in features.holes
+        ],
+        "recesses": [
+            {"floors": ids(r.floors), "walls": ids(r.walls), "kind": r.kind,
+             "z": r.z, "depth": r.depth}
+            for r in features.recesses
+        ],
+    }
+
+
+def features_from_dict(data, shape):
+    """Inverse de features_to_dict, sans aucune requête géométrique."""
+    all_faces = shape.Faces
+
+    def faces(ids):
+        return [all_faces[i] for i in ids]
+
+    return MillingFeatures(
+        [PlaneFeature(faces(p["faces"]), p["z"], p["area"], p["kind"]) for p in data["planes"]],
+        [VerticalFlank(faces(f["faces"]), FreeCAD.Vector(*f["normal"]), f["area"])
+         for f in data["flanks"]],
+        [CylindricalHole(faces(h["faces"]), FreeCAD.Vector(*h["center"]), h["radius"],
+                         h["ztop"], h["zbottom"], h["kind"]) for h in data["holes"]],
+        [RecessFeature(faces(r["floors"]), faces(r["walls"]), r["kind"], r["z"], r["depth"])
+         for r in data["recesses"]],
+    )
 
 
 # ─────────────────────────────────────────────────────────────
@@ -251,6 +415,7 @@ def debug_detect_features():
     print("Faces planes horizontales :", len(feats.planes))
     print("Flancs verticaux regroupés :", len(feats.flanks))
     print("Trous cylindriques verticaux :", len(feats.holes))
+    print("Poches / rainures / épaulements :", len(feats.recesses))
     print("Chanfreins détectés : ignorés pour les trous\n")
 
     # Plans
@@ -261,3 +426,8 @@ def debug_detect_features():
     for i, h in enumerate(feats.holes, 1):
         print(f"[Trou {i}] Ø={2*h.radius} mm, XY=({h.center.x},{h.center.y}), "
               f"Ztop={h.ztop}, Zbottom={h.zbottom}, type={h.kind}")
+
+    # Poches / rainures
+    for i, r in enumerate(feats.recesses, 1):
+        print(f"[Creux {i}] type={r.kind}, Z fond={r.z}, profondeur={r.depth}, "
+              f"{len(r.floors)} fond(s), {len(r.walls)} paroi(s)")
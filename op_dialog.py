@@ -1,69 +1,16 @@
 # -*- coding: utf-8 -*-
-import FreeCAD
 import FreeCADGui
 import Part
 from PySide2 import QtWidgets, QtCore
 
-import os
-import csv
-from machining_tools import get_all_tool_names, get_tool
-
-
-# ---------------------------------------------------------------------------
-# Gestion de la bibliothèque d'outils (tools.csv)
-# ---------------------------------------------------------------------------
-
-TOOLS_CSV = os.path.join(os.path.dirname(__file__), "tools.csv")
-
-
-def _parse_float(text, default=0.0):
-    """Convertit une chaîne en float, en acceptant les virgules."""
-    if text is None:
-        return default
-    s = str(text).strip()
-    if not s:
-        return default
-    s = s.replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        return default
-
-
-def load_tool_library():
-    """Lit tools.csv et renvoie une liste de dicts outils.
-
-    Chaque dict contient au minimum :
-      - name
-      - diam
-      - z_teeth
-      - vc
-      - fz
-    """
-    tools = []
-
-    if not os.path.isfile(TOOLS_CSV):
-        return tools
-
-    with open(TOOLS_CSV, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f, delimiter=";")
-        for row in reader:
-            name = (row.get("name") or "").strip()
-            if not name:
-                continue
-
-            tool = {
-                "name": name,
-                "diam": _parse_float(row.get("diam")),
-                "z_teeth": int(_parse_float(row.get("z_teeth"), 0)),
-                "vc": _parse_float(row.get("vc")),
-                "fz": _parse_float(row.get("fz")),
-            }
-            tools.append(tool)
-
-    return tools
+from cost_graph import compute_operation
+from machining_tools import get_library
+from geometry import faces_depth, faces_contour_length, faces_area, faces_outline, faces_hole_centers
+from tracing import span
 
 
+# Délai d'anti-rebond du calcul en direct (ms)
+PREVIEW_DELAY_MS = 250
 
 
 class OperationDialog(QtWidgets.QDialog):
@@ -74,8 +21,15 @@ class OperationDialog(QtWidgets.QDialog):
         self.setWindowTitle("Part Costing Pro — Nouvelle opération")
         self.resize(950, 650)
 
-        # Faces sélectionnées FreeCAD
+        # Faces sélectionnées FreeCAD (+ liens (objet, ["FaceN", ...]))
         self._faces = []
+        self._links = []
+        # Grandeurs issues des faces, calculées une fois par sélection
+        self._geometry = {"depth": 0.0, "area": 0.0, "length": 0.0, "outline": None, "holes": []}
+
+        # Opération calculée, lue par le panneau après OK
+        # {type, time_h, source, tool}
+        self.operation = None
 
         # ----- WIDGETS -----
         self.layout = QtWidgets.QVBoxLayout(self)
@@ -99,7 +53,8 @@ class OperationDialog(QtWidgets.QDialog):
         lay_kind = QtWidgets.QHBoxLayout(box_kind)
 
         self.cmb_kind = QtWidgets.QComboBox()
-        self.cmb_kind.addItems(["Face (Surfaçage)", "Profil (Contournage)", "Poche (Ébauche)"])
+        self.cmb_kind.addItems(["Face (Surfaçage)", "Profil (Contournage)", "Poche (Ébauche)",
+                                "Perçage (cycle)"])
         lay_kind.addWidget(self.cmb_kind)
 
         # Bloc Outil
@@ -176,6 +131,10 @@ class OperationDialog(QtWidgets.QDialog):
         self.rb_chip.setChecked(True)
         lay_mode.addWidget(self.rb_chip)
 
+        self.chk_live = QtWidgets.QCheckBox("Calcul en direct")
+        self.chk_live.setToolTip("Recalcule le temps à chaque modification d'un paramètre.")
+        lay_mode.addWidget(self.chk_live)
+
         # Bouton calcul
         self.btn_compute = QtWidgets.QPushButton("Calculer le temps")
         self.btn_compute.clicked.connect(self.compute_time)
@@ -190,304 +149,314 @@ class OperationDialog(QtWidgets.QDialog):
         self.layout.addLayout(lay_bottom)
 
         self.btn_ok = QtWidgets.QPushButton("OK")
+        self.btn_ok.clicked.connect(self.on_ok)
         lay_bottom.addWidget(self.btn_ok)
 
         self.btn_cancel = QtWidgets.QPushButton("Annuler")
+        self.btn_cancel.clicked.connect(self.reject)
         lay_bottom.addWidget(self.btn_cancel)
 
-        # CHARGE LES OUTILS
-        from machining_tools import get_all_tool_names, get_tool
-
-        tool_names = get_all_tool_names()
-        self.cmb_tool.addItems(tool_names)
-
-        # Optionnel si ton code utilise self.tools :
-        self.tools = [get_tool(name) for name in tool_names]
+        # CHARGE LES OUTILS (bibliothèque partagée, pas de relecture du CSV)
+        self.library = get_library()
+        self.cmb_tool.addItems(list(self.library.names()))
+
+        # Calcul en direct : relancé PREVIEW_DELAY_MS après la dernière frappe,
+        # exécuté sur le QThreadPool ; seul le dernier lancement est affiché
+        self._preview_generation = 0
+        self._preview_signals = _PreviewSignals(self)
+        self._preview_signals.done.connect(self._on_preview_done)
+        self._preview_timer = QtCore.QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self._preview_timer.timeout.connect(self._start_preview)
+
+        for edit in (self.ed_diam, self.ed_z, self.ed_vc, self.ed_fz,
+                     self.ed_ae_percent, self.ed_ap, self.ed_z_plus,
+                     self.ed_xy_surplus, self.ed_depth_total):
+            edit.textChanged.connect(self.on_inputs_changed)
+        self.cmb_kind.currentIndexChanged.connect(self.on_inputs_changed)
+        self.cmb_tool.currentIndexChanged.connect(self.on_inputs_changed)
+        self.chk_live.toggled.connect(self.on_live_toggled)
 
     # ------------------------------------------------------------------
     # Quand l'utilisateur change d'outil dans la combo
     # ------------------------------------------------------------------
     def on_tool_changed(self, index):
         """Met à jour les champs de coupe selon l'outil choisi."""
-        if not hasattr(self, "tools"):
+        if not hasattr(self, "library"):
             return
-        if index < 0 or index >= len(self.tools):
+        if index < 0 or index >= len(self.library):
             return
 
-        tool = self.tools[index]
+        tool = self.library.at(index)
 
         # Remplissage des champs Ø, Z, Vc, Fz
-        self.ed_diam.setText(f"{tool['diam']:.3f}")
-        self.ed_z.setText(str(tool["z"]))
-        self.ed_vc.setText(f"{tool['vc']:.1f}")
-        self.ed_fz.setText(f"{tool['fz']:.3f}")
+        self.ed_diam.setText(f"{tool.diam:.3f}")
+        self.ed_z.setText(str(tool.z))
+        self.ed_vc.setText(f"{tool.vc:.1f}")
+        self.ed_fz.setText(f"{tool.fz:.3f}")
 
     # ------------------------------------------------------------
-    # Lecture des faces FreeCAD sélectionnées
+    # Validation : calcule si besoin puis renvoie l'opération au panneau
     # ------------------------------------------------------------
-    def read_selection(self):
-        """Lit la sélection FreeCAD et extrait les faces correctement."""
-        sel = FreeCADGui.Selection.getSelectionEx()
-
-        self._faces = []
-        labels = []
-
-        for s in sel:
-            if not hasattr(s, "SubObjects"):
-                continue
-
-            for so in s.SubObjects:
-                # On ne garde que les faces
-                if isinstance(so, Part.Face):
-                    self._faces.append(so)
-                    labels.append(so.Label if hasattr(so, "Label") else so.__repr__())
-
-        # Affichage texte
-        if labels:
-            self.ed_faces.setText(", ".join(labels))
-        else:
-            self.ed_faces.setText("Aucune face sélectionnée")
-
-    # ------------------------------------------------------------
-    # Correction automatique de l’orientation
-    # ------------------------------------------------------------
-    def _get_orientation_axes(self, face):
-        """
-        Retourne (X, Y, Z) = dimensions de la bounding box de la face.
-        Sert à détecter la plus petite dimension (épaisseur).
-        """
-        bb = face.BoundBox
-        return bb.XLength, bb.YLength, bb.ZLength
-
-    def _get_part_orientation_factor(self):
-        """
-        Si Z géométrique ≠ Z usinage, renvoie un facteur 1 ou -1 pour corriger.
-        Si la pièce est couchée, on l'interprète comme redressée.
-        """
-        if not self._faces:
-            return 1
-
-        # On prend la 1ère face pour déterminer l’orientation
-        face = self._faces[0]
-        dims = self._get_orientation_axes(face)
-
-        # axe le plus petit → direction Z usinage
-        smallest = min(dims)
-
-        if smallest == dims[2]:
-            return 1  # Z déjà correct
-        else:
-            return -1  # pièce couchée → on inverse profondeur Z
+    def on_ok(self):
+        if self.operation is None:
+            self.compute_time()
+        if self.operation is None:
+            return
+        self.accept()
+
+    def _set_operation(self, op_type, time_min, params, geometry=None):
+        self.operation = {
+            "type": op_type,
+            "time_h": time_min / 60.0,
+            "source": "Débit copeaux",
+            "tool": self.cmb_tool.currentText(),
+            # pour créer l'objet opération persistant (op_feature)
+            "params": params,
+            "links": list(self._links),
+            # grandeurs mesurées sur les faces (reprises par le graphe de chiffrage)
+            "geometry": geometry or {},
+        }
 
     # ------------------------------------------------------------
-    # Détection profondeur réelle (orientée)
+    # Lecture des faces FreeCAD sélectionnées
     # ------------------------------------------------------------
-    def _get_real_depth(self):
-        """
-        La profondeur réelle = plus petite dimension de la bounding box
-        des faces sélectionnées.
-        Orientation : si la pièce est couchée, on réinterprète l’axe Z.
-        """
-        if not self._faces:
-            return 0.0
-
-        bb_min = FreeCAD.Vector( 1e9,  1e9,  1e9)
-        bb_max = FreeCAD.Vector(-1e9, -1e9, -1e9)
-
-        # bounding box globale des faces
-        for f in self._faces:
-            bb = f.BoundBox
-            bb_min.x = min(bb_min.x, bb.XMin)
-            bb_min.y = min(bb_min.y, bb.YMin)
-            bb_min.z = min(bb_min.z, bb.ZMin)
-            bb_max.x = max(bb_max.x, bb.XMax)
-            bb_max.y = max(bb_max.y, bb.YMax)
-            bb_max.z = max(bb_max.z, bb.ZMax)
-
-        Lx = bb_max.x - bb_min.x
-        Ly = bb_max.y - bb_min.y
-        Lz = bb_max.z - bb_min.z
-
-        # profondeur = plus petite dimension (axe d’usinage)
-        depth = min(Lx, Ly, Lz)
-
-        return abs(depth)
+    def read_selection(self):
+        """Lit la sélection FreeCAD et extrait les faces correctement."""
+        with span("OperationDialog.read_selection", "ui"):
+            sel = FreeCADGui.Selection.getSelectionEx()
+
+            self._faces = []
+            self._links = []
+            labels = []
+
+            for s in sel:
+                if not hasattr(s, "SubObjects"):
+                    continue
+
+                sub_names = []
+                for sub_name, so in zip(s.SubElementNames, s.SubObjects):
+                    # On ne garde que les faces
+                    if isinstance(so, Part.Face):
+                        self._faces.append(so)
+                        sub_names.append(sub_name)
+                        labels.append(f"{s.Object.Label}.{sub_name}")
+
+                if sub_names:
+                    self._links.append((s.Object, sub_names))
+
+            # Affichage texte
+            if labels:
+                self.ed_faces.setText(", ".join(labels))
+            else:
+                self.ed_faces.setText("Aucune face sélectionnée")
+
+            # Requêtes géométriques faites une seule fois pour cette sélection
+            self._geometry = {
+                "depth": faces_depth(self._faces),
+                "area": faces_area(self._faces),
+                "length": faces_contour_length(self._faces),
+                "outline": faces_outline(self._faces),
+                "holes": faces_hole_centers(self._faces),
+            }
+            self.on_inputs_changed()
 
     # ------------------------------------------------------------
-    # Longueur contour — compatible cylindres + faces planes
+    # CALCUL TEMPS PRINCIPAL
     # ------------------------------------------------------------
-    def _get_contour_length(self):
+    def _read_inputs(self):
         """
-        Contournage :
-        - Cylindres → périmètre = 2πR
-        - Faces planes → longueur = max(X,Y) + marge
-        - Multi-faces → somme
-        - +2mm entrée +2mm sortie (per Cédric)
+        Lit les champs du dialogue (thread GUI).
+        Lève ValueError avec un message si un paramètre obligatoire est invalide.
         """
-
-        total = 0.0
-
-        for f in self._faces:
-            surf = f.Surface
-
-            # ---- CAS CYLINDRE ----
-            if isinstance(surf, Part.Cylinder):
-                R = surf.Radius
-                total += (2 * math.pi * R)
-                continue
-
-            # ---- CAS FACE PLANE ----
-            bb = f.BoundBox
-            dims = sorted([bb.XLength, bb.YLength, bb.ZLength])
-            longest = dims[-1]      # contour = côté le plus long
-            total += longest
-
-        # Ajout entrée + sortie
-        if total > 0:
-            total += 4.0  # +2 mm +2 mm
-
-        return total
-
-    # ------------------------------------------------------------
-    # Surface utile pour surfaçage ou poche
-    # ------------------------------------------------------------
-    def _get_face_area(self):
-        """Utilise Area de la 1ère face."""
-        try:
-            return float(self._faces[0].Area)
-        except:
-            return 0.0
-
-    # ------------------------------------------------------------
-    # CALCUL TEMPS PRINCIPAL
-    # ------------------------------------------------------------
-    def compute_time(self):
-        if not self._faces:
-            QtWidgets.QMessageBox.warning(self, "Erreur", "Aucune face sélectionnée.")
-            return
-
-        # Lecture type opération
         kind = self.cmb_kind.currentText().lower()
+        if "face" in kind:
+            op_type = "Surfaçage"
+        elif "profil" in kind:
+            op_type = "Contournage"
+        elif "perçage" in kind:
+            op_type = "Perçage"
+        else:
+            op_type = "Poche"
 
-        # Lecture outil
         try:
-            diam = float(self.ed_diam.text())
-            z_teeth = int(self.ed_z.text())
-            vc = float(self.ed_vc.text())
-            fz = float(self.ed_fz.text())
-        except:
-            QtWidgets.QMessageBox.warning(self, "Erreur", "Paramètres outil invalides.")
-            return
+            tool = (
+                float(self.ed_diam.text()),
+                int(self.ed_z.text()),
+                float(self.ed_vc.text()),
+                float(self.ed_fz.text()),
+            )
+        except ValueError:
+            raise ValueError("Paramètres outil invalides.")
 
-               # Conditions coupe
-        # Ae% et Ap sont obligatoires, Z+ et XY optionnels
+        # Ae% et Ap sont obligatoires, Z+, XY et profondeur optionnels
         try:
             ae_pct = float(self.ed_ae_percent.text())
             ap_max = float(self.ed_ap.text())
-        except Exception:
-            QtWidgets.QMessageBox.warning(self, "Erreur", "Paramètres coupe invalides (Ae% ou Ap).")
-            return
-
-        # Surépaisseur Z+ brut (optionnelle)
-        txt_z_plus = self.ed_z_plus.text().strip()
-        try:
-            z_plus = float(txt_z_plus) if txt_z_plus else 0.0
-        except Exception:
-            z_plus = 0.0
+        except ValueError:
+            raise ValueError("Paramètres coupe invalides (Ae% ou Ap).")
+
+        cutting = {
+            "ae_pct": ae_pct,
+            "ap_max": ap_max,
+            "z_plus": _optional_float(self.ed_z_plus),
+            "xy_surplus": _optional_float(self.ed_xy_surplus),
+            "depth_user": _optional_float(self.ed_depth_total),
+        }
+        return op_type, tool, cutting
 
-        # Surépaisseur XY brut (optionnelle)
-        txt_xy = self.ed_xy_surplus.text().strip()
-        try:
-            xy_surplus = float(txt_xy) if txt_xy else 0.0
-        except Exception:
-            xy_surplus = 0.0
-
-
-        # Calcul Ae réel
-        ae_mm = (ae_pct / 100.0) * diam
-        self.ed_ae.setText(f"{ae_mm:.3f}")
-
-        # Vitesse d’avance
-        rpm = (1000 * vc) / (math.pi * diam)
-        vf_mm_min = machining.calc_feed_mm_min(z_teeth, fz, rpm)
-        if vf_mm_min <= 0:
-            QtWidgets.QMessageBox.warning(self, "Erreur", "Impossible de calculer l'avance Vf.")
-            return
-
-        # Profondeur totale
-        try:
-            depth_user = float(self.ed_depth_total.text())
-        except:
-            depth_user = 0.0
-
-        depth_auto = self._get_real_depth()
-
-        depth_total = depth_user if depth_user > 0 else depth_auto
-        depth_total += abs(z_plus)  # surépaisseur Z+
-
-        # ---------------------------
-        # SURFACAGE
-        # ---------------------------
-        if "face" in kind:
-            area = self._get_face_area()
+    def compute_time(self):
+        """Calcul immédiat (bouton / OK) : erreurs affichées en boîte de dialogue."""
+        with span("OperationDialog.compute_time", "ui"):
+            self.operation = None
+            self._preview_generation += 1   # un aperçu en cours devient obsolète
+
+            if not self._faces:
+                QtWidgets.QMessageBox.warning(self, "Erreur", "Aucune face sélectionnée.")
+                return
+
+            try:
+                op_type, tool, cutting = self._read_inputs()
+                res = _compute(op_type, tool, cutting, self._geometry)
+            except ValueError as e:
+                QtWidgets.QMessageBox.warning(self, "Erreur", str(e))
+                return
+
+            self._show_result(op_type, tool, cutting, res)
+
+    def _show_result(self, op_type, tool, cutting, res):
+        geometry = self._geometry
+        area = geometry["area"] if op_type != "Contournage" else 0.0
+        length = geometry["length"] if op_type == "Contournage" else 0.0
+        time_min = res["time_min"]
+        passes_z, passes_rad = res["passes_z"], res["passes_rad"]
+
+        self.ed_ae.setText(f"{res['ae_mm']:.3f}")
+        self.ed_length.setText(f"{res['length_mm']:.1f}")
+        if op_type != "Contournage":
             self.ed_surface.setText(f"{area:.1f}")
 
-            time_min, passes_z, passes_rad = machining.compute_face_time(
-                area, depth_total, ap_max, ae_mm, vf_mm_min
-            )
-
-            self.ed_length.setText(f"{area/ae_mm:.1f}")
-
-            self.lbl_time.setText(
-                f"Temps : {time_min/60:.3f} h  "
-                f"(Surf={area:.0f}mm², Z={passes_z}, Rad={passes_rad}, Vf={vf_mm_min:.0f})"
-            )
-            return
-
-        # ---------------------------
-        # CONTOURNAGE
-        # ---------------------------
-        if "profil" in kind:
-            L = self._get_contour_length()
-            self.ed_length.setText(f"{L:.1f}")
-
-            time_min, passes_z, passes_rad = machining.compute_profile_time(
-                L, depth_total, ap_max, xy_surplus, ae_mm, vf_mm_min
-            )
-
-            self.lbl_time.setText(
-                f"Temps : {time_min/60:.3f} h  "
-                f"(L={L:.0f}mm, passes Z={passes_z}, passes rad={passes_rad})"
-            )
-            return
+        diam, z_teeth, vc, fz = tool
+        params = {"diam": diam, "z": z_teeth, "vc": vc, "fz": fz}
+        params.update(cutting)
+        drill = op_type == "Perçage"
+        self._set_operation(op_type, time_min, params,
+                            {"depth": geometry["depth"], "area": area, "length": length,
+                             "outline": geometry["outline"] if op_type in ("Poche", "Contournage") else None,
+                             "holes": geometry["holes"] if drill else None,
+                             "count": max(1, len(geometry["holes"])) if drill else 1})
 
         # ---------------------------
-        # POCHES
+        # AFFICHAGE
         # ---------------------------
-        if "poche" in kind:
-            area = self._get_face_area()
-            self.ed_surface.setText(f"{area:.1f}")
+        if op_type == "Surfaçage":
+            detail = (f"Surf={area:.0f}mm², Z={passes_z}, Rad={passes_rad}, "
+                      f"Vf={res['vf_mm_min']:.0f}")
+        elif op_type == "Contournage":
+            detail = f"L={length:.0f}mm, passes Z={passes_z}, passes rad={passes_rad}"
+        elif drill:
+            detail = (f"{passes_z} trou(s), prof.={geometry['depth']:.1f}mm, "
+                      f"Vf={res['vf_mm_min']:.0f}")
+        else:
+            detail = (f"Surf={area:.0f}mm², L≈{res['length_mm']:.0f}mm, "
+                      f"Z={passes_z}, Rad={passes_rad}")
 
-            time_min, passes_z, passes_rad = machining.compute_pocket_time(
-                area, depth_total, ap_max, xy_surplus, ae_mm, vf_mm_min
-            )
+        self.lbl_time.setText(f"Temps : {time_min/60:.3f} h  ({detail})")
 
-            L_equiv = area / max(ae_mm, 0.001)
-            self.ed_length.setText(f"{L_equiv:.1f}")
+    # ------------------------------------------------------------
+    # Calcul en direct : anti-rebond + calcul hors thread GUI
+    # ------------------------------------------------------------
+    def on_inputs_changed(self, *_):
+        # Le résultat affiché ne correspond plus aux champs
+        self.operation = None
+        if self.chk_live.isChecked():
+            self._preview_timer.start()
+
+    def on_live_toggled(self, checked):
+        if checked:
+            self._preview_timer.start()
+        else:
+            self._preview_timer.stop()
+            self._preview_generation += 1
 
-            self.lbl_time.setText(
-                f"Temps : {time_min/60:.3f} h  "
-                f"(Surf={area:.0f}mm², L≈{L_equiv:.0f}mm, Z={passes_z}, Rad={passes_rad})"
-            )
+    def _start_preview(self):
+        if not self._faces:
+            self.lbl_time.setText("Temps : -- h  (aucune face sélectionnée)")
+            return
+        try:
+            op_type, tool, cutting = self._read_inputs()
+        except ValueError as e:
+            self.lbl_time.setText(f"Temps : -- h  ({e})")
             return
 
+        # Chaque lancement invalide les précédents : seul le dernier est affiché
+        self._preview_generation += 1
+        task = _PreviewTask(self._preview_signals, self._preview_generation,
+                            op_type, tool, cutting, dict(self._geometry))
+        QtCore.QThreadPool.globalInstance().start(task)
+
+    def _on_preview_done(self, generation, payload):
+        with span("OperationDialog._on_preview_done", "ui"):
+            if generation != self._preview_generation:
+                return  # résultat obsolète
+            op_type, tool, cutting, res, error = payload
+            if error:
+                self.lbl_time.setText(f"Temps : -- h  ({error})")
+                return
+            self._show_result(op_type, tool, cutting, res)
+
+
+# ======================================================================
+#  CALCUL (sans Qt ni FreeCAD : exécutable dans un thread de travail)
+# ======================================================================
+
+def _optional_float(edit):
+    txt = edit.text().strip().replace(",", ".")
+    try:
+        return float(txt) if txt else 0.0
+    except ValueError:
+        return 0.0
 
 
+def _compute(op_type, tool, cutting, geometry):
+    contour = op_type == "Contournage"
+    holes = geometry.get("holes") if op_type == "Perçage" else None
+    geometry = {
+        "depth": geometry["depth"],
+        "area": 0.0 if contour else geometry["area"],
+        "length": geometry["length"] if contour else 0.0,
+        "outline": geometry.get("outline") if op_type in ("Poche", "Contournage") else None,
+        "holes": holes,
+        "count": max(1, len(holes)) if holes else 1,
+    }
+    return compute_operation(op_type, tool, cutting, geometry)
 
 
+class _PreviewSignals(QtCore.QObject):
+    done = QtCore.Signal(int, object)
 
 
+class _PreviewTask(QtCore.QRunnable):
+    """Calcul d'aperçu sur le QThreadPool, sur des données Python copiées."""
 
+    def __init__(self, signals, generation, op_type, tool, cutting, geometry):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.args = (op_type, tool, cutting, geometry)
 
-
-
+    def run(self):
+        op_type, tool, cutting, geometry = self.args
+        try:
+            with span("OperationDialog.preview", "operations"):
+                res, error = _compute(op_type, tool, cutting, geometry), None
+        except ValueError as e:
+            res, error = None, str(e)
+        except Exception as e:
+            # jamais d'exception hors du QRunnable : l'aperçu doit recevoir done
+            res, error = None, f"{type(e).__name__} : {e}"
+        try:
+            self.signals.done.emit(self.generation, (op_type, tool, cutting, res, error))
+        except RuntimeError:
+            pass  # dialogue fermé entre-temps
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+op_feature.py — Opérations d'usinage persistantes (FeaturePython)
+
+Chaque opération du chiffrage est un objet du document FreeCAD :
+- liée à ses faces (PropertyLinkSubList) et à son brut (objet PC_IsStock),
+- portant les paramètres outil (copiés depuis la bibliothèque) et de coupe,
+- avec son temps calculé stocké dans le fichier (TimeH).
+
+Le graphe de dépendances de FreeCAD ne marque "touched" que les opérations
+dont une entrée a changé (pièce, brut, paramètre) : un doc.recompute()
+ne réévalue que celles-là. À la réouverture d'un fichier, rien n'est
+recalculé : les résultats sont relus tels quels.
+"""
+
+import json
+
+import FreeCAD
+
+from cost_graph import QuoteGraph, compute_operation
+from geometry import faces_depth, faces_contour_length, faces_area, faces_outline, faces_hole_centers
+
+
+# (type, nom, groupe, description)
+_INPUT_PROPERTIES = (
+    ("App::PropertyBool", "PC_IsOperation", "PartCosting", "Objet opération PartCosting."),
+    ("App::PropertyString", "OpType", "Opération", "Surfaçage / Contournage / Poche / Perçage."),
+    ("App::PropertyLinkSubList", "Faces", "Opération", "Faces usinées."),
+    ("App::PropertyLink", "Stock", "Opération", "Brut (objet PC_IsStock)."),
+    ("App::PropertyBool", "UseStockMargins", "Opération",
+     "Surépaisseurs Z+ / XY lues sur le brut (PC_MarginsJSON)."),
+    ("App::PropertyString", "ToolName", "Outil", "Nom de l'outil (bibliothèque)."),
+    ("App::PropertyFloat", "ToolDiam", "Outil", "Ø outil (mm)."),
+    ("App::PropertyInteger", "ToolZ", "Outil", "Nombre de dents."),
+    ("App::PropertyFloat", "Vc", "Outil", "Vitesse de coupe (m/min)."),
+    ("App::PropertyFloat", "Fz", "Outil", "Avance par dent (mm/dent)."),
+    ("App::PropertyFloat", "AePercent", "Coupe", "Ae (% du Ø)."),
+    ("App::PropertyFloat", "ApMax", "Coupe", "Ap max (mm/passe)."),
+    ("App::PropertyFloat", "ZPlus", "Coupe", "Surépaisseur Z+ brut (mm)."),
+    ("App::PropertyFloat", "XYSurplus", "Coupe", "Surépaisseur XY brut (mm)."),
+    ("App::PropertyFloat", "DepthTotal", "Coupe", "Profondeur totale (mm), 0 = automatique."),
+    ("App::PropertyInteger", "Count", "Opération", "Nombre de trous (Perçage)."),
+)
+
+_RESULT_PROPERTIES = (
+    ("App::PropertyFloat", "TimeH", "Résultat", "Temps calculé (h)."),
+    ("App::PropertyFloat", "VfMmMin", "Résultat", "Avance Vf (mm/min)."),
+    ("App::PropertyFloat", "LengthMm", "Résultat", "Longueur équivalente (mm)."),
+    ("App::PropertyFloat", "AreaMm2", "Résultat", "Surface considérée (mm²)."),
+    ("App::PropertyFloat", "DepthMm", "Résultat", "Profondeur mesurée sur les faces (mm)."),
+    ("App::PropertyInteger", "PassesZ", "Résultat", "Passes en Z."),
+    ("App::PropertyInteger", "PassesRad", "Résultat", "Passes radiales."),
+    ("App::PropertyString", "Source", "Résultat", "Mode de calcul."),
+    ("App::PropertyString", "OutlineJSON", "Résultat",
+     "Contour de la poche / du profil (JSON), longueur par décalages."),
+    ("App::PropertyString", "HolesJSON", "Résultat",
+     "Centres des trous (JSON), déplacements entre trous du Perçage."),
+)
+
+
+class CostingOperation:
+    """Proxy de l'objet App::FeaturePython d'une opération."""
+
+    def __init__(self, obj):
+        self._init_properties(obj)
+        obj.PC_IsOperation = True
+        obj.Proxy = self
+
+    @staticmethod
+    def _init_properties(obj):
+        for ptype, name, group, doc in _INPUT_PROPERTIES + _RESULT_PROPERTIES:
+            if name not in obj.PropertiesList:
+                obj.addProperty(ptype, name, group, doc)
+        for _, name, _, _ in _RESULT_PROPERTIES:
+            obj.setEditorMode(name, 1)  # lecture seule
+
+    # ------------------------------------------------------------
+    # Recalcul (appelé par FreeCAD uniquement si l'objet est touché)
+    # ------------------------------------------------------------
+    def execute(self, obj):
+        faces = []
+        for linked, subs in obj.Faces:
+            for sub in subs:
+                faces.append(linked.Shape.getElement(sub))
+
+        contour = obj.OpType == "Contournage"
+        geometry = {
+            "depth": faces_depth(faces),
+            "area": 0.0 if contour else faces_area(faces),
+            "length": faces_contour_length(faces) if contour else 0.0,
+            "count": max(1, obj.Count),
+        }
+        if obj.OpType in ("Poche", "Contournage"):
+            geometry["outline"] = faces_outline(faces)
+        elif obj.OpType == "Perçage":
+            geometry["holes"] = faces_hole_centers(faces)
+        obj.DepthMm = geometry["depth"]
+        obj.AreaMm2 = geometry["area"]
+        obj.OutlineJSON = json.dumps(geometry["outline"]) if geometry.get("outline") else ""
+        obj.HolesJSON = json.dumps(geometry["holes"]) if geometry.get("holes") else ""
+
+        try:
+            res = compute_operation(
+                obj.OpType, operation_tool(obj), operation_cutting(obj),
+                geometry, stock_margins(obj),
+            )
+        except ValueError as e:
+            FreeCAD.Console.PrintError(f"[PartCosting] {obj.Label} : {e}\n")
+            obj.TimeH = 0.0
+            return
+
+        apply_result(obj, res)
+
+    def onDocumentRestored(self, obj):
+        # Complète les propriétés des anciens fichiers, sans recalcul
+        self._init_properties(obj)
+
+    # Pas d'état Python à sauvegarder : tout est dans les propriétés
+    def dumps(self):
+        return None
+
+    def loads(self, state):
+        return None
+
+    __getstate__ = dumps
+    __setstate__ = loads
+
+
+# ======================================================================
+#  FONCTIONS UTILITAIRES (panneau)
+# ======================================================================
+
+def is_operation(obj):
+    return getattr(obj, "PC_IsOperation", False)
+
+
+def operation_tool(obj):
+    return (obj.ToolDiam, obj.ToolZ, obj.Vc, obj.Fz)
+
+
+def operation_cutting(obj):
+    return {
+        "ae_pct": obj.AePercent,
+        "ap_max": obj.ApMax,
+        "z_plus": obj.ZPlus,
+        "xy_surplus": obj.XYSurplus,
+        "depth_user": obj.DepthTotal,
+        "use_stock_margins": obj.UseStockMargins,
+    }
+
+
+def operation_geometry(obj):
+    """Grandeurs issues des faces, relues dans l'objet (pas de requête géométrique)."""
+    contour = obj.OpType == "Contournage"
+    geometry = {
+        "depth": obj.DepthMm,
+        "area": 0.0 if contour else obj.AreaMm2,
+        "length": obj.LengthMm if contour else 0.0,
+        "count": max(1, obj.Count),
+    }
+    if getattr(obj, "OutlineJSON", ""):
+        geometry["outline"] = json.loads(obj.OutlineJSON)
+    if getattr(obj, "HolesJSON", ""):
+        geometry["holes"] = json.loads(obj.HolesJSON)
+    return geometry
+
+
+def stock_margins(obj):
+    stock = obj.Stock
+    if stock is None or not hasattr(stock, "PC_MarginsJSON"):
+        return None
+    return json.loads(stock.PC_MarginsJSON or "{}")
+
+
+def operation_result(obj):
+    return {
+        "time_h": obj.TimeH,
+        "vf_mm_min": obj.VfMmMin,
+        "length_mm": obj.LengthMm,
+        "passes_z": obj.PassesZ,
+        "passes_rad": obj.PassesRad,
+    }
+
+
+def apply_result(obj, res):
+    """Recopie un résultat de calcul (cost_graph.compute_operation) dans l'objet."""
+    obj.TimeH = res["time_h"]
+    if "vf_mm_min" in res:
+        obj.VfMmMin = res["vf_mm_min"]
+        obj.LengthMm = res["length_mm"]
+        obj.PassesZ = res["passes_z"]
+        obj.PassesRad = res["passes_rad"]
+
+
+def find_operations(doc):
+    """Objets opération du document, dans l'ordre de création."""
+    return [o for o in doc.Objects if is_operation(o)]
+
+
+def create_operation(doc, operation, stock=None):
+    """
+    Crée l'objet opération à partir du dict renvoyé par OperationDialog.
+    Le temps déjà calculé par le dialogue est repris : l'objet est marqué
+    à jour (pas de recalcul au prochain doc.recompute()).
+    """
+    params = operation.get("params", {})
+    label = f"Op_{operation['type']}"
+
+    obj = doc.addObject("App::FeaturePython", "PC_Operation")
+    CostingOperation(obj)
+    obj.Label = label
+
+    obj.OpType = operation["type"]
+    obj.Faces = [(o, tuple(subs)) for o, subs in operation.get("links", [])]
+    if stock is not None:
+        obj.Stock = stock
+    obj.ToolName = operation.get("tool", "")
+    obj.ToolDiam = params.get("diam", 0.0)
+    obj.ToolZ = int(params.get("z", 0))
+    obj.Vc = params.get("vc", 0.0)
+    obj.Fz = params.get("fz", 0.0)
+    obj.AePercent = params.get("ae_pct", 0.0)
+    obj.ApMax = params.get("ap_max", 0.0)
+    obj.ZPlus = params.get("z_plus", 0.0)
+    obj.XYSurplus = params.get("xy_surplus", 0.0)
+    obj.DepthTotal = params.get("depth_user", 0.0)
+    obj.UseStockMargins = bool(params.get("use_stock_margins", False))
+
+    geometry = operation.get("geometry", {})
+    obj.DepthMm = geometry.get("depth", 0.0)
+    obj.AreaMm2 = geometry.get("area", 0.0)
+    obj.LengthMm = geometry.get("length", 0.0)
+    obj.Count = int(geometry.get("count", 1))
+    if geometry.get("outline"):
+        obj.OutlineJSON = json.dumps(geometry["outline"])
+    if geometry.get("holes"):
+        obj.HolesJSON = json.dumps(geometry["holes"])
+
+    obj.TimeH = operation.get("time_h", 0.0)
+    obj.Source = operation.get("source", "")
+    obj.purgeTouched()
+    return obj
+
+
+def operation_dict(obj):
+    """Ligne du tableau des opérations pour un objet opération."""
+    return {
+        "type": obj.OpType,
+        "time_h": obj.TimeH,
+        "source": obj.Source,
+        "tool": obj.ToolName,
+        "object": obj.Name,
+    }
+
+
+def sync_tool_parameters(doc, library):
+    """
+    Recopie Ø / Z / Vc / Fz depuis la bibliothèque dans les opérations dont
+    l'outil a changé. Seules ces opérations sont touchées (et donc
+    recalculées au prochain doc.recompute()). Retourne la liste des objets.
+    """
+    touched = []
+    for obj in find_operations(doc):
+        tool = library.get(obj.ToolName)
+        if tool is None:
+            continue
+        if (obj.ToolDiam, obj.ToolZ, obj.Vc, obj.Fz) == (tool.diam, tool.z, tool.vc, tool.fz):
+            continue
+        obj.ToolDiam = tool.diam
+        obj.ToolZ = tool.z
+        obj.Vc = tool.vc
+        obj.Fz = tool.fz
+        touched.append(obj)
+    return touched
+
+
+# ======================================================================
+#  GRAPHE DE CHIFFRAGE (cost_graph) CONSTRUIT DEPUIS LE DOCUMENT
+# ======================================================================
+
+def add_to_quote_graph(graph, obj):
+    """
+    Ajoute / met à jour l'opération `obj` dans le QuoteGraph en reprenant
+    son résultat stocké : aucun calcul tant qu'aucune entrée ne change.
+    """
+    stock = obj.Stock
+    stock_name = stock.Name if stock is not None else None
+    if stock_name:
+        graph.set_stock(stock_name, getattr(stock, "PC_MarginsJSON", ""))
+    graph.set_tool_params(obj.ToolName, operation_tool(obj))
+    graph.add_operation(
+        obj.Name, obj.OpType, obj.ToolName,
+        operation_cutting(obj), operation_geometry(obj),
+        stock_name=stock_name, result=operation_result(obj),
+    )
+
+
+def build_quote_graph(doc, rate=0.0):
+    graph = QuoteGraph(rate)
+    for obj in find_operations(doc):
+        add_to_quote_graph(graph, obj)
+    return graph
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+op_model.py — Modèle des opérations d'usinage du panneau
+
+- OperationTotals : totaux incrémentaux (global, par type, par outil),
+  mis à jour en O(1) à chaque ajout / suppression d'opération.
+- OperationTableModel : modèle Qt qui stocke les valeurs numériques
+  (plus de relecture du texte des cellules) pour une QTableView.
+
+Une opération est un dict :
+    {"type": str, "time_h": float, "source": str, "tool": str, ...}
+"""
+
+from PySide2 import QtCore
+
+
+# ======================================================================
+#  TOTAUX INCRÉMENTAUX
+# ======================================================================
+
+class OperationTotals:
+    """Somme des temps (h) globale, par type et par outil."""
+
+    def __init__(self):
+        self.total_h = 0.0
+        self.count = 0
+        self.by_type = {}
+        self.by_tool = {}
+
+    @staticmethod
+    def _bump(table, key, dt):
+        table[key] = table.get(key, 0.0) + dt
+
+    def add(self, op):
+        t = float(op.get("time_h", 0.0))
+        self.total_h += t
+        self.count += 1
+        self._bump(self.by_type, op.get("type", ""), t)
+        self._bump(self.by_tool, op.get("tool", ""), t)
+
+    def remove(self, op):
+        t = float(op.get("time_h", 0.0))
+        self.total_h -= t
+        self.count -= 1
+        self._bump(self.by_type, op.get("type", ""), -t)
+        self._bump(self.by_tool, op.get("tool", ""), -t)
+        if self.count == 0:
+            # évite d'accumuler les erreurs d'arrondi quand tout est supprimé
+            self.clear()
+
+    def clear(self):
+        self.total_h = 0.0
+        self.count = 0
+        self.by_type.clear()
+        self.by_tool.clear()
+
+    def cost(self, rate_eur_h):
+        return self.total_h * rate_eur_h
+
+
+# ======================================================================
+#  MODÈLE QT
+# ======================================================================
+
+class OperationTableModel(QtCore.QAbstractTableModel):
+    """Liste des opérations + totaux, affichée par une QTableView."""
+
+    COLUMNS = (
+        ("#", None),
+        ("Type", "type"),
+        ("Outil", "tool"),
+        ("Temps (h)", "time_h"),
+        ("Mode", "source"),
+    )
+
+    totalsChanged = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.operations = []
+        self.totals = OperationTotals()
+        self._rows = {}    # objet FreeCAD → ligne (opérations liées à un objet)
+
+    def _reindex(self, first=0, last=None):
+        """Recalcule l'index objet → ligne des lignes [first, last)."""
+        rows = self._rows
+        end = len(self.operations) if last is None else last
+        for row in range(first, end):
+            name = self.operations[row].get("object")
+            if name is not None:
+                rows[name] = row
+
+    # ----- Lecture -----
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.operations)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        key = self.COLUMNS[index.column()][1]
+
+        if role == QtCore.Qt.DisplayRole:
+            if key is None:
+                return str(row + 1)
+            value = self.operations[row].get(key, "")
+            if key == "time_h":
+                return f"{value:.2f}"
+            return str(value)
+        if role == QtCore.Qt.UserRole:
+            return row if key is None else self.operations[row].get(key)
+        if role == QtCore.Qt.TextAlignmentRole and key in (None, "time_h"):
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    # ----- Modifications incrémentales -----
+    def add_operation(self, op):
+        self.add_operations([op])
+
+    def add_operations(self, ops):
+        """Ajout groupé : un seul signal d'insertion pour tout le lot."""
+        ops = list(ops)
+        if not ops:
+            return
+        first = len(self.operations)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(ops) - 1)
+        for op in ops:
+            self.operations.append(op)
+            self.totals.add(op)
+        self._reindex(first)
+        self.endInsertRows()
+        self.totalsChanged.emit()
+
+    def update_operation(self, row, op):
+        """Remplace une opération (ex : recalculée) : totaux ajustés en O(1)."""
+        old = self.operations[row]
+        self.totals.remove(old)
+        self.operations[row] = op
+        self.totals.add(op)
+        if old.get("object") != op.get("object"):
+            self._rows.pop(old.get("object"), None)
+            self._reindex(row, row + 1)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+        self.totalsChanged.emit()
+
+    def row_of_object(self, name):
+        """Ligne de l'opération liée à l'objet FreeCAD `name` (-1 si absente)."""
+        return self._rows.get(name, -1)
+
+    def remove_operation(self, row):
+        if row < 0 or row >= len(self.operations):
+            return
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        op = self.operations.pop(row)
+        self.totals.remove(op)
+        self._rows.pop(op.get("object"), None)
+        self._reindex(row)
+        self.endRemoveRows()
+
+        # Les numéros "#" des lignes suivantes changent
+        if row < len(self.operations):
+            self.dataChanged.emit(self.index(row, 0), self.index(len(self.operations) - 1, 0))
+        self.totalsChanged.emit()
+
+    def clear(self):
+        self.beginResetModel()
+        del self.operations[:]
+        self.totals.clear()
+        self._rows.clear()
+        self.endResetModel()
+        self.totalsChanged.emit()
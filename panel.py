@@ -1,32 +1,124 @@
+import functools
+import time
+
 import FreeCAD
 import FreeCADGui
-import Part
 
 from PySide2 import QtWidgets, QtCore, QtGui
 
 from geometry import GeometryExtractor
 from stock_intelligent import (
-    detect_best_stock_type,
+    NameIndex,
     compute_auto_margins,
     create_intelligent_stock,
+    create_intelligent_stocks,
 )
 
-from machining_tools import get_all_tool_names, get_tool
+from machining_tools import get_library
 from op_dialog import OperationDialog
+from auto_ops import drilling_cycle_time, generate_operations
+from analysis_store import cached_section
+from mass_properties import MassProperties, get_engine
+from tracing import TRACER, span
+from op_model import OperationTableModel
+from op_feature import (
+    is_operation,
+    find_operations,
+    create_operation,
+    operation_dict,
+    sync_tool_parameters,
+    apply_result,
+    add_to_quote_graph,
+    build_quote_graph,
+)
+from cost_graph import QuoteGraph
+from costing_core.uncertainty import graph_uncertainty
+from family import (
+    FAMILY_WORKERS,
+    copy_for_family,
+    enumerate_variants,
+    evaluate_in_processes,
+    family_parameters,
+    family_python,
+    family_table,
+    parse_values,
+    quote_family,
+    remove_family_copy,
+    write_family_csv,
+)
+from materials import MATERIALS
 from tool_manager import ToolManagerDialog
 
 
 # ======================================================================
-#  CONSTANTES MATIÈRES (densités kg/dm3)
+#  OBSERVATEUR DOCUMENT : suit les opérations recalculées / supprimées
 # ======================================================================
 
-MATERIALS = {
-    "Acier": 7.85,
-    "Aluminium": 2.70,
-    "Inox": 8.00,
-    "Fonte": 7.00,
-    "Laiton": 8.40,
-}
+class _OperationObserver:
+    def __init__(self, panel):
+        self.panel = panel   # None une fois détaché (panel fermé)
+
+    def slotChangedObject(self, obj, prop):
+        if self.panel is not None and prop == "TimeH" and is_operation(obj):
+            self.panel.on_operation_changed(obj)
+
+    def slotDeletedObject(self, obj):
+        if self.panel is not None and is_operation(obj):
+            self.panel.on_operation_deleted(obj.Name)
+
+    def slotActivateDocument(self, doc):
+        if self.panel is not None:
+            self.panel.refresh_operations()
+
+    def detach(self, *_):
+        """Retire l'observateur de FreeCAD (fermeture / destruction du panel)."""
+        if self.panel is None:
+            return
+        self.panel = None
+        try:
+            FreeCAD.removeDocumentObserver(self)
+        except Exception:
+            pass
+
+
+# ======================================================================
+#  FAMILLE : attente des processus de calcul sur le QThreadPool
+# ======================================================================
+
+class _FamilySignals(QtCore.QObject):
+    progress = QtCore.Signal(int, int)
+    done = QtCore.Signal(object, object)   # lignes, erreur
+
+
+class _FamilyTask(QtCore.QRunnable):
+    """Variantes évaluées dans les processus de calcul, hors du thread de l'interface."""
+
+    def __init__(self, signals, path, variants, python, material, rate, workers):
+        super().__init__()
+        self.signals = signals
+        self.path = path
+        self.args = (variants, python, material, rate, workers)
+
+    def _progress(self, done, total):
+        try:
+            self.signals.progress.emit(done, total)
+        except RuntimeError:
+            pass  # panel fermé entre-temps
+
+    def run(self):
+        variants, python, material, rate, workers = self.args
+        try:
+            rows, error = evaluate_in_processes(
+                self.path, variants, python, material, rate, workers, self._progress
+            ), None
+        except Exception as e:
+            rows, error = [], f"{type(e).__name__} : {e}"
+        finally:
+            remove_family_copy(self.path)
+        try:
+            self.signals.done.emit(rows, error)
+        except RuntimeError:
+            pass
 
 
 # ======================================================================
@@ -40,7 +132,10 @@ class PartCostingPanel(QtWidgets.QDockWidget):
         super().__init__()
         self.setWindowTitle("Part Costing Pro")
 
-        self.operations = []      # liste de dicts {type, time_h, mode}
+        self.op_model = OperationTableModel()
+        self.operations = self.op_model.operations  # liste de dicts {type, time_h, source, tool}
+        self.quote_graph = QuoteGraph()  # graphe de chiffrage (cost_graph)
+        self._applying_graph = False
         self.stocks = []          # objets FreeCAD marqués PC_IsStock
         self.selected_stock = None
 
@@ -57,6 +152,20 @@ class PartCostingPanel(QtWidgets.QDockWidget):
         self._init_tab_analyse()
         self._init_tab_stock()
         self._init_tab_machining()
+        self._init_tab_family()
+        self._init_tab_trace()
+
+        # Opérations persistées dans le document
+        self.refresh_operations()
+        self._observer = _OperationObserver(self)
+        FreeCAD.addDocumentObserver(self._observer)
+        # fermé = détruit : l'observateur est retiré, pas d'appel vers un widget supprimé
+        self.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+        self.destroyed.connect(functools.partial(_OperationObserver.detach, self._observer))
+
+    def closeEvent(self, event):
+        self._observer.detach()
+        super().closeEvent(event)
 
     # ==================================================================
     # ONGLET 1 : ANALYSE
@@ -79,6 +188,7 @@ class PartCostingPanel(QtWidgets.QDockWidget):
         form_mat = QtWidgets.QFormLayout()
         self.combo_material = QtWidgets.QComboBox()
         self.combo_material.addItems(list(MATERIALS.keys()))
+        self.combo_material.currentIndexChanged.connect(self.on_material_changed)
         form_mat.addRow("Matière :", self.combo_material)
         layout.addLayout(form_mat)
 
@@ -94,55 +204,96 @@ class PartCostingPanel(QtWidgets.QDockWidget):
         self.tabs.addTab(tab, "Analyse")
 
     def on_analyse(self):
-        doc = FreeCAD.ActiveDocument
-        if not doc:
-            self.text_geo.setPlainText("❌ Aucun document actif.")
-            return
+        with span("PartCostingPanel.on_analyse", "ui"):
+            doc = FreeCAD.ActiveDocument
+            if not doc:
+                self.text_geo.setPlainText("❌ Aucun document actif.")
+                return
 
-        sel = FreeCADGui.Selection.getSelection()
-        if not sel:
-            self.text_geo.setPlainText("❌ Sélectionnez une pièce.")
-            return
+            sel = FreeCADGui.Selection.getSelection()
+            if not sel:
+                self.text_geo.setPlainText("❌ Sélectionnez une pièce.")
+                return
 
-        obj = sel[0]
-        if not hasattr(obj, "Shape"):
-            self.text_geo.setPlainText("❌ L'objet sélectionné n'a pas de Shape.")
-            return
+            obj = sel[0]
+            if not hasattr(obj, "Shape"):
+                self.text_geo.setPlainText("❌ L'objet sélectionné n'a pas de Shape.")
+                return
+
+            shape = obj.Shape
 
-        extractor = GeometryExtractor(obj.Shape)
-        summary = extractor.summary()
-        self.text_geo.setPlainText(summary)
+            def _summary():
+                extractor = GeometryExtractor(doc)
+                extractor.shape = shape
+                return extractor.summary()
+
+            # Pièce déjà analysée (n'importe quel poste) : relue dans le dépôt
+            summary = cached_section(shape, "summary", _summary)
+            props = cached_section(
+                shape, "mass",
+                lambda: get_engine().properties(shape),
+                MassProperties.as_dict, MassProperties.from_dict,
+            )
+            cx, cy, cz = props.center
+            bbox = summary["bbox"]
+            self.text_geo.setPlainText("\n".join([
+                f"Objet : {obj.Label}",
+                f"Encombrement : {bbox['x']:.2f} × {bbox['y']:.2f} × {bbox['z']:.2f} mm",
+                f"Volume : {props.volume_mm3 / 1000.0:.2f} cm³",
+                f"Surface : {props.area_mm2 / 100.0:.2f} cm²",
+                f"Centre de masse : ({cx:.2f}, {cy:.2f}, {cz:.2f}) mm",
+                f"Faces : {summary['face_count']}",
+            ]))
+
+    def on_material_changed(self, _index):
+        # Masses déjà affichées : mise à jour immédiate (propriétés en cache)
+        if self.text_weight.toPlainText():
+            self.compute_weights()
 
     def compute_weights(self):
-        doc = FreeCAD.ActiveDocument
-        if not doc:
-            self.text_weight.setPlainText("❌ Aucun document actif.")
-            return
+        with span("PartCostingPanel.compute_weights", "ui"):
+            doc = FreeCAD.ActiveDocument
+            if not doc:
+                self.text_weight.setPlainText("❌ Aucun document actif.")
+                return
 
-        part = self._find_reference_part()
-        stock = self.selected_stock
+            part = self._find_reference_part()
+            stock = self.selected_stock
 
-        if not part:
-            self.text_weight.setPlainText("❌ Aucune pièce détectée.")
-            return
+            if not part:
+                self.text_weight.setPlainText("❌ Aucune pièce détectée.")
+                return
 
-        rho = MATERIALS[self.combo_material.currentText()]  # kg/dm3
-        v_piece = part.Shape.Volume * 1e-9  # mm3 → dm3
-        m_piece = v_piece * rho
+            # Tous les solides du document, en cache par empreinte de shape :
+            # changer de matière ou recliquer ne relance aucun calcul
+            material = self.combo_material.currentText()
+            props = get_engine().document_properties(doc)
+            if part.Name not in props:
+                self.text_weight.setPlainText("❌ La pièce n'est pas un solide.")
+                return
+            m_piece = props[part.Name].mass_kg(material)
 
-        txt = [f"🟦 Pièce : {m_piece:.2f} kg"]
+            txt = [f"🟦 Pièce : {m_piece:.2f} kg"]
 
-        if stock and hasattr(stock, "Shape"):
-            v_brut = stock.Shape.Volume * 1e-9
-            m_brut = v_brut * rho
-            txt += [
-                f"🟧 Brut : {m_brut:.2f} kg",
-                f"🛠️ Matière à enlever : {m_brut - m_piece:.2f} kg",
-            ]
-        else:
-            txt += ["⚠️ Aucun brut sélectionné (onglet Brut)."]
+            if stock is not None and stock.Name in props:
+                m_brut = props[stock.Name].mass_kg(material)
+                txt += [
+                    f"🟧 Brut : {m_brut:.2f} kg",
+                    f"🛠️ Matière à enlever : {m_brut - m_piece:.2f} kg",
+                ]
+            else:
+                txt += ["⚠️ Aucun brut sélectionné (onglet Brut)."]
+
+            txt += ["", "Pièce selon la matière :"]
+            txt += [f"  {name} : {m:.2f} kg" for name, m in props[part.Name].masses().items()]
+
+            if len(props) > 1:
+                txt += ["", f"Solides du document ({material}) :"]
+                for name, p in props.items():
+                    obj = doc.getObject(name)
+                    txt.append(f"  {obj.Label} : {p.mass_kg(material):.2f} kg")
 
-        self.text_weight.setPlainText("\n".join(txt))
+            self.text_weight.setPlainText("\n".join(txt))
 
     # ==================================================================
     # ONGLET 2 : BRUT (STOCK)
@@ -170,11 +321,15 @@ class PartCostingPanel(QtWidgets.QDockWidget):
         v_auto = QtWidgets.QVBoxLayout(group_auto)
 
         self.lbl_auto_info = QtWidgets.QLabel(
-            "Utilise la pièce sélectionnée.\n"
+            "Utilise la pièce sélectionnée (plusieurs pièces : un brut par pièce).\n"
             "Type brut proposé (Bloc/Rond) + surép internes : XY = 2.5 | Z+ = 2 | Z- = 5."
         )
         v_auto.addWidget(self.lbl_auto_info)
 
+        self.chk_catalog = QtWidgets.QCheckBox("Brut standard du catalogue (matière de l'onglet Analyse)")
+        self.chk_catalog.setToolTip("Plus petite tôle / plat / rond achetable contenant la pièce + surép.")
+        v_auto.addWidget(self.chk_catalog)
+
         self.btn_new_auto = QtWidgets.QPushButton("Créer brut automatique")
         self.btn_new_auto.clicked.connect(self.create_auto_stock)
         v_auto.addWidget(self.btn_new_auto)
@@ -247,6 +402,7 @@ class PartCostingPanel(QtWidgets.QDockWidget):
             if hasattr(obj, "PC_IsStock") and getattr(obj, "PC_IsStock", False):
                 self.stocks.append(obj)
                 self.combo_stocks.addItem(obj.Label)
+                self.quote_graph.set_stock(obj.Name, getattr(obj, "PC_MarginsJSON", ""))
 
         if self.stocks:
             self.selected_stock = self.stocks[0]
@@ -264,41 +420,57 @@ class PartCostingPanel(QtWidgets.QDockWidget):
 
     # ----- Création brut auto -----
     def create_auto_stock(self):
-        doc = FreeCAD.ActiveDocument
-        if not doc:
-            QtWidgets.QMessageBox.warning(None, "Erreur", "Aucun document actif.")
-            return
+        with span("PartCostingPanel.create_auto_stock", "ui"):
+            doc = FreeCAD.ActiveDocument
+            if not doc:
+                QtWidgets.QMessageBox.warning(None, "Erreur", "Aucun document actif.")
+                return
 
-        sel = FreeCADGui.Selection.getSelection()
-        if not sel:
-            QtWidgets.QMessageBox.warning(None, "Erreur", "Sélectionnez la pièce (un seul objet).")
-            return
+            sel = FreeCADGui.Selection.getSelection()
+            if not sel:
+                QtWidgets.QMessageBox.warning(None, "Erreur", "Sélectionnez la ou les pièces.")
+                return
 
-        obj = sel[0]
-        if not hasattr(obj, "Shape"):
-            QtWidgets.QMessageBox.warning(None, "Erreur", "L'objet sélectionné n'a pas de Shape.")
-            return
+            parts = [o for o in sel if hasattr(o, "Shape")]
+            if not parts:
+                QtWidgets.QMessageBox.warning(None, "Erreur", "L'objet sélectionné n'a pas de Shape.")
+                return
 
-        shape = obj.Shape
+            material = None
+            if self.chk_catalog.isChecked():
+                material = self.combo_material.currentText()
+
+            if len(parts) > 1:
+                # Famille de pièces : une transaction, un recalcul
+                t0 = time.perf_counter()
+                results = create_intelligent_stocks([o.Shape for o in parts], material=material)
+                for stock, _, _, _ in results:
+                    self._set_stock_visual(stock)
+                self.refresh_stock_list()
+                self.update_stock_info(results[-1][0])
+                FreeCAD.Console.PrintMessage(
+                    f"[PartCosting] {len(results)} bruts créés en {time.perf_counter() - t0:.1f} s.\n"
+                )
+                return
 
-        margins = compute_auto_margins(shape)
-        stock_type = detect_best_stock_type(shape)
+            shape = parts[0].Shape
 
-        stock, stock_type, margins_out, orientation = create_intelligent_stock(
-            shape,
-            margins=margins,
-            stock_type=stock_type,
-        )
+            margins = compute_auto_margins(shape)
 
-        # Positionner le brut autour de la pièce (centré XY, Z- = 5)
-        self._place_stock_around_part(stock)
+            # Forme (bloc / rond de volume ou de prix minimal) et placement
+            # autour de la pièce choisis par create_intelligent_stock
+            stock, stock_type, margins_out, orientation = create_intelligent_stock(
+                shape,
+                margins=margins,
+                stock_type=None,
+                material=material,
+            )
 
-        # Style visuel
-        self._set_stock_visual(stock)
+            # Style visuel
+            self._set_stock_visual(stock)
 
-        doc.recompute()
-        self.refresh_stock_list()
-        self.update_stock_info(stock)
+            self.refresh_stock_list()
+            self.update_stock_info(stock)
 
     # ----- Création brut manuel -----
     def create_manual_stock(self):
@@ -320,21 +492,21 @@ class PartCostingPanel(QtWidgets.QDockWidget):
 
         # Cas bloc
         if L > 0 and W > 0 and H > 0:
-            name = self._unique_name("StockBlock")
-            obj = doc.addObject("Part::Box", name)
+            names = NameIndex(doc)
+            obj = doc.addObject("Part::Box", names.unique_name("StockBlock"))
             obj.Length = L
             obj.Width = W
             obj.Height = H
-            obj.Label = self._unique_label("BrutBloc_")
+            obj.Label = names.label("BrutBloc_")
             stock_type = "Block"
 
         # Cas cylindre
         elif D > 0 and Lc > 0:
-            name = self._unique_name("StockCylinder")
-            obj = doc.addObject("Part::Cylinder", name)
+            names = NameIndex(doc)
+            obj = doc.addObject("Part::Cylinder", names.unique_name("StockCylinder"))
             obj.Radius = D / 2.0
             obj.Height = Lc
-            obj.Label = self._unique_label("BrutRond_")
+            obj.Label = names.label("BrutRond_")
             stock_type = "Cylinder"
 
         else:
@@ -408,25 +580,7 @@ class PartCostingPanel(QtWidgets.QDockWidget):
         doc.recompute()
         self.update_stock_info(self.selected_stock)
 
-    # ----- Utils nommage / infos -----
-    def _unique_name(self, prefix):
-        doc = FreeCAD.ActiveDocument
-        existing = {o.Name for o in doc.Objects}
-        if prefix not in existing:
-            return prefix
-        i = 1
-        while f"{prefix}{i}" in existing:
-            i += 1
-        return f"{prefix}{i}"
-
-    def _unique_label(self, prefix):
-        doc = FreeCAD.ActiveDocument
-        existing = {o.Label for o in doc.Objects}
-        i = 1
-        while f"{prefix}{i:02d}" in existing:
-            i += 1
-        return f"{prefix}{i:02d}"
-
+    # ----- Utils infos -----
     def update_stock_info(self, stock):
         if not stock or not hasattr(stock, "Shape"):
             self.text_stock.setPlainText("Aucun brut sélectionné.")
@@ -443,6 +597,13 @@ class PartCostingPanel(QtWidgets.QDockWidget):
             f"Y : {bb.YLength:.2f} mm",
             f"Z : {bb.ZLength:.2f} mm",
         ]
+        if getattr(stock, "PC_StockRef", ""):
+            txt += [
+                "",
+                f"Réf. catalogue : {stock.PC_StockRef}",
+                f"Masse achetée : {stock.PC_StockMassKg:.2f} kg",
+                f"Coût matière : {stock.PC_StockCost:.2f} €",
+            ]
         self.text_stock.setPlainText("\n".join(txt))
 
         # Remplir les champs dimensions en fonction du type
@@ -489,7 +650,6 @@ class PartCostingPanel(QtWidgets.QDockWidget):
 
         L = bbs.XLength
         W = bbs.YLength
-        H = bbs.ZLength
 
         # Centre XY de la pièce
         cx = (bbp.XMin + bbp.XMax) * 0.5
@@ -532,23 +692,56 @@ class PartCostingPanel(QtWidgets.QDockWidget):
         btn_add.clicked.connect(self.on_add_operation)
         btn_layout.addWidget(btn_add)
 
+        btn_auto = QtWidgets.QPushButton("⚡ Opérations auto")
+        btn_auto.setToolTip("Détecte les faces, flancs et trous de la pièce et crée toutes les opérations.")
+        btn_auto.clicked.connect(self.on_auto_operations)
+        btn_layout.addWidget(btn_auto)
+
+        btn_remove = QtWidgets.QPushButton("➖ Supprimer")
+        btn_remove.clicked.connect(self.on_remove_operation)
+        btn_layout.addWidget(btn_remove)
+
+        btn_recompute = QtWidgets.QPushButton("🔄 Recalculer")
+        btn_recompute.setToolTip("Recalcule uniquement les opérations dont une entrée a changé.")
+        btn_recompute.clicked.connect(self.on_recompute_operations)
+        btn_layout.addWidget(btn_recompute)
+
+        btn_uncertainty = QtWidgets.QPushButton("📊 Incertitude")
+        btn_uncertainty.setToolTip("Distribution du coût (Monte-Carlo sur Vc, Fz, Ae et rendement) : P50 / P90.")
+        btn_uncertainty.clicked.connect(self.on_uncertainty)
+        btn_layout.addWidget(btn_uncertainty)
+
         btn_tools = QtWidgets.QPushButton("🛠 Gérer les outils")
         btn_tools.clicked.connect(self.on_manage_tools)
         btn_layout.addWidget(btn_tools)
 
         layout.addLayout(btn_layout)
 
-        # Tableau opérations
-        self.table = QtWidgets.QTableWidget(0, 4)
-        self.table.setHorizontalHeaderLabels(["#", "Type", "Temps (h)", "Mode"])
+        # Tableau opérations (vue sur le modèle : seules les lignes visibles sont dessinées)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.op_model)
         self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         layout.addWidget(self.table)
 
         # Totaux
         self.lbl_total_time = QtWidgets.QLabel("Temps total : 0.00 h")
         self.lbl_total_cost = QtWidgets.QLabel("Coût total : 0.00 €")
+        self.lbl_total_detail = QtWidgets.QLabel("")
+        self.lbl_total_detail.setWordWrap(True)
         layout.addWidget(self.lbl_total_time)
         layout.addWidget(self.lbl_total_cost)
+        layout.addWidget(self.lbl_total_detail)
+
+        self.lbl_uncertainty = QtWidgets.QLabel("")
+        self.lbl_uncertainty.setWordWrap(True)
+        layout.addWidget(self.lbl_uncertainty)
+
+        self.lbl_graph_stats = QtWidgets.QLabel("")
+        self.lbl_graph_stats.setStyleSheet("color: gray;")
+        layout.addWidget(self.lbl_graph_stats)
 
         # Taux horaire
         form = QtWidgets.QFormLayout()
@@ -556,62 +749,412 @@ class PartCostingPanel(QtWidgets.QDockWidget):
         form.addRow("Taux horaire (€/h) :", self.edit_rate)
         layout.addLayout(form)
 
+        self.op_model.totalsChanged.connect(self.recompute_totals)
+        self.edit_rate.textChanged.connect(self.on_rate_changed)
+
         self.tabs.addTab(tab, "Opérations")
 
+    # ==================================================================
+    # ONGLET 4 : FAMILLE (variantes pilotées par tableur, module family)
+    # ==================================================================
+    def _init_tab_family(self):
+        tab = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(tab)
+
+        btn_params = QtWidgets.QPushButton("Lire les paramètres du tableur")
+        btn_params.clicked.connect(self.on_family_parameters)
+        layout.addWidget(btn_params)
+
+        # Alias | valeur actuelle | valeurs à chiffrer ("10; 20" ou "100:300:50")
+        self.table_family_params = QtWidgets.QTableWidget(0, 3)
+        self.table_family_params.setHorizontalHeaderLabels(["Alias", "Actuelle", "Valeurs (a; b ou début:fin:pas)"])
+        self.table_family_params.horizontalHeader().setStretchLastSection(True)
+        self.table_family_params.verticalHeader().setVisible(False)
+        layout.addWidget(self.table_family_params)
+
+        form = QtWidgets.QFormLayout()
+        self.spin_family_workers = QtWidgets.QSpinBox()
+        self.spin_family_workers.setRange(1, max(1, FAMILY_WORKERS * 2))
+        self.spin_family_workers.setValue(FAMILY_WORKERS)
+        form.addRow("Processus de calcul :", self.spin_family_workers)
+        layout.addLayout(form)
+
+        btns = QtWidgets.QHBoxLayout()
+        self.btn_family_quote = QtWidgets.QPushButton("⚡ Chiffrer la famille")
+        self.btn_family_quote.setToolTip(
+            "Géométrie, features, brut et opérations de chaque variante, sur une copie du document.\n"
+            "Réutilisé d'une variante à l'autre : seules les features dont les faces sont\n"
+            "identiques (même géométrie, même position)."
+        )
+        self.btn_family_quote.clicked.connect(self.on_family_quote)
+        btns.addWidget(self.btn_family_quote)
+
+        btn_export = QtWidgets.QPushButton("💾 Exporter (CSV)")
+        btn_export.clicked.connect(self.on_family_export)
+        btns.addWidget(btn_export)
+        layout.addLayout(btns)
+
+        self.lbl_family = QtWidgets.QLabel("")
+        layout.addWidget(self.lbl_family)
+
+        self.table_family = QtWidgets.QTableWidget(0, 0)
+        self.table_family.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table_family.verticalHeader().setVisible(False)
+        layout.addWidget(self.table_family)
+
+        self.family_rows = []
+        self._family_t0 = 0.0
+        self._family_signals = _FamilySignals(self)
+        self._family_signals.progress.connect(self.on_family_progress)
+        self._family_signals.done.connect(self.on_family_done)
+        self.tabs.addTab(tab, "Famille")
+
+    def on_family_parameters(self):
+        doc = FreeCAD.ActiveDocument
+        if not doc:
+            return
+        params = family_parameters(doc)
+        table = self.table_family_params
+        table.setRowCount(len(params))
+        for row, (alias, value) in enumerate(params.items()):
+            for col, text in enumerate((alias, str(value))):
+                item = QtWidgets.QTableWidgetItem(text)
+                item.setFlags(item.flags() & ~QtCore.Qt.ItemIsEditable)
+                table.setItem(row, col, item)
+            table.setItem(row, 2, QtWidgets.QTableWidgetItem(""))
+        if not params:
+            self.lbl_family.setText("Aucune cellule nommée (alias) dans les tableurs du document.")
+
+    def on_family_quote(self):
+        with span("PartCostingPanel.on_family_quote", "ui"):
+            doc = FreeCAD.ActiveDocument
+            if not doc:
+                QtWidgets.QMessageBox.warning(None, "Erreur", "Aucun document actif.")
+                return
+
+            values = {}
+            table = self.table_family_params
+            try:
+                for row in range(table.rowCount()):
+                    item = table.item(row, 2)
+                    parsed = parse_values(item.text() if item else "")
+                    if parsed:
+                        values[table.item(row, 0).text()] = parsed
+            except ValueError as e:
+                QtWidgets.QMessageBox.warning(None, "Erreur", f"Valeurs invalides : {e}")
+                return
+            if not values:
+                QtWidgets.QMessageBox.warning(None, "Erreur", "Saisissez les valeurs d'au moins un paramètre.")
+                return
+
+            material = self.combo_material.currentText() if self.chk_catalog.isChecked() else None
+            workers = self.spin_family_workers.value()
+            self._family_t0 = time.perf_counter()
+
+            python = family_python()
+            if python is None:
+                # sans processus de calcul, les variantes sont évaluées dans
+                # FreeCAD : documents utilisables depuis ce thread seulement
+                def progress(done, total):
+                    self.on_family_progress(done, total)
+                    QtWidgets.QApplication.processEvents()
+
+                self.on_family_done(quote_family(
+                    doc, values, material=material, rate=self._rate(),
+                    workers=workers, progress=progress,
+                ), None)
+                return
+
+            variants = enumerate_variants(values)
+            path = copy_for_family(doc)
+            self.btn_family_quote.setEnabled(False)
+            self.on_family_progress(0, len(variants))
+            QtCore.QThreadPool.globalInstance().start(_FamilyTask(
+                self._family_signals, path, variants, python, material, self._rate(), workers
+            ))
+
+    def on_family_progress(self, done, total):
+        self.lbl_family.setText(f"Variantes chiffrées : {done} / {total}")
+
+    def on_family_done(self, rows, error):
+        self.btn_family_quote.setEnabled(True)
+        if error:
+            self.lbl_family.setText("")
+            QtWidgets.QMessageBox.warning(None, "Erreur", f"Chiffrage de la famille : {error}")
+            return
+        self.family_rows = rows
+        self.lbl_family.setText(
+            f"{len(rows)} variante(s) chiffrée(s) en {time.perf_counter() - self._family_t0:.1f} s"
+        )
+
+        header, lines = family_table(self.family_rows)
+        table = self.table_family
+        table.clear()
+        table.setColumnCount(len(header))
+        table.setHorizontalHeaderLabels(header)
+        table.setRowCount(len(lines))
+        for r, line in enumerate(lines):
+            for c, text in enumerate(line):
+                table.setItem(r, c, QtWidgets.QTableWidgetItem(text))
+        table.resizeColumnsToContents()
+
+    def on_family_export(self):
+        if not self.family_rows:
+            return
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Exporter la famille", "famille.csv", "CSV (*.csv)"
+        )
+        if path:
+            write_family_csv(self.family_rows, path)
+
+    # ==================================================================
+    # ONGLET 5 : DIAGNOSTIC (traces par étape, module tracing)
+    # ==================================================================
+    def _init_tab_trace(self):
+        tab = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(tab)
+
+        opts = QtWidgets.QHBoxLayout()
+        self.chk_trace_profile = QtWidgets.QCheckBox("Profil (cProfile)")
+        self.chk_trace_memory = QtWidgets.QCheckBox("Mémoire (tracemalloc)")
+        opts.addWidget(self.chk_trace_profile)
+        opts.addWidget(self.chk_trace_memory)
+        layout.addLayout(opts)
+
+        btns = QtWidgets.QHBoxLayout()
+        self.btn_trace = QtWidgets.QPushButton("▶ Démarrer la trace")
+        self.btn_trace.setCheckable(True)
+        self.btn_trace.toggled.connect(self.on_trace_toggled)
+        btns.addWidget(self.btn_trace)
+
+        btn_refresh = QtWidgets.QPushButton("🔄 Rafraîchir")
+        btn_refresh.clicked.connect(self.update_trace_view)
+        btns.addWidget(btn_refresh)
+
+        btn_export = QtWidgets.QPushButton("💾 Exporter (Chrome trace)")
+        btn_export.setToolTip("Fichier JSON lisible dans chrome://tracing ou ui.perfetto.dev.")
+        btn_export.clicked.connect(self.on_trace_export)
+        btns.addWidget(btn_export)
+        layout.addLayout(btns)
+
+        self.text_trace = QtWidgets.QPlainTextEdit()
+        self.text_trace.setReadOnly(True)
+        self.text_trace.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        layout.addWidget(self.text_trace)
+
+        self.tabs.addTab(tab, "Diagnostic")
+
+    def on_trace_toggled(self, checked):
+        if checked:
+            TRACER.start(profile=self.chk_trace_profile.isChecked(),
+                         memory=self.chk_trace_memory.isChecked())
+            self.btn_trace.setText("■ Arrêter la trace")
+            self.text_trace.setPlainText("Trace en cours : effectuez le chiffrage puis arrêtez.")
+        else:
+            TRACER.stop()
+            self.btn_trace.setText("▶ Démarrer la trace")
+            self.update_trace_view()
+
+    def update_trace_view(self):
+        txt = TRACER.breakdown_text()
+        report = TRACER.profile_report()
+        if report:
+            txt += "\n\n" + report
+        self.text_trace.setPlainText(txt)
+
+    def on_trace_export(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Exporter la trace", "partcosting_trace.json", "Trace JSON (*.json)"
+        )
+        if path:
+            TRACER.export_chrome(path)
+
     # ==================================================================
     # Gestion des opérations
     # ==================================================================
+    def refresh_operations(self):
+        """Relit les opérations du document actif (sans aucun recalcul)."""
+        doc = FreeCAD.ActiveDocument
+        self.op_model.clear()
+        if doc:
+            self.quote_graph = build_quote_graph(doc, self._rate())
+            self.op_model.add_operations(operation_dict(o) for o in find_operations(doc))
+        else:
+            self.quote_graph = QuoteGraph(self._rate())
+
     def on_add_operation(self):
+        doc = FreeCAD.ActiveDocument
+        if not doc:
+            QtWidgets.QMessageBox.warning(self, "Erreur", "Aucun document actif.")
+            return
         dlg = OperationDialog()
-        if dlg.exec_() == QtWidgets.QDialog.Accepted and dlg.result:
-            op = dlg.result
-            self.operations.append(op)
-            self._add_operation_to_table(op)
-            self.recompute_totals()
-
-    def _add_operation_to_table(self, op):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-
-        item_idx = QtWidgets.QTableWidgetItem(str(row + 1))
-        item_type = QtWidgets.QTableWidgetItem(op.get("type", ""))
-        item_time = QtWidgets.QTableWidgetItem(f"{op.get('time_h', 0.0):.2f}")
-        item_mode = QtWidgets.QTableWidgetItem(op.get("source", ""))
-
-        self.table.setItem(row, 0, item_idx)
-        self.table.setItem(row, 1, item_type)
-        self.table.setItem(row, 2, item_time)
-        self.table.setItem(row, 3, item_mode)
+        if dlg.exec_() == QtWidgets.QDialog.Accepted and dlg.operation:
+            obj = create_operation(doc, dlg.operation, stock=self.selected_stock)
+            add_to_quote_graph(self.quote_graph, obj)
+            self.op_model.add_operation(operation_dict(obj))
+
+    def on_auto_operations(self):
+        """Toutes les opérations de la pièce de référence, chiffrées en une passe."""
+        with span("PartCostingPanel.on_auto_operations", "ui"):
+            doc = FreeCAD.ActiveDocument
+            part = self._find_reference_part()
+            if not doc or part is None:
+                QtWidgets.QMessageBox.warning(self, "Erreur", "Aucune pièce trouvée.")
+                return
+
+            t0 = time.perf_counter()
+            ops, skipped = generate_operations(part, get_library(), self.selected_stock)
+
+            doc.openTransaction("Opérations automatiques")
+            try:
+                objs = [create_operation(doc, op, stock=self.selected_stock) for op in ops]
+            finally:
+                doc.commitTransaction()
+
+            for obj in objs:
+                add_to_quote_graph(self.quote_graph, obj)
+            self.op_model.add_operations(operation_dict(o) for o in objs)
+            elapsed = time.perf_counter() - t0
+
+            msg = f"{len(objs)} opération(s) créée(s) en {elapsed:.1f} s."
+            if skipped:
+                msg += f"\n{len(skipped)} ignorée(s) :\n" + "\n".join(
+                    f"- {op_type} : {reason}" for op_type, reason in skipped
+                )
+            drill = drilling_cycle_time(part, get_library())
+            if drill and drill["holes"]:
+                msg += (f"\nPerçage en cycles ({drill['holes']} trous, {len(drill['groups'])} foret(s)) : "
+                        f"{drill['time_min']:.1f} min dont {drill['travel_min']:.1f} min "
+                        f"de déplacements ({drill['travel_mm'] / 1000:.1f} m).")
+            QtWidgets.QMessageBox.information(self, "Opérations auto", msg)
+
+    def on_remove_operation(self):
+        doc = FreeCAD.ActiveDocument
+        rows = sorted({i.row() for i in self.table.selectionModel().selectedRows()}, reverse=True)
+        for row in rows:
+            name = self.op_model.operations[row].get("object")
+            self.op_model.remove_operation(row)
+            self.quote_graph.remove_operation(name)
+            if doc and name and doc.getObject(name):
+                doc.removeObject(name)
+
+    def on_recompute_operations(self):
+        with span("doc.recompute", "recompute"):
+            doc = FreeCAD.ActiveDocument
+            if doc:
+                doc.recompute()
+
+    def on_operation_changed(self, obj):
+        row = self.op_model.row_of_object(obj.Name)
+        if row >= 0:
+            self.op_model.update_operation(row, operation_dict(obj))
+        if not self._applying_graph:
+            # Recalcul fait par FreeCAD : le graphe reprend le nouveau résultat
+            add_to_quote_graph(self.quote_graph, obj)
+
+    def on_operation_deleted(self, name):
+        self.quote_graph.remove_operation(name)
+        row = self.op_model.row_of_object(name)
+        if row >= 0:
+            self.op_model.remove_operation(row)
 
     # ==================================================================
     # 🛠 Gestion outils
     # ==================================================================
     def on_manage_tools(self):
-        dlg = ToolManagerDialog()
-        dlg.exec_()
+        with span("PartCostingPanel.on_manage_tools", "ui"):
+            dlg = ToolManagerDialog()
+            dlg.exec_()
+
+            doc = FreeCAD.ActiveDocument
+            if not doc:
+                return
+            library = get_library()
+
+            # Nouveaux paramètres outil → seules les opérations en aval sont recalculées
+            graph = self.quote_graph
+            graph.reset_stats()
+            for name in graph.tools_used():
+                tool = library.get(name)
+                if tool is not None:
+                    graph.set_tool(tool)
+            results = {op_id: graph.result(op_id) for op_id in graph.stale_operations()}
+
+            # Opérations déjà à recalculer pour une autre raison (pièce, brut...) :
+            # laissées à doc.recompute()
+            pending = {o.Name for o in find_operations(doc) if "Touched" in o.State}
+
+            sync_tool_parameters(doc, library)
+            self._applying_graph = True
+            try:
+                for op_id, res in results.items():
+                    obj = doc.getObject(op_id)
+                    if obj is None or op_id in pending:
+                        continue
+                    apply_result(obj, res)
+                    obj.purgeTouched()
+            finally:
+                self._applying_graph = False
+
+            if pending:
+                doc.recompute()
+            self.update_cost()
 
     # ==================================================================
     # 🔢 Totaux
     # ==================================================================
     def recompute_totals(self):
-        total_h = 0.0
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 2)
-            if not item:
-                continue
-            try:
-                total_h += float(item.text().replace(",", "."))
-            except Exception:
-                pass
+        """Affiche les totaux tenus à jour par le modèle (pas de parcours du tableau)."""
+        totals = self.op_model.totals
+        self.lbl_total_time.setText(f"Temps total : {totals.total_h:.2f} h")
 
-        self.lbl_total_time.setText(f"Temps total : {total_h:.2f} h")
+        detail = [f"{k} : {v:.2f} h" for k, v in totals.by_type.items() if k]
+        self.lbl_total_detail.setText(" | ".join(detail))
 
+        self.update_cost()
+
+    def _rate(self):
         try:
-            rate = float(self.edit_rate.text().replace(",", "."))
+            return float(self.edit_rate.text().replace(",", "."))
         except Exception:
-            rate = 0.0
-        cost = rate * total_h
+            return 0.0
+
+    def update_cost(self, *_):
+        """Coût total lu dans le graphe : un changement de taux ne réévalue qu'un nœud."""
+        graph = self.quote_graph
+        graph.set_rate(self._rate())
+        cost = graph.total_cost()
         self.lbl_total_cost.setText(f"Coût total : {cost:.2f} €")
+        self.lbl_graph_stats.setText(
+            f"Dernier recalcul : {graph.stats['evaluated']} nœud(s) recalculé(s), "
+            f"{graph.stats['invalidated']} invalidé(s)"
+        )
+
+    def on_rate_changed(self, *_):
+        self.quote_graph.reset_stats()
+        self.update_cost()
+
+    def on_uncertainty(self):
+        """P50 / P90 du coût et sensibilités (costing_core.uncertainty)."""
+        with span("PartCostingPanel.on_uncertainty", "ui"):
+            graph = self.quote_graph
+            graph.set_rate(self._rate())
+            t0 = time.perf_counter()
+            res = graph_uncertainty(graph)
+            elapsed = time.perf_counter() - t0
+
+            if not res["operations"]:
+                self.lbl_uncertainty.setText("Incertitude : aucune opération calculable.")
+                return
+            cost, hours = res["cost"], res["time_h"]
+            sens = sorted(res["sensitivity"].items(), key=lambda kv: abs(kv[1]), reverse=True)
+            self.lbl_uncertainty.setText(
+                f"Coût P50 : {cost['p50']:.2f} € | P90 : {cost['p90']:.2f} € "
+                f"(nominal {res['nominal_cost']:.2f} €)\n"
+                f"Temps P50 : {hours['p50']:.2f} h | P90 : {hours['p90']:.2f} h\n"
+                "Sensibilités : " + ", ".join(f"{k} {v:+.2f}" for k, v in sens) + "\n"
+                f"{res['samples']} tirages × {res['operations']} opérations en {elapsed:.2f} s"
+            )
 
 
 # ======================================================================
@@ -1,6 +1,8 @@
 import FreeCAD
 import Part
 
+from stock_orientation import best_turning_axis, shape_points, turning_axes
+
 
 class StockCreator:
     """
@@ -46,7 +48,7 @@ class StockCreator:
         obj = self.doc.addObject("Part::Feature", "StockBlock")
         obj.Shape = box
         obj.ViewObject.Transparency = transparency
-        self.doc.recompute()
+        self.doc.recompute([obj])
 
         return obj
 
@@ -63,31 +65,34 @@ class StockCreator:
         margin_z_plus,
         transparency=70,
     ):
-        bb = self.shape.BoundBox
-
-        # centre de la pièce
-        cx = (bb.XMin + bb.XMax) / 2.0
-        cy = (bb.YMin + bb.YMax) / 2.0
-        cz = (bb.ZMin + bb.ZMax) / 2.0
-
-        # rayon = diagonale XY/2 + marges max
-        rx = (bb.XMax - bb.XMin) / 2.0 + max(margin_x_minus, margin_x_plus)
-        ry = (bb.YMax - bb.YMin) / 2.0 + max(margin_y_minus, margin_y_plus)
-        radius = max(rx, ry)
-
-        # hauteur = dimension Z + surépaisseurs
-        height = (bb.ZMax - bb.ZMin) + margin_z_minus + margin_z_plus
-
-        # on centre le cylindre par rapport à la pièce en Z
-        z0 = cz - height / 2.0
-
+        # axe de tournage de volume minimal (mêmes candidats que
+        # stock_intelligent.compute_turning_axis) : Ø du cercle minimal de
+        # la section, longueur le long de l'axe, élargis de la flèche de
+        # tessellation
+        points, deflection = shape_points(self.shape)
+        turning = best_turning_axis(points, axes=turning_axes(self.shape))
+
+        # rayon = cercle minimal + marges max ; hauteur = longueur + marges Z
+        # (Z- / Z+ aux extrémités de l'axe, comme create_intelligent_stock)
+        radius = turning.diameter / 2.0 + deflection + max(
+            margin_x_minus, margin_x_plus, margin_y_minus, margin_y_plus
+        )
+        height = turning.length + 2.0 * deflection + margin_z_minus + margin_z_plus
+
+        # repère du cylindre : axe de tournage = axe Z local
+        lows, highs = turning.lows, turning.highs
+        base = (
+            (lows[0] + highs[0]) / 2.0,
+            (lows[1] + highs[1]) / 2.0,
+            lows[2] - deflection - margin_z_minus,
+        )
         cyl = Part.makeCylinder(radius, height)
-        cyl.translate(FreeCAD.Vector(cx, cy, z0))
+        cyl.Placement = turning.placement(base)
 
         obj = self.doc.addObject("Part::Feature", "StockCylinder")
         obj.Shape = cyl
         obj.ViewObject.Transparency = transparency
-        self.doc.recompute()
+        self.doc.recompute([obj])
 
         return obj
 
@@ -113,6 +118,6 @@ class StockCreator:
         obj = self.doc.addObject("Part::Feature", "StockCylinder")
         obj.Shape = cyl
         obj.ViewObject.Transparency = transparency
-        self.doc.recompute()
+        self.doc.recompute([obj])
 
         return obj
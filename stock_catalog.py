@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+stock_catalog.py — Catalogue de bruts standard (tôles, plats, ronds)
+
+Rôle de ce module :
+- Lire un catalogue fournisseur (stock_catalog.csv) : par matière,
+  tôles (épaisseur + format), plats (épaisseur × largeur) et ronds (Ø),
+  avec prix au kg ou au mètre.
+- Indexer les articles par dimensions triées pour trouver par dichotomie
+  le plus petit brut achetable qui contient la pièce + surépaisseurs :
+
+      match = catalog.match((lx, ly, lz), "Aluminium")
+      match.item.sku, match.size, match.mass_kg, match.cost
+
+Les dimensions débitées (longueur de barre, découpe de tôle) sont prises
+à la cote + CUT_ALLOWANCE.
+
+Module volontairement indépendant de FreeCAD.
+"""
+
+import bisect
+import csv
+import hashlib
+import math
+import os
+
+from materials import density
+from tool_library import parse_float
+
+
+STOCK_CSV = os.path.join(os.path.dirname(__file__), "stock_catalog.csv")
+
+PLATE = "Tôle"
+FLAT = "Plat"
+ROUND = "Rond"
+KINDS = (PLATE, FLAT, ROUND)
+
+# Surlongueur de débit (trait de scie + dressage) par dimension coupée (mm)
+CUT_ALLOWANCE = 3.0
+
+CATALOG_COLUMNS = {
+    "sku": ("réf", "ref", "référence", "reference", "sku"),
+    "material": ("matière", "matiere", "material"),
+    "kind": ("forme", "kind"),
+    "dim1": ("dim1", "épaisseur", "epaisseur", "diamètre", "diametre"),
+    "dim2": ("dim2", "largeur", "width"),
+    "length": ("longueur", "length"),
+    "price_kg": ("prix kg", "prix_kg", "price_kg"),
+    "price_m": ("prix m", "prix_m", "price_m"),
+}
+
+
+def _key(text):
+    return (text or "").strip().lower()
+
+
+# ======================================================================
+#  ARTICLES
+# ======================================================================
+
+class StockItem:
+    """
+    Article du catalogue :
+    - Tôle : thickness = épaisseur, (width, length) = format (débit à la cote)
+    - Plat : thickness ≤ width, length = longueur de barre
+    - Rond : thickness = Ø, length = longueur de barre
+    length = 0 → longueur non limitée.
+    """
+
+    __slots__ = ("sku", "material", "kind", "thickness", "width", "length",
+                 "price_kg", "price_m")
+
+    def __init__(self, sku, material, kind, dim1, dim2=0.0, length=0.0,
+                 price_kg=0.0, price_m=0.0):
+        self.sku = sku
+        self.material = material
+        self.kind = kind
+        if kind == FLAT:
+            dim1, dim2 = sorted((dim1, dim2))
+        elif kind == PLATE:
+            dim2, length = sorted((dim2, length))
+        self.thickness = float(dim1)
+        self.width = float(dim2)
+        self.length = float(length)
+        self.price_kg = float(price_kg)
+        self.price_m = float(price_m)
+
+    @property
+    def diameter(self):
+        return self.thickness
+
+    def __repr__(self):
+        return f"StockItem({self.sku!r}, {self.kind}, {self.thickness:g}x{self.width:g})"
+
+
+class StockMatch:
+    """Brut retenu pour une pièce : article, cotes achetées, masse et coût matière."""
+
+    __slots__ = ("item", "axis", "size", "mass_kg", "cost")
+
+    def __init__(self, item, axis, size, mass_kg, cost):
+        self.item = item
+        self.axis = axis        # axe pièce (0=X, 1=Y, 2=Z) : axe de barre / épaisseur de tôle
+        self.size = size        # encombrement (X, Y, Z) du brut acheté
+        self.mass_kg = mass_kg
+        self.cost = cost
+
+    @property
+    def volume(self):
+        if self.item.kind == ROUND:
+            d = self.item.diameter
+            return math.pi * d * d / 4.0 * self.size[self.axis]
+        return self.size[0] * self.size[1] * self.size[2]
+
+    def as_dict(self):
+        return {
+            "sku": self.item.sku,
+            "kind": self.item.kind,
+            "material": self.item.material,
+            "axis": "XYZ"[self.axis],
+            "size": tuple(self.size),
+            "mass_kg": self.mass_kg,
+            "cost": self.cost,
+        }
+
+
+def _priced(item, axis, size, volume_mm3, cut_length):
+    mass = volume_mm3 * 1e-6 * density(item.material)  # mm3 → dm3
+    if item.price_m > 0 and item.kind != PLATE:
+        cost = item.price_m * cut_length / 1000.0
+    else:
+        cost = item.price_kg * mass
+    return StockMatch(item, axis, tuple(size), mass, cost)
+
+
+# ======================================================================
+#  CATALOGUE INDEXÉ
+# ======================================================================
+
+class StockCatalog:
+    """
+    Articles indexés par (matière, forme) :
+    - Rond / Tôle : liste triée par Ø / épaisseur (dichotomie) ;
+    - Plat : épaisseurs triées, puis largeurs triées par épaisseur.
+    """
+
+    def __init__(self, items=()):
+        self.items = []
+        self._index = None
+        self._fingerprint = None
+        self.extend(items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, item):
+        self.items.append(item)
+        self._index = None
+        self._fingerprint = None
+
+    def extend(self, items):
+        self.items.extend(items)
+        self._index = None
+        self._fingerprint = None
+
+    def fingerprint(self):
+        """Empreinte (hex) du contenu : change dès qu'un article change."""
+        if self._fingerprint is None:
+            h = hashlib.sha1()
+            for it in self.items:
+                h.update(repr(tuple(getattr(it, a) for a in StockItem.__slots__)).encode("utf-8"))
+            self._fingerprint = h.hexdigest()[:16]
+        return self._fingerprint
+
+    # ----------------------------------------------------------
+    # Index
+    # ----------------------------------------------------------
+    def _build_index(self):
+        groups = {}
+        for it in self.items:
+            groups.setdefault((_key(it.material), it.kind), []).append(it)
+
+        index = {}
+        for (mat, kind), items in groups.items():
+            if kind == FLAT:
+                by_t = {}
+                for it in items:
+                    by_t.setdefault(it.thickness, []).append(it)
+                ts = sorted(by_t)
+                levels = []
+                for t in ts:
+                    row = sorted(by_t[t], key=lambda it: (it.width, -it.length))
+                    levels.append(([it.width for it in row], row))
+                index[(mat, kind)] = (ts, levels)
+            else:
+                row = sorted(items, key=lambda it: (it.thickness, -it.length))
+                index[(mat, kind)] = ([it.thickness for it in row], row)
+
+        self._index = index
+        return index
+
+    def _entry(self, material, kind):
+        index = self._index or self._build_index()
+        return index.get((_key(material), kind))
+
+    @staticmethod
+    def _fits_length(item, length):
+        return item.length <= 0 or item.length >= length
+
+    # ----------------------------------------------------------
+    # Requêtes par forme
+    # ----------------------------------------------------------
+    def find_round(self, material, diameter, length=0.0):
+        """Plus petit rond de Ø ≥ diameter et de longueur ≥ length."""
+        entry = self._entry(material, ROUND)
+        if entry is None:
+            return None
+        diams, items = entry
+        for it in items[bisect.bisect_left(diams, diameter):]:
+            if self._fits_length(it, length):
+                return it
+        return None
+
+    def find_plate(self, material, thickness, width, length):
+        """Tôle la plus fine d'épaisseur ≥ thickness dont le format contient width × length."""
+        entry = self._entry(material, PLATE)
+        if entry is None:
+            return None
+        width, length = sorted((width, length))
+        ts, items = entry
+        for it in items[bisect.bisect_left(ts, thickness):]:
+            if it.width >= width and self._fits_length(it, length):
+                return it
+        return None
+
+    def find_flat(self, material, thickness, width, length=0.0):
+        """
+        Plat de plus petite section avec épaisseur ≥ thickness et largeur ≥ width.
+        Les épaisseurs sont parcourues par ordre croissant et la recherche
+        s'arrête dès que épaisseur × width dépasse la meilleure section.
+        """
+        entry = self._entry(material, FLAT)
+        if entry is None:
+            return None
+        thickness, width = sorted((thickness, width))
+        ts, levels = entry
+
+        best, best_area = None, math.inf
+        for i in range(bisect.bisect_left(ts, thickness), len(ts)):
+            t = ts[i]
+            if t * width >= best_area:
+                break
+            widths, items = levels[i]
+            for it in items[bisect.bisect_left(widths, width):]:
+                if self._fits_length(it, length):
+                    if t * it.width < best_area:
+                        best, best_area = it, t * it.width
+                    break
+        return best
+
+    # ----------------------------------------------------------
+    # Brut pour une pièce
+    # ----------------------------------------------------------
+    def candidates(self, required, material, kinds=KINDS, round_diameters=None):
+        """
+        Bruts possibles pour un encombrement `required` = (X, Y, Z) (pièce +
+        surépaisseurs), pour chaque forme et chaque axe de barre / d'épaisseur.
+
+        round_diameters : {axe: Ø mini} pour les ronds ; par défaut la
+        diagonale de la section (cercle circonscrit au rectangle).
+        """
+        out = []
+        for k in range(3):
+            i, j = [a for a in range(3) if a != k]
+            ri, rj, rk = required[i], required[j], required[k]
+
+            if ROUND in kinds:
+                d_req = (round_diameters or {}).get(k) or math.hypot(ri, rj)
+                length = rk + CUT_ALLOWANCE
+                it = self.find_round(material, d_req, length)
+                if it is not None:
+                    size = [0.0, 0.0, 0.0]
+                    size[i] = size[j] = it.diameter
+                    size[k] = length
+                    volume = math.pi * it.diameter ** 2 / 4.0 * length
+                    out.append(_priced(it, k, size, volume, length))
+
+            if FLAT in kinds:
+                length = rk + CUT_ALLOWANCE
+                it = self.find_flat(material, ri, rj, length)
+                if it is not None:
+                    size = [0.0, 0.0, 0.0]
+                    size[k] = length
+                    if ri <= rj:
+                        size[i], size[j] = it.thickness, it.width
+                    else:
+                        size[i], size[j] = it.width, it.thickness
+                    out.append(_priced(it, k, size, size[0] * size[1] * size[2], length))
+
+            if PLATE in kinds:
+                ci, cj = ri + CUT_ALLOWANCE, rj + CUT_ALLOWANCE
+                it = self.find_plate(material, rk, ci, cj)
+                if it is not None:
+                    size = [0.0, 0.0, 0.0]
+                    size[i], size[j], size[k] = ci, cj, it.thickness
+                    out.append(_priced(it, k, size, size[0] * size[1] * size[2], 0.0))
+        return out
+
+    def match(self, required, material, kinds=KINDS, round_diameters=None):
+        """Brut le moins cher (puis le plus petit) qui contient `required`, ou None."""
+        cands = self.candidates(required, material, kinds, round_diameters)
+        if not cands:
+            return None
+        return min(cands, key=lambda m: (m.cost, m.volume))
+
+    # ----------------------------------------------------------
+    # CSV
+    # ----------------------------------------------------------
+    def load_csv(self, path):
+        self.items = []
+        self.extend(iter_catalog(path))
+        return self
+
+
+def iter_catalog(path, delimiter=None):
+    """Lit stock_catalog.csv (ou un export fournisseur) ligne par ligne."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        first = f.readline()
+        if delimiter is None:
+            delimiter = ";" if first.count(";") >= first.count(",") else ","
+        f.seek(0)
+        reader = csv.DictReader(f, delimiter=delimiter)
+
+        lowered = {(h or "").strip().lower(): h for h in reader.fieldnames or ()}
+        cols = {}
+        for field, names in CATALOG_COLUMNS.items():
+            for n in names:
+                if n in lowered:
+                    cols[field] = lowered[n]
+                    break
+
+        kinds = {_key(k): k for k in KINDS}
+        for row in reader:
+            kind = kinds.get(_key(row.get(cols.get("kind"), "")))
+            dim1 = parse_float(row.get(cols.get("dim1")))
+            if kind is None or dim1 <= 0:
+                continue
+            yield StockItem(
+                (row.get(cols.get("sku")) or "").strip(),
+                (row.get(cols.get("material")) or "").strip(),
+                kind,
+                dim1,
+                parse_float(row.get(cols.get("dim2"))),
+                parse_float(row.get(cols.get("length"))),
+                parse_float(row.get(cols.get("price_kg"))),
+                parse_float(row.get(cols.get("price_m"))),
+            )
+
+
+# ======================================================================
+#  CATALOGUE PARTAGÉ (relu seulement si le fichier change)
+# ======================================================================
+
+_SHARED = {}  # chemin absolu → (empreinte fichier, StockCatalog)
+
+
+def load_catalog(path=STOCK_CSV, force=False):
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return StockCatalog()
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    cached = _SHARED.get(path)
+    if cached is None or force or cached[0] != stamp:
+        cached = _SHARED[path] = (stamp, StockCatalog().load_csv(path))
+    return cached[1]
@@ -18,19 +18,30 @@ IMPORTANT :
   pas à la saisie.
 
 Ce fichier est volontairement autonome et simple : il expose uniquement
-4 fonctions utilisées par le panel :
+les fonctions utilisées par le panel :
 
     detect_best_stock_type(shape) -> "Block" | "Cylinder"
     compute_auto_margins(shape)   -> dict marges internes
-    compute_best_orientation(shape) -> string ou tuple
-    create_intelligent_stock(shape, margins=None, stock_type=None, name=None)
+    compute_best_orientation(shape) -> OrientedBox (brut de volume minimal)
+    compute_turning_axis(shape)   -> EnclosingCylinder (brut rond minimal)
+    create_intelligent_stock(shape, margins=None, stock_type=None, name=None,
+                             material=None, catalog=None, orientation=None,
+                             turning=None, names=None, recompute=True)
         -> (stock_obj, stock_type, margins, orientation)
+    create_intelligent_stocks(shapes, margins=None, stock_type=None,
+                              material=None, catalog=None)
+        -> [(stock_obj, stock_type, margins, orientation), ...]
+
+ainsi que match_catalog_stock(shape, margins, material) pour le brut
+standard le plus petit du catalogue (stock_catalog) avec son coût matière.
 
 """
 
 import math
 import json
 
+from tracing import span, traced
+
 try:
     import FreeCAD
     import Part
@@ -74,28 +85,40 @@ def _as_dict_margins(margins=None):
     return base
 
 
-def _find_unique_name(doc, base_name):
-    """Trouve un nom unique pour un nouvel objet (StockBlock, StockCylinder...)."""
-    existing = {obj.Name for obj in doc.Objects}
-    if base_name not in existing:
-        return base_name
-    i = 1
-    while True:
-        candidate = f"{base_name}{i}"
-        if candidate not in existing:
-            return candidate
-        i += 1
-
-
-def _label_with_index(doc, prefix):
-    """Propose un Label type 'Brut01', 'Brut02', ..."""
-    existing_labels = [obj.Label for obj in doc.Objects]
-    i = 1
-    while True:
+class NameIndex:
+    """
+    Noms internes et labels déjà pris dans le document, lus une seule fois :
+    la création de N bruts reste linéaire (pas de relecture de doc.Objects
+    ni de recherche dans une liste à chaque brut).
+    """
+
+    def __init__(self, doc):
+        self.names = {obj.Name for obj in doc.Objects}
+        self.labels = {obj.Label for obj in doc.Objects}
+        self._next = {}  # préfixe / base → prochain indice à essayer
+
+    def unique_name(self, base_name):
+        """Nom unique pour un nouvel objet (StockBlock, StockCylinder1...)."""
+        candidate = base_name
+        i = self._next.get(base_name, 0)
+        if i or candidate in self.names:
+            i = max(i, 1)
+            while f"{base_name}{i}" in self.names:
+                i += 1
+            candidate = f"{base_name}{i}"
+        self._next[base_name] = i + 1
+        self.names.add(candidate)
+        return candidate
+
+    def label(self, prefix):
+        """Label type 'Brut01', 'Brut02', ..."""
+        i = self._next.get(("label", prefix), 1)
+        while f"{prefix}{i:02d}" in self.labels:
+            i += 1
         lbl = f"{prefix}{i:02d}"
-        if lbl not in existing_labels:
-            return lbl
-        i += 1
+        self._next[("label", prefix)] = i + 1
+        self.labels.add(lbl)
+        return lbl
 
 
 # ======================================================================
@@ -106,29 +129,18 @@ def detect_best_stock_type(shape):
     """
     Retourne "Block" ou "Cylinder" en fonction de la géométrie.
 
-    Heuristique simple :
-    - Si X et Y proches, Z comparable, on peut proposer "Cylinder".
-    - Sinon "Block".
-
-    Cette logique est volontairement simple et robuste.
+    Compare le volume du plus petit brut rond (compute_turning_axis :
+    cercle minimal de la section) à celui du plus petit bloc
+    (compute_best_orientation) et retient le moins volumineux.
     """
     bb = _get_bb(shape)
-
-    lx = bb.XLength
-    ly = bb.YLength
-    lz = bb.ZLength
-
-    if lx <= 0 or ly <= 0 or lz <= 0:
+    if bb.XLength <= 0 or bb.YLength <= 0 or bb.ZLength <= 0:
         return "Block"
 
-    # Ratio X/Y
-    ratio_xy = abs(lx - ly) / max(lx, ly)
-
-    # Si X et Y très proches (±10%) et Z raisonnablement proportionné → Cylindre possible
-    if ratio_xy < 0.10:
-        # si Z n'est pas ridicule par rapport à X/Y
-        if lz > min(lx, ly) * 0.3:
-            return "Cylinder"
+    turning = _cached_stock_frame(shape, "turning", lambda: compute_turning_axis(shape))
+    box = _cached_stock_frame(shape, "orientation::", lambda: compute_best_orientation(shape))
+    if turning.volume < box.volume:
+        return "Cylinder"
 
     # Dans le doute → Block
     return "Block"
@@ -158,23 +170,147 @@ def compute_auto_margins(shape):
     return margins
 
 
-def compute_best_orientation(shape):
+@traced("stock")
+def compute_turning_axis(shape):
     """
-    Détermine une orientation "logique" du brut.
+    Brut rond de volume minimal (stock_orientation.best_turning_axis) :
+    EnclosingCylinder dont l'axe (3e ligne de `rotation`) est l'axe de
+    tournage et dont le Ø est celui du cercle minimal de la section.
 
-    Pour l'instant :
-    - On se contente de dire "Z up (pièce telle quelle)".
-    - Plus tard on pourra analyser les faces pour proposer une orientation d'usinage.
+    Axes essayés : X, Y, Z, axes principaux, axes des faces cylindriques
+    et normales des grandes faces planes.
     """
-    # Placeholder simple
-    return "Z+ up (orientation par défaut)"
+    from stock_orientation import best_turning_axis, shape_points, turning_axes
+
+    points, deflection = shape_points(shape)
+    cyl = best_turning_axis(points, axes=turning_axes(shape))
+    cyl.lows -= deflection
+    cyl.highs += deflection
+    return cyl
+
+
+@traced("stock")
+def compute_best_orientation(shape, objective=None):
+    """
+    Orientation du brut bloc de volume minimal (stock_orientation) :
+    OrientedBox dont les lignes de `rotation` sont les axes X, Y, Z du brut
+    et lows / highs l'encombrement de la pièce dans ce repère.
+
+    objective : fonction optionnelle size(3,) → coût (ex : prix catalogue)
+    pour choisir le brut le moins cher plutôt que le plus petit.
+
+    La pièce reste telle quelle (axes X/Y/Z) si aucune rotation ne fait
+    gagner au moins 1 % ; la bbox exacte est alors utilisée.
+    """
+    from stock_orientation import best_oriented_box, shape_points, up_axes
+
+    points, deflection = shape_points(shape)
+    obox = best_oriented_box(points, objective=objective, up_axes=up_axes(shape))
+
+    if obox.is_axis_aligned():
+        bb = _get_bb(shape)
+        obox.lows[:] = (bb.XMin, bb.YMin, bb.ZMin)
+        obox.highs[:] = (bb.XMax, bb.YMax, bb.ZMax)
+    else:
+        # sommets tessellés : la surface réelle peut dépasser de la flèche
+        obox.lows -= deflection
+        obox.highs += deflection
+    return obox
+
+
+def _cached_stock_frame(shape, section, compute):
+    """OrientedBox / EnclosingCylinder relu dans le dépôt d'analyses (analysis_store)."""
+    from analysis_store import cached_section
+    from stock_orientation import OrientedBox
+
+    return cached_section(shape, section, compute, OrientedBox.as_dict, OrientedBox.from_dict)
 
 
 # ======================================================================
 #  CREATION BRUT INTELLIGENT
 # ======================================================================
 
-def create_intelligent_stock(shape, margins=None, stock_type=None, name=None):
+def _required_size(part_size, margins):
+    return tuple(
+        part_size[axis] + margins[f"{n}_minus"] + margins[f"{n}_plus"]
+        for axis, n in enumerate("xyz")
+    )
+
+
+def _margins_key(margins):
+    return ",".join(f"{margins[k]:g}" for k in sorted(margins))
+
+
+def _catalog_kinds(stock_type):
+    from stock_catalog import FLAT, KINDS, PLATE, ROUND
+    return {"Block": (PLATE, FLAT), "Cylinder": (ROUND,)}.get(stock_type, KINDS)
+
+
+def _radial_margin(margins):
+    return max(margins["x_minus"], margins["x_plus"], margins["y_minus"], margins["y_plus"])
+
+
+def match_catalog_stock(shape, margins=None, material="Acier", stock_type=None,
+                        catalog=None, orientation=None, turning=None):
+    """
+    Brut standard du catalogue (stock_catalog) qui contient la pièce +
+    surépaisseurs : StockMatch (article, cotes, masse, coût) ou None.
+
+    stock_type : "Block" (tôles, plats), "Cylinder" (ronds) ou None (tous).
+    orientation : OrientedBox (compute_best_orientation) ; None → axes pièce.
+    turning : EnclosingCylinder (compute_turning_axis) ; si renseigné, les
+    ronds sont cherchés dans son repère (axe de barre = son axe, axis == 2)
+    avec le Ø du cercle minimal.
+    """
+    from stock_catalog import ROUND, load_catalog
+
+    catalog = catalog if catalog is not None else load_catalog()
+    margins = _as_dict_margins(margins)
+    if orientation is not None:
+        part_size = tuple(orientation.size)
+    else:
+        bb = _get_bb(shape)
+        part_size = (bb.XLength, bb.YLength, bb.ZLength)
+
+    kinds = _catalog_kinds(stock_type)
+    if turning is None or ROUND not in kinds:
+        return catalog.match(_required_size(part_size, margins), material, kinds)
+
+    cands = catalog.candidates(
+        _required_size(part_size, margins), material, tuple(k for k in kinds if k != ROUND)
+    )
+    diameter = turning.diameter + 2.0 * _radial_margin(margins)
+    cands += [
+        m for m in catalog.candidates(
+            _required_size(tuple(turning.size), margins), material, (ROUND,),
+            round_diameters={2: diameter},
+        )
+        if m.axis == 2
+    ]
+    if not cands:
+        return None
+    return min(cands, key=lambda m: (m.cost, m.volume))
+
+
+def _stock_extent(lows, highs, margins, size):
+    """
+    Encombrement (min, max) par axe d'un brut de cotes `size` autour de la
+    pièce (lows / highs dans le repère du brut) : la surlongueur par rapport
+    à pièce + marges est répartie de part et d'autre.
+    """
+    extent = []
+    for axis, name in enumerate("xyz"):
+        lo = lows[axis] - margins[f"{name}_minus"]
+        hi = highs[axis] + margins[f"{name}_plus"]
+        extra = max(0.0, size[axis] - (hi - lo)) * 0.5
+        extent.append((lo - extra, hi + extra))
+    return extent
+
+
+@traced("stock")
+def create_intelligent_stock(shape, margins=None, stock_type=None, name=None,
+                             material=None, catalog=None, orientation=None, turning=None,
+                             names=None, recompute=True):
     """
     Crée un brut FreeCAD autour de la shape.
 
@@ -183,13 +319,29 @@ def create_intelligent_stock(shape, margins=None, stock_type=None, name=None):
     shape : Part.Shape
         Géométrie de la pièce.
     margins : dict or None
-        Surépaisseurs internes à utiliser.
+        Surépaisseurs internes à utiliser (le long des axes du brut).
         Si None → compute_auto_margins(shape).
     stock_type : str or None
         "Block" ou "Cylinder".
-        Si None → detect_best_stock_type(shape).
+        Si None → detect_best_stock_type(shape) (ou forme du catalogue).
     name : str or None
         Nom interne FreeCAD (Name), si None → généré.
+    material : str or None
+        Si renseigné : brut standard du catalogue (stock_catalog) pour cette
+        matière ; les cotes sont celles de l'article acheté et les marges
+        retournées sont les surépaisseurs réelles.
+    catalog : StockCatalog or None
+        Catalogue à utiliser (par défaut stock_catalog.csv).
+    orientation : OrientedBox or None
+        Repère du brut ; si None → compute_best_orientation(shape)
+        (brut le moins cher du catalogue si `material` est renseigné).
+    turning : EnclosingCylinder or None
+        Axe et Ø du brut rond ; si None → compute_turning_axis(shape)
+        (calculé seulement si un brut rond est possible).
+    names : NameIndex or None
+        Index des noms / labels du document (partagé par create_intelligent_stocks).
+    recompute : bool
+        Si False, le brut n'est pas recalculé (fait par l'appelant).
 
     Retourne
     --------
@@ -198,7 +350,8 @@ def create_intelligent_stock(shape, margins=None, stock_type=None, name=None):
     - stock_obj : l'objet FreeCAD créé (Part::Box ou Part::Cylinder).
     - stock_type : "Block" ou "Cylinder".
     - margins : dict complet des marges utilisées.
-    - orientation : string (pour affichage dans le panel).
+    - orientation : OrientedBox, ou EnclosingCylinder pour un brut rond
+      (str() pour affichage dans le panel).
     """
     if FreeCAD is None or Part is None:
         raise RuntimeError("Ce module doit être exécuté dans FreeCAD (FreeCAD/Part introuvables).")
@@ -207,64 +360,118 @@ def create_intelligent_stock(shape, margins=None, stock_type=None, name=None):
     if doc is None:
         doc = FreeCAD.newDocument("PartCosting")
 
-    bb = _get_bb(shape)
     margins = _as_dict_margins(margins)
-    if stock_type is None:
-        stock_type = detect_best_stock_type(shape)
+    if names is None:
+        names = NameIndex(doc)
 
-    orientation = compute_best_orientation(shape)
+    if orientation is None:
+        if material:
+            from stock_catalog import load_catalog
 
-    # ------------------------------------------------------------------
-    #  BRUT BLOC
-    # ------------------------------------------------------------------
-    if stock_type == "Cylinder":
-        # On crée un cylindre englobant, axe Z
-        # Diamètre : max(X,Y) + 2 * marge_max_xy
-        max_xy = max(bb.XLength, bb.YLength)
-        marge_xy = max(
-            margins["x_minus"], margins["x_plus"],
-            margins["y_minus"], margins["y_plus"],
+            cat = catalog if catalog is not None else load_catalog()
+            kinds = _catalog_kinds(stock_type)
+
+            def objective(part_size):
+                m = cat.match(_required_size(part_size, margins), material, kinds)
+                return m.cost if m is not None else math.inf
+
+            # le repère le moins cher dépend aussi des marges et du catalogue
+            section = (f"orientation:{material}:{stock_type or ''}:"
+                       f"{_margins_key(margins)}:{cat.fingerprint()}")
+        else:
+            objective = None
+            section = f"orientation::{stock_type or ''}"
+
+        orientation = _cached_stock_frame(
+            shape, section, lambda: compute_best_orientation(shape, objective),
         )
-        dia = max_xy + 2.0 * marge_xy
-        length = bb.ZLength + margins["z_minus"] + margins["z_plus"]
 
-        # Centre XY = centre de la bounding box de la pièce
-        cx = (bb.XMin + bb.XMax) * 0.5
-        cy = (bb.YMin + bb.YMax) * 0.5
+    # Encombrement de la pièce dans le repère du brut
+    lows, highs = tuple(orientation.lows), tuple(orientation.highs)
+    part_size = tuple(orientation.size)
+    frame = orientation.placement()
+
+    if turning is None and stock_type != "Block":
+        turning = _cached_stock_frame(shape, "turning", lambda: compute_turning_axis(shape))
+
+    match = None
+    if material:
+        match = match_catalog_stock(shape, margins, material, stock_type, catalog,
+                                    orientation, turning)
+        if match is None:
+            FreeCAD.Console.PrintWarning(
+                f"[PartCosting] Aucun brut standard {material} assez grand : "
+                "brut aux cotes pièce + surépaisseurs.\n"
+            )
+        else:
+            from stock_catalog import ROUND
+            stock_type = "Cylinder" if match.item.kind == ROUND else "Block"
 
-        # Base du cylindre : on descend de z_minus
-        z0 = bb.ZMin - margins["z_minus"]
+    if stock_type is None:
+        # comme detect_best_stock_type, avec les bruts déjà calculés
+        stock_type = "Cylinder" if turning.volume < orientation.volume else "Block"
 
-        obj_name = _find_unique_name(doc, "StockCylinder")
+    # ------------------------------------------------------------------
+    #  BRUT ROND
+    # ------------------------------------------------------------------
+    if stock_type == "Cylinder":
+        # Repère du brut rond : axe de tournage = axe Z local
+        lows, highs = tuple(turning.lows), tuple(turning.highs)
+        frame = turning.placement()
+        orientation = turning
+        if match is not None:
+            axis = match.axis
+            size = match.size
+        else:
+            # Cylindre englobant : Ø du cercle minimal + 2 * marge_max_xy
+            axis = 2
+            dia = turning.diameter + 2.0 * _radial_margin(margins)
+            size = (dia, dia, turning.length + margins["z_minus"] + margins["z_plus"])
+
+        extent = _stock_extent(lows, highs, margins, size)
+        base = [(lo + hi) * 0.5 for lo, hi in extent]
+        base[axis] = extent[axis][0]
+
+        obj_name = name or names.unique_name("StockCylinder")
         stock = doc.addObject("Part::Cylinder", obj_name)
-        stock.Radius = dia * 0.5
-        stock.Height = length
-        stock.Placement.Base = FreeCAD.Vector(cx - stock.Radius, cy - stock.Radius, z0)
-
-        label = _label_with_index(doc, "BrutRond_")
+        stock.Radius = max(size[(axis + 1) % 3], size[(axis + 2) % 3]) * 0.5
+        stock.Height = size[axis]
+        # Part::Cylinder : axe Z, base centrée sur Placement.Base
+        if axis == 0:
+            rot = FreeCAD.Rotation(FreeCAD.Vector(0, 1, 0), 90)
+        elif axis == 1:
+            rot = FreeCAD.Rotation(FreeCAD.Vector(1, 0, 0), -90)
+        else:
+            rot = FreeCAD.Rotation()
+        stock.Placement = frame.multiply(FreeCAD.Placement(FreeCAD.Vector(*base), rot))
+
+        label = names.label("BrutRond_")
         stock.Label = label
 
+    # ------------------------------------------------------------------
+    #  BRUT BLOC
+    # ------------------------------------------------------------------
     else:
-        # Bloc rectangulaire englobant
-        lx = bb.XLength + margins["x_minus"] + margins["x_plus"]
-        ly = bb.YLength + margins["y_minus"] + margins["y_plus"]
-        lz = bb.ZLength + margins["z_minus"] + margins["z_plus"]
+        size = match.size if match is not None else _required_size(part_size, margins)
+        extent = _stock_extent(lows, highs, margins, size)
 
-        # Origine du bloc : on étend la bbox en négatif selon les marges -
-        x0 = bb.XMin - margins["x_minus"]
-        y0 = bb.YMin - margins["y_minus"]
-        z0 = bb.ZMin - margins["z_minus"]
-
-        obj_name = _find_unique_name(doc, "StockBlock")
+        obj_name = name or names.unique_name("StockBlock")
         stock = doc.addObject("Part::Box", obj_name)
-        stock.Length = lx
-        stock.Width = ly
-        stock.Height = lz
-        stock.Placement.Base = FreeCAD.Vector(x0, y0, z0)
-
-        label = _label_with_index(doc, "BrutBloc_")
+        stock.Length = size[0]
+        stock.Width = size[1]
+        stock.Height = size[2]
+        # Origine du bloc : coin min (pièce étendue selon les marges)
+        corner = FreeCAD.Vector(*(lo for lo, _ in extent))
+        stock.Placement = frame.multiply(FreeCAD.Placement(corner, FreeCAD.Rotation()))
+
+        label = names.label("BrutBloc_")
         stock.Label = label
 
+    # Surépaisseurs réelles (cotes standard ≥ pièce + marges demandées)
+    for axis, n in enumerate("xyz"):
+        margins[f"{n}_minus"] = lows[axis] - extent[axis][0]
+        margins[f"{n}_plus"] = extent[axis][1] - highs[axis]
+
     # ------------------------------------------------------------------
     #  METADONNÉES (pour liaison ultérieure avec PartCosting)
     # ------------------------------------------------------------------
@@ -289,9 +496,68 @@ def create_intelligent_stock(shape, margins=None, stock_type=None, name=None):
                               "Orientation utilisée pour générer le brut.")
         stock.PC_Orientation = str(orientation)
 
+        if match is not None:
+            for prop, ptype, doc_txt, value in (
+                ("PC_StockRef", "App::PropertyString", "Référence catalogue du brut.", match.item.sku),
+                ("PC_StockMassKg", "App::PropertyFloat", "Masse du brut acheté (kg).", match.mass_kg),
+                ("PC_StockCost", "App::PropertyFloat", "Coût matière du brut (€).", match.cost),
+            ):
+                if not hasattr(stock, prop):
+                    stock.addProperty(ptype, prop, "PartCosting", doc_txt)
+                setattr(stock, prop, value)
+
     except Exception:
         # En cas d'environnement sans App::Property* (tests), on ignore
         pass
 
-    doc.recompute()
+    if recompute:
+        with span("doc.recompute", "recompute", objects=1):
+            doc.recompute([stock])
     return stock, stock_type, margins, orientation
+
+
+@traced("stock")
+def create_intelligent_stocks(shapes, margins=None, stock_type=None, material=None,
+                              catalog=None):
+    """
+    Crée les bruts de plusieurs pièces (famille de pièces) en une seule
+    transaction (une seule annulation) : index des noms / labels construit
+    une fois, recalcul limité aux bruts créés.
+
+    shapes : liste de Part.Shape.
+    margins : dict commun ou None → compute_auto_margins(shape) par pièce.
+
+    Retourne la liste des tuples de create_intelligent_stock, dans l'ordre.
+    """
+    if FreeCAD is None or Part is None:
+        raise RuntimeError("Ce module doit être exécuté dans FreeCAD (FreeCAD/Part introuvables).")
+
+    doc = FreeCAD.ActiveDocument
+    if doc is None:
+        doc = FreeCAD.newDocument("PartCosting")
+
+    if material:
+        from stock_catalog import load_catalog
+        catalog = catalog if catalog is not None else load_catalog()
+
+    names = NameIndex(doc)
+    results = []
+    doc.openTransaction("Bruts automatiques")
+    try:
+        for shape in shapes:
+            results.append(create_intelligent_stock(
+                shape,
+                margins=margins if margins is not None else compute_auto_margins(shape),
+                stock_type=stock_type,
+                material=material,
+                catalog=catalog,
+                names=names,
+                recompute=False,
+            ))
+    finally:
+        doc.commitTransaction()
+
+    if results:
+        with span("doc.recompute", "recompute", objects=len(results)):
+            doc.recompute([r[0] for r in results])
+    return results
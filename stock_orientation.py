@@ -0,0 +1,521 @@
+# -*- coding: utf-8 -*-
+"""
+stock_orientation.py — Orientation du brut de volume minimal
+
+Recherche de la boîte englobante orientée (brut bloc) la plus petite :
+
+1. réduction du nuage (sommets de la pièce tessellée, échantillonnés) à
+   ses points d'appui : points extrêmes dans une centaine de directions,
+   c'est-à-dire des sommets de l'enveloppe convexe ;
+2. orientations candidates :
+   - les 24 orientations alignées sur les axes,
+   - les axes principaux (ACP),
+   - pour chaque axe "haut" (X, Y, Z, axes ACP, normales de faces) : les directions des arêtes
+     de l'enveloppe convexe projetée (pieds à coulisse tournants) ;
+3. évaluation vectorisée (numpy) de toutes les candidates sur les points
+   d'appui, puis calcul exact sur tout le nuage pour les meilleures
+   (tableau (3, n) : une passe par candidate).
+
+La boîte retenue (OrientedBox) donne le repère local du brut : axes,
+étendues et placement FreeCAD. L'orientation alignée sur les axes est
+conservée tant qu'une rotation ne fait pas gagner au moins MIN_GAIN.
+
+Brut rond : best_turning_axis cherche l'axe de tournage dont le cylindre
+englobant (cercle minimal de Welzl sur la section projetée) est le plus
+petit.
+
+Module indépendant de FreeCAD (sauf OrientedBox.placement() et les axes
+des faces d'une shape, up_axes / turning_axes).
+"""
+
+import itertools
+import math
+import random
+
+import numpy as np
+
+
+# Taille de l'échantillon utilisé pour la recherche des candidates
+SAMPLE_MAX = 16384
+# Directions pour les points d'appui (demi-sphère ; ± par max / min)
+SUPPORT_DIRS = 128
+# Candidates réévaluées exactement sur tout le nuage
+EXACT_CANDIDATES = 3
+# Points de départ du cercle minimal (échantillon du nuage)
+SUPPORT_SAMPLE = 1024
+# Gain mini (relatif) pour abandonner l'orientation d'origine
+MIN_GAIN = 0.01
+
+
+# ======================================================================
+#  BOÎTE ORIENTÉE
+# ======================================================================
+
+class OrientedBox:
+    """
+    Boîte englobante orientée.
+
+    rotation : matrice 3×3 dont les lignes sont les axes locaux (repère
+    direct) exprimés dans le repère pièce ; lows / highs : étendues du
+    nuage le long de ces axes.
+    """
+
+    __slots__ = ("rotation", "lows", "highs", "label")
+
+    def __init__(self, rotation, lows, highs, label=""):
+        self.rotation = np.asarray(rotation, dtype=float)
+        self.lows = np.asarray(lows, dtype=float)
+        self.highs = np.asarray(highs, dtype=float)
+        self.label = label
+
+    @property
+    def size(self):
+        return self.highs - self.lows
+
+    @property
+    def volume(self):
+        return float(np.prod(self.size))
+
+    def as_dict(self):
+        return {
+            "kind": type(self).__name__,
+            "rotation": self.rotation.tolist(),
+            "lows": self.lows.tolist(),
+            "highs": self.highs.tolist(),
+            "label": self.label,
+        }
+
+    @staticmethod
+    def from_dict(data):
+        cls = EnclosingCylinder if data.get("kind") == "EnclosingCylinder" else OrientedBox
+        return cls(data["rotation"], data["lows"], data["highs"], data.get("label", ""))
+
+    def is_axis_aligned(self, tol=1e-9):
+        return bool(np.allclose(self.rotation, np.eye(3), atol=tol))
+
+    def to_world(self, local):
+        """Coordonnées locales → repère pièce."""
+        return self.rotation.T @ np.asarray(local, dtype=float)
+
+    def placement(self, local_base=(0.0, 0.0, 0.0)):
+        """FreeCAD.Placement du repère local (origine = local_base en coordonnées locales)."""
+        import FreeCAD
+
+        m = self.rotation.T
+        matrix = FreeCAD.Matrix(
+            m[0, 0], m[0, 1], m[0, 2], 0.0,
+            m[1, 0], m[1, 1], m[1, 2], 0.0,
+            m[2, 0], m[2, 1], m[2, 2], 0.0,
+            0.0, 0.0, 0.0, 1.0,
+        )
+        base = self.to_world(local_base)
+        return FreeCAD.Placement(FreeCAD.Vector(*base), FreeCAD.Rotation(matrix))
+
+    def __str__(self):
+        sx, sy, sz = self.size
+        if self.is_axis_aligned():
+            return f"Z+ up (orientation par défaut) — {sx:.1f} × {sy:.1f} × {sz:.1f} mm"
+        return f"{self.label} — {sx:.1f} × {sy:.1f} × {sz:.1f} mm"
+
+
+class EnclosingCylinder(OrientedBox):
+    """
+    Cylindre englobant : axe = 3e ligne de `rotation` ; section (lows[0:2],
+    highs[0:2]) = carré circonscrit au cercle minimal, lows[2] / highs[2] =
+    étendue le long de l'axe.
+    """
+
+    __slots__ = ()
+
+    @property
+    def diameter(self):
+        return float(self.highs[0] - self.lows[0])
+
+    @property
+    def length(self):
+        return float(self.highs[2] - self.lows[2])
+
+    @property
+    def volume(self):
+        return math.pi * self.diameter ** 2 / 4.0 * self.length
+
+    def __str__(self):
+        return f"Axe de tournage {self.label} — Ø {self.diameter:.1f} × {self.length:.1f} mm"
+
+
+# ======================================================================
+#  RÉDUCTION DU NUAGE
+# ======================================================================
+
+def _sphere_dirs(n):
+    """n directions réparties sur la demi-sphère (spirale de Fibonacci)."""
+    i = np.arange(n) + 0.5
+    z = 1.0 - i / n
+    r = np.sqrt(1.0 - z * z)
+    phi = math.pi * (1.0 + math.sqrt(5.0)) * i
+    return np.column_stack((r * np.cos(phi), r * np.sin(phi), z))
+
+
+def _as_columns(points):
+    """Nuage (n, 3) → tableau (3, n) contigu (réductions par ligne rapides)."""
+    return np.ascontiguousarray(np.asarray(points, dtype=float).T)
+
+
+def support_points(cols, n_dirs=SUPPORT_DIRS):
+    """
+    Sous-ensemble des sommets de l'enveloppe convexe : points extrêmes du
+    nuage cols (3, n) dans n_dirs directions. Retourne un tableau (3, k).
+    """
+    proj = _sphere_dirs(n_dirs) @ cols
+    idx = np.unique(np.concatenate((proj.argmax(axis=1), proj.argmin(axis=1))))
+    return cols[:, idx]
+
+
+def _hull_2d(pts):
+    """Enveloppe convexe 2D (chaîne monotone) ; pts : (n, 2) → sommets ordonnés."""
+    pts = np.unique(np.round(pts, 9), axis=0)
+    if len(pts) < 3:
+        return pts
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    rows = pts.tolist()
+    lower, upper = [], []
+    for p in rows:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    for p in reversed(rows):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return np.array(lower[:-1] + upper[:-1])
+
+
+def _prefilter_2d(pts, n_dirs=16):
+    """
+    Écarte les points strictement intérieurs au polygone formé par les
+    points extrêmes dans n_dirs directions (Akl-Toussaint) : ils ne peuvent
+    pas être sur l'enveloppe convexe. pts : (n, 2).
+    """
+    if len(pts) <= 4 * n_dirs:
+        return pts
+    angles = np.arange(n_dirs) * (2.0 * math.pi / n_dirs)
+    dirs = np.column_stack((np.cos(angles), np.sin(angles)))
+    idx = (dirs @ pts.T).argmax(axis=1)
+    _, first = np.unique(idx, return_index=True)
+    poly = pts[idx[np.sort(first)]]  # sommets dans l'ordre trigonométrique
+    if len(poly) < 3:
+        return pts
+    inside = np.ones(len(pts), dtype=bool)
+    for a, b in zip(poly, np.roll(poly, -1, axis=0)):
+        inside &= (b[0] - a[0]) * (pts[:, 1] - a[1]) - (b[1] - a[1]) * (pts[:, 0] - a[0]) > 0
+    return pts[~inside]
+
+
+# ======================================================================
+#  CERCLE MINIMAL (WELZL)
+# ======================================================================
+
+def _circle_2(a, b):
+    cx, cy = (a[0] + b[0]) * 0.5, (a[1] + b[1]) * 0.5
+    return cx, cy, math.hypot(a[0] - cx, a[1] - cy)
+
+
+def _circle_3(a, b, c):
+    """Cercle circonscrit ; points alignés → cercle des deux plus éloignés."""
+    bx, by = b[0] - a[0], b[1] - a[1]
+    cx, cy = c[0] - a[0], c[1] - a[1]
+    d = 2.0 * (bx * cy - by * cx)
+    if abs(d) < 1e-12:
+        return max((_circle_2(a, b), _circle_2(a, c), _circle_2(b, c)), key=lambda k: k[2])
+    b2 = bx * bx + by * by
+    c2 = cx * cx + cy * cy
+    ux = (cy * b2 - by * c2) / d
+    uy = (bx * c2 - cx * b2) / d
+    return a[0] + ux, a[1] + uy, math.hypot(ux, uy)
+
+
+def _welzl(rows, eps, seed=0):
+    """Welzl incrémental sur une liste de points [x, y] (mélangée sur place)."""
+    random.Random(seed).shuffle(rows)
+
+    def inside(c, p):
+        return math.hypot(p[0] - c[0], p[1] - c[1]) <= c[2] + eps
+
+    c = (rows[0][0], rows[0][1], 0.0)
+    for i, p in enumerate(rows):
+        if inside(c, p):
+            continue
+        c = (p[0], p[1], 0.0)
+        for j in range(i):
+            q = rows[j]
+            if inside(c, q):
+                continue
+            c = _circle_2(p, q)
+            for k in range(j):
+                if not inside(c, rows[k]):
+                    c = _circle_3(p, q, rows[k])
+    return c
+
+
+def min_enclosing_circle(points, seed=0):
+    """
+    Plus petit cercle (cx, cy, r) contenant les points (n, 2).
+
+    Algorithme de Welzl sous forme incrémentale (points mélangés, cercle
+    reconstruit seulement quand un point en sort : temps linéaire en
+    moyenne), appliqué à l'enveloppe convexe d'un échantillon ; les points
+    du nuage encore hors du cercle (test vectorisé) sont ajoutés et le
+    calcul repris jusqu'à ce que tout le nuage soit contenu.
+    """
+    pts = np.asarray(points, dtype=float)
+    if len(pts) == 0:
+        return 0.0, 0.0, 0.0
+    eps = max(float(np.ptp(pts, axis=0).max()), 1.0) * 1e-9
+
+    step = len(pts) // SUPPORT_SAMPLE + 1
+    rows = _hull_2d(_prefilter_2d(pts[::step])).tolist()
+    while True:
+        c = _welzl(rows, eps, seed)
+        dist = np.hypot(pts[:, 0] - c[0], pts[:, 1] - c[1])
+        out = np.flatnonzero(dist > c[2] + eps)
+        if len(out) == 0:
+            return c
+        # les plus éloignés d'abord
+        far = out[np.argsort(dist[out])[::-1][:SUPPORT_SAMPLE]]
+        rows += pts[far].tolist()
+
+
+# ======================================================================
+#  ORIENTATIONS CANDIDATES
+# ======================================================================
+
+def _right_handed(r):
+    r = np.array(r, dtype=float)
+    if np.linalg.det(r) < 0:
+        r[2] = -r[2]
+    return r
+
+
+def axis_aligned_rotations():
+    """Les 24 rotations qui permutent les axes (identité en premier)."""
+    out = []
+    for perm in itertools.permutations(range(3)):
+        for signs in itertools.product((1, -1), repeat=3):
+            r = np.zeros((3, 3))
+            for row, (axis, sign) in enumerate(zip(perm, signs)):
+                r[row, axis] = sign
+            if np.linalg.det(r) > 0:
+                out.append(r)
+    return out
+
+
+def pca_rotation(cols):
+    centered = cols - cols.mean(axis=1, keepdims=True)
+    _, vecs = np.linalg.eigh(centered @ centered.T)
+    return _right_handed(vecs.T[::-1])  # axe principal en premier
+
+
+def _plane_basis(up):
+    """Repère direct (e1, e2, up) avec up normé."""
+    up = np.asarray(up, dtype=float)
+    up = up / np.linalg.norm(up)
+    helper = np.array([1.0, 0.0, 0.0]) if abs(up[0]) < 0.9 else np.array([0.0, 1.0, 0.0])
+    e1 = np.cross(up, helper)
+    e1 /= np.linalg.norm(e1)
+    return e1, np.cross(up, e1), up
+
+
+def caliper_rotations(cols, up):
+    """
+    Rotations d'axe "haut" `up` dont le 1er axe est parallèle à une arête de
+    l'enveloppe convexe des points cols (3, n) projetés sur le plan ⟂ up.
+    """
+    e1, e2, up = _plane_basis(up)
+
+    hull = _hull_2d((np.vstack((e1, e2)) @ cols).T)
+    if len(hull) < 3:
+        return []
+    edges = np.roll(hull, -1, axis=0) - hull
+    # une boîte est invariante par rotation de 90° : angle modulo π/2
+    angles = np.unique(np.round(np.mod(np.arctan2(edges[:, 1], edges[:, 0]), math.pi / 2), 9))
+
+    out = []
+    for a in angles:
+        u = math.cos(a) * e1 + math.sin(a) * e2
+        out.append(_right_handed((u, np.cross(up, u), up)))
+    return out
+
+
+# ======================================================================
+#  RECHERCHE
+# ======================================================================
+
+def _extents(rotation, cols):
+    local = rotation @ cols
+    return local.min(axis=1), local.max(axis=1)
+
+
+def _support_sizes(rotations, support):
+    local = rotations @ support
+    return local.max(axis=2) - local.min(axis=2)
+
+
+def best_oriented_box(points, objective=None, up_axes=(), min_gain=MIN_GAIN):
+    """
+    Boîte orientée de volume minimal contenant `points` (n, 3).
+
+    objective : fonction optionnelle size(3,) → coût (ex : prix du brut
+    catalogue) pour départager les meilleures candidates ; par défaut le volume.
+    up_axes : axes "haut" supplémentaires à essayer (ex : normales des
+    grandes faces planes de la pièce).
+    """
+    cols = _as_columns(points)
+    score = objective or (lambda size: float(np.prod(size)))
+
+    # Recherche sur un échantillon (pas régulier), réduit à ses points d'appui
+    step = cols.shape[1] // SAMPLE_MAX + 1
+    sample = cols[:, ::step]
+    support = support_points(sample)
+    pca = pca_rotation(sample)
+
+    rotations = axis_aligned_rotations()
+    labels = ["Axes pièce"] * len(rotations)
+    rotations.append(pca)
+    labels.append("Axes principaux (ACP)")
+    ups = [("X", np.eye(3)[0]), ("Y", np.eye(3)[1]), ("Z", np.eye(3)[2]),
+           ("ACP 1", pca[0]), ("ACP 2", pca[1]), ("ACP 3", pca[2])]
+    ups += [("face", np.asarray(u, dtype=float)) for u in up_axes]
+    for name, up in ups:
+        cal = caliper_rotations(support, up)
+        rotations.extend(cal)
+        labels.extend([f"Pieds à coulisse ⟂ {name}"] * len(cal))
+    rotations = np.array(rotations)
+
+    # Classement vectorisé sur les points d'appui : (m, 3, 3) @ (3, k)
+    sizes = _support_sizes(rotations, support)
+
+    # Raffinement : pieds à coulisse autour des axes de la meilleure candidate
+    first = rotations[int(np.argmin(np.prod(sizes, axis=1)))]
+    extra = [r for up in first for r in caliper_rotations(support, up)]
+    if extra:
+        extra = np.array(extra)
+        rotations = np.concatenate((rotations, extra))
+        sizes = np.concatenate((sizes, _support_sizes(extra, support)))
+        labels.extend(["Pieds à coulisse (raffinement)"] * len(extra))
+    volumes = np.prod(sizes, axis=1)
+
+    # Meilleures candidates distinctes (les 24 orientations alignées sont
+    # équivalentes) + orientation d'origine, évaluées exactement
+    chosen, seen = [0], set()
+    for i in np.argsort(volumes, kind="stable"):
+        key = tuple(np.round(np.sort(sizes[i]), 6))
+        if key in seen:
+            continue
+        seen.add(key)
+        if i != 0:
+            chosen.append(int(i))
+        if len(chosen) > EXACT_CANDIDATES:
+            break
+
+    exact = [(cols.min(axis=1), cols.max(axis=1)) if i == 0 else _extents(rotations[i], cols)
+             for i in chosen]
+    scores = [score(hi - lo) for lo, hi in exact]
+
+    best = int(np.argmin(scores))
+    if scores[0] <= scores[best] * (1.0 + min_gain):
+        best = 0  # orientation d'origine
+
+    i = chosen[best]
+    lows, highs = exact[best]
+    return OrientedBox(rotations[i], lows, highs, labels[i])
+
+
+def _enclosing_cylinder(rotation, cols, label):
+    local = rotation @ cols
+    cx, cy, r = min_enclosing_circle(local[:2].T)
+    axial = local[2]
+    return EnclosingCylinder(
+        rotation,
+        (cx - r, cy - r, axial.min()),
+        (cx + r, cy + r, axial.max()),
+        label,
+    )
+
+
+def best_turning_axis(points, axes=()):
+    """
+    Axe de tournage du brut rond de volume minimal contenant `points` (n, 3) :
+    EnclosingCylinder (cercle minimal de la section × longueur).
+
+    Axes essayés : X, Y, Z, axes principaux (ACP) et `axes` (ex : axes des
+    faces cylindriques, normales des grandes faces). Classement sur un
+    échantillon, calcul exact sur tout le nuage pour les meilleurs ;
+    l'ordre X, Y, Z est conservé à volume égal (± MIN_GAIN).
+    """
+    cols = _as_columns(points)
+    step = cols.shape[1] // SAMPLE_MAX + 1
+    sample = cols[:, ::step]
+    pca = pca_rotation(sample)
+
+    cands = [("Z", np.eye(3)[2]), ("X", np.eye(3)[0]), ("Y", np.eye(3)[1]),
+             ("ACP 1", pca[0]), ("ACP 2", pca[1]), ("ACP 3", pca[2])]
+    cands += [("pièce", np.asarray(a, dtype=float)) for a in axes]
+    frames = [(name, np.array(_plane_basis(a))) for name, a in cands]
+
+    approx = [_enclosing_cylinder(r, sample, name).volume for name, r in frames]
+    order = np.argsort(approx, kind="stable")[:EXACT_CANDIDATES]
+
+    best = None
+    for i in sorted(order):
+        name, r = frames[i]
+        cyl = _enclosing_cylinder(r, cols, name)
+        if best is None or cyl.volume < best.volume * (1.0 - MIN_GAIN):
+            best = cyl
+    return best
+
+
+def shape_points(shape, deflection=None):
+    """
+    Sommets de la shape tessellée (n, 3) et flèche de tessellation utilisée.
+    Les boîtes calculées sur ces points sont à élargir de cette flèche.
+    """
+    if deflection is None:
+        bb = shape.BoundBox
+        deflection = max(bb.DiagonalLength * 1e-3, 1e-3)
+    verts, _ = shape.tessellate(deflection)
+    pts = [(v.x, v.y, v.z) for v in verts]
+    pts += [(v.X, v.Y, v.Z) for v in shape.Vertexes]
+    return np.array(pts, dtype=float), deflection
+
+
+def _largest_faces(shape, surface, count):
+    faces = [f for f in shape.Faces if isinstance(f.Surface, surface)]
+    faces.sort(key=lambda f: f.Area, reverse=True)
+    return faces[:count]
+
+
+def up_axes(shape, count=6):
+    """Normales des plus grandes faces planes (axes "haut" candidats)."""
+    import Part
+
+    out = []
+    for f in _largest_faces(shape, Part.Plane, count):
+        n = f.normalAt(0.5, 0.5)
+        out.append((n.x, n.y, n.z))
+    return out
+
+
+def turning_axes(shape, count=6):
+    """
+    Axes de tournage candidats de la pièce (pour best_turning_axis) : axes
+    des plus grandes faces cylindriques puis normales des grandes faces
+    planes.
+    """
+    import Part
+
+    axes = [(f.Surface.Axis.x, f.Surface.Axis.y, f.Surface.Axis.z)
+            for f in _largest_faces(shape, Part.Cylinder, count)]
+    return axes + up_axes(shape, count)
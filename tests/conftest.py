@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Modules du workbench importables depuis les tests (racine du dépôt)."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
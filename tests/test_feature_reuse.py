@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Réutilisation des features entre variantes (analysis_store.feature_key).
+
+Le premier test n'utilise que le dépôt : les « faces » sont des objets
+minimaux exposant ce que lit brep_key. Le second chiffre deux variantes
+d'une vraie pièce et demande FreeCAD.
+"""
+
+import pytest
+
+import analysis_store
+
+
+class _Bound:
+    XMin = YMin = ZMin = 0.0
+    XMax = YMax = ZMax = 1.0
+
+
+class _Face:
+    """Face réduite à son BREP (clé) et à l'empreinte de mass_properties."""
+
+    Solids = Faces = Vertexes = ()
+    BoundBox = _Bound()
+
+    def __init__(self, brep):
+        self.brep = brep
+
+    def hashCode(self):
+        return id(self)
+
+    def exportBrepToString(self):
+        return self.brep
+
+
+class _PartObject:
+    """Objet du document réduit à sa Shape (generate_operations)."""
+
+    def __init__(self, shape):
+        self.Shape = shape
+
+
+@pytest.fixture
+def store(tmp_path):
+    analysis_store.use_store(str(tmp_path))
+    yield analysis_store.get_store()
+    analysis_store.use_store(None)
+
+
+def test_unchanged_feature_served_from_store(store):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"depth": 5.0, "area": 100.0}
+
+    # variante 1 : poche (faces a, b) analysée
+    pocket = [_Face("a"), _Face("b")]
+    value, reused = analysis_store.cached_feature_section(pocket, "geometry:Poche", compute)
+    assert (value, reused) == ({"depth": 5.0, "area": 100.0}, False)
+
+    # variante 2 : mêmes faces (autres objets, autre ordre) → relue
+    same = [_Face("b"), _Face("a")]
+    value, reused = analysis_store.cached_feature_section(same, "geometry:Poche", compute)
+    assert (value, reused) == ({"depth": 5.0, "area": 100.0}, True)
+    assert len(calls) == 1
+
+    # feature modifiée → recalculée
+    changed = [_Face("a"), _Face("c")]
+    _, reused = analysis_store.cached_feature_section(changed, "geometry:Poche", compute)
+    assert not reused
+    assert len(calls) == 2
+    # références gardées : pas de réemploi d'id (hashCode) entre faces
+    del pocket, same, changed
+
+
+def test_generate_operations_reuses_unchanged_pocket(store):
+    FreeCAD = pytest.importorskip("FreeCAD")
+    import Part
+
+    from auto_ops import generate_operations
+    from tool_library import Tool, ToolLibrary
+
+    library = ToolLibrary([
+        Tool("F10", 10.0, 3, 200.0, 0.05, type="Fraise"),
+        Tool("S50", 50.0, 5, 300.0, 0.1, type="Surfaceuse"),
+    ])
+
+    def variant(length):
+        # poche 30 × 20 × 5 près de l'origine : inchangée quand la longueur varie
+        block = Part.makeBox(length, 60.0, 20.0)
+        pocket = Part.makeBox(30.0, 20.0, 5.0, FreeCAD.Vector(10.0, 10.0, 15.0))
+        return _PartObject(block.cut(pocket))
+
+    stats = {}
+    generate_operations(variant(100.0), library, stats=stats)
+    assert stats["features"] > 0 and stats["reused"] == 0
+
+    generate_operations(variant(150.0), library, stats=stats)
+    assert 0 < stats["reused"] < stats["features"]
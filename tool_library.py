@@ -0,0 +1,505 @@
+# -*- coding: utf-8 -*-
+"""
+tool_library.py — Bibliothèque d'outils indexée pour PartCosting Pro
+
+Rôle de ce module :
+- Stocker les outils (Ø, Z, Vc, Fz, type, matière) sous forme d'objets typés.
+- Précalculer les colonnes dérivées (rpm et Vf aux Vc/Fz nominaux).
+- Maintenir des index triés par diamètre (global, par type, par matière)
+  pour des requêtes par plage en O(log n + k) :
+
+      lib.find(diam_min=8, diam_max=12, type="Fraise", z_min=3)
+
+- Importer en flux des catalogues fournisseurs (50k lignes et plus).
+- Sauver / recharger un instantané binaire compact (chargement rapide).
+
+Module volontairement indépendant de FreeCAD.
+"""
+
+import bisect
+import csv
+import os
+import struct
+from array import array
+
+from chip_calc import compute_rpm, compute_feed
+
+
+# ======================================================================
+#  COLONNES RECONNUES DANS LES CSV (tools.csv + catalogues fournisseurs)
+# ======================================================================
+
+CATALOG_COLUMNS = {
+    "name": ("name", "nom", "designation", "désignation", "reference", "référence", "ref"),
+    "diam": ("diam", "diameter", "diametre", "diamètre", "d", "dc", "ø"),
+    "z": ("z", "z_teeth", "teeth", "flutes", "nof", "dents"),
+    "vc": ("vc",),
+    "fz": ("fz",),
+    "type": ("type", "category", "categorie", "catégorie"),
+    "material": ("material", "matiere", "matière", "iso"),
+}
+
+SNAPSHOT_MAGIC = b"PCTL"
+SNAPSHOT_VERSION = 1
+
+
+def parse_float(text, default=0.0):
+    """Convertit une chaîne en float, en acceptant les virgules."""
+    if text is None:
+        return default
+    s = str(text).strip()
+    if not s:
+        return default
+    s = s.replace(",", ".")
+    try:
+        return float(s)
+    except Exception:
+        return default
+
+
+def _key(text):
+    """Clé normalisée pour les index type / matière."""
+    return (text or "").strip().lower()
+
+
+# ======================================================================
+#  OUTIL
+# ======================================================================
+
+class Tool:
+    """
+    Outil de fraisage avec colonnes dérivées précalculées.
+
+    Reste lisible comme l'ancien dict (tool["diam"], tool.get("vc"))
+    pour le code existant.
+    """
+
+    __slots__ = ("name", "diam", "z", "vc", "fz", "type", "material", "rpm", "vf")
+
+    def __init__(self, name, diam, z, vc, fz, type="", material=""):
+        self.name = name
+        self.diam = float(diam)
+        self.z = int(z)
+        self.vc = float(vc)
+        self.fz = float(fz)
+        self.type = type or ""
+        self.material = material or ""
+
+        # Colonnes dérivées aux conditions nominales
+        self.rpm = float(compute_rpm(self.vc, self.diam))
+        self.vf = float(compute_feed(self.rpm, self.z, self.fz))
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def as_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return f"Tool({self.name!r}, Ø{self.diam:g}, Z{self.z})"
+
+
+# ======================================================================
+#  BIBLIOTHÈQUE
+# ======================================================================
+
+class ToolLibrary:
+    """
+    Bibliothèque d'outils.
+
+    - self.by_name : dict nom → Tool (accès exact O(1))
+    - ordre d'insertion conservé (= ordre des lignes affichées), ligne
+      d'un nom en O(1) (dict nom → ligne tenu à jour)
+    - index triés par diamètre reconstruits à la demande après modification
+    """
+
+    def __init__(self, tools=()):
+        self.by_name = {}
+        self._tools = []
+        self._rows = {}    # nom → ligne dans _tools
+        self._names = None
+        self._index = None
+        self.version = 0
+        self.extend(tools)
+
+    # ----------------------------------------------------------
+    # Accès
+    # ----------------------------------------------------------
+    def __len__(self):
+        return len(self._tools)
+
+    def __iter__(self):
+        return iter(self._tools)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def at(self, row):
+        return self._tools[row]
+
+    def row_of(self, name):
+        return self._rows.get(name, -1)
+
+    def names(self):
+        """Tuple des noms (mis en cache jusqu'à la prochaine modification)."""
+        if self._names is None:
+            self._names = tuple(t.name for t in self._tools)
+        return self._names
+
+    # ----------------------------------------------------------
+    # Modifications
+    # ----------------------------------------------------------
+    def _touch(self):
+        self._names = None
+        self._index = None
+        self.version += 1
+
+    def add(self, tool):
+        if tool.name in self.by_name:
+            raise ValueError(f"Outil déjà existant : {tool.name}")
+        self.by_name[tool.name] = tool
+        self._rows[tool.name] = len(self._tools)
+        self._tools.append(tool)
+        self._touch()
+
+    def replace(self, name, tool):
+        """Remplace l'outil `name` (le nom peut changer) en gardant sa ligne."""
+        old = self.by_name.get(name)
+        if old is None:
+            raise KeyError(name)
+        if tool.name != name and tool.name in self.by_name:
+            raise ValueError(f"Outil déjà existant : {tool.name}")
+        row = self._rows.pop(name)
+        del self.by_name[name]
+        self.by_name[tool.name] = tool
+        self._rows[tool.name] = row
+        self._tools[row] = tool
+        self._touch()
+        return row
+
+    def remove(self, name):
+        del self.by_name[name]
+        row = self._rows.pop(name)
+        del self._tools[row]
+        # les lignes suivantes remontent d'un cran
+        rows, tools = self._rows, self._tools
+        for i in range(row, len(tools)):
+            rows[tools[i].name] = i
+        self._touch()
+        return row
+
+    def extend(self, tools):
+        """Ajout en masse (les doublons remplacent l'existant), un seul réindexage."""
+        by_name, rows, lst = self.by_name, self._rows, self._tools
+        for tool in tools:
+            row = rows.get(tool.name)
+            by_name[tool.name] = tool
+            if row is None:
+                rows[tool.name] = len(lst)
+                lst.append(tool)
+            else:
+                lst[row] = tool
+        self._touch()
+
+    def clear(self):
+        self.by_name.clear()
+        self._rows.clear()
+        del self._tools[:]
+        self._touch()
+
+    # ----------------------------------------------------------
+    # Index triés par diamètre
+    # ----------------------------------------------------------
+    def _build_index(self, order=None):
+        if order is None:
+            order = sorted(self._tools, key=lambda t: t.diam)
+        index = {None: (order, [t.diam for t in order])}
+
+        groups = {}
+        for t in order:
+            groups.setdefault(("type", _key(t.type)), []).append(t)
+            groups.setdefault(("material", _key(t.material)), []).append(t)
+        for k, tools in groups.items():
+            index[k] = (tools, [t.diam for t in tools])
+
+        self._index = index
+        return index
+
+    def find(self, diam_min=None, diam_max=None, type=None, material=None, z_min=None):
+        """
+        Outils dont le Ø est dans [diam_min, diam_max], triés par Ø croissant.
+
+        La plage est trouvée par dichotomie dans l'index le plus sélectif
+        (type, sinon matière, sinon global) ; les autres critères filtrent
+        uniquement les k résultats.
+        """
+        index = self._index or self._build_index()
+
+        if type is not None:
+            entry = index.get(("type", _key(type)))
+        elif material is not None:
+            entry = index.get(("material", _key(material)))
+        else:
+            entry = index[None]
+        if entry is None:
+            return []
+
+        tools, diams = entry
+        lo = 0 if diam_min is None else bisect.bisect_left(diams, diam_min)
+        hi = len(diams) if diam_max is None else bisect.bisect_right(diams, diam_max)
+
+        out = []
+        mat = _key(material) if (material is not None and type is not None) else None
+        for t in tools[lo:hi]:
+            if z_min is not None and t.z < z_min:
+                continue
+            if mat is not None and _key(t.material) != mat:
+                continue
+            out.append(t)
+        return out
+
+    # ----------------------------------------------------------
+    # CSV
+    # ----------------------------------------------------------
+    def load_csv(self, path):
+        """Recharge la bibliothèque depuis un CSV (remplace le contenu)."""
+        self.clear()
+        self.extend(iter_catalog(path))
+        return self
+
+    def save_csv(self, path):
+        save_csv_atomic(path, self._tools)
+
+    # ----------------------------------------------------------
+    # Instantané binaire
+    # ----------------------------------------------------------
+    def save_snapshot(self, path):
+        """
+        Format : en-tête PCTL + version + n, puis colonnes numériques
+        (array) et colonnes texte (UTF-8 séparées par NUL).
+        L'ordre trié par Ø est stocké pour éviter le tri au chargement.
+        """
+        tools = self._tools
+        pos = {id(t): i for i, t in enumerate(tools)}
+        order, _ = (self._index or self._build_index())[None]
+
+        with open(path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack("<HI", SNAPSHOT_VERSION, len(tools)))
+            for col in ("diam", "vc", "fz", "rpm", "vf"):
+                array("d", (getattr(t, col) for t in tools)).tofile(f)
+            array("i", (t.z for t in tools)).tofile(f)
+            array("i", (pos[id(t)] for t in order)).tofile(f)
+            for col in ("name", "type", "material"):
+                blob = "\x00".join(getattr(t, col) for t in tools).encode("utf-8")
+                f.write(struct.pack("<I", len(blob)))
+                f.write(blob)
+
+    @classmethod
+    def load_snapshot(cls, path):
+        with open(path, "rb") as f:
+            if f.read(4) != SNAPSHOT_MAGIC:
+                raise ValueError(f"Instantané outils invalide : {path}")
+            version, n = struct.unpack("<HI", f.read(6))
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Version d'instantané non supportée : {version}")
+
+            cols = {}
+            for col in ("diam", "vc", "fz", "rpm", "vf"):
+                cols[col] = array("d")
+                cols[col].fromfile(f, n)
+            cols["z"] = array("i")
+            cols["z"].fromfile(f, n)
+            order = array("i")
+            order.fromfile(f, n)
+            for col in ("name", "type", "material"):
+                (size,) = struct.unpack("<I", f.read(4))
+                text = f.read(size).decode("utf-8")
+                cols[col] = text.split("\x00") if n else []
+
+        lib = cls()
+        new = Tool.__new__
+        tools = lib._tools
+        for row in zip(*(cols[col] for col in Tool.__slots__)):
+            t = new(Tool)
+            (t.name, t.diam, t.z, t.vc, t.fz, t.type, t.material, t.rpm, t.vf) = row
+            tools.append(t)
+        lib.by_name.update(zip(cols["name"], tools))
+        lib._rows.update((name, i) for i, name in enumerate(cols["name"]))
+        lib._touch()
+
+        # Ordre trié repris tel quel (pas de tri au chargement)
+        lib._build_index([lib._tools[i] for i in order])
+        return lib
+
+
+def save_csv_atomic(path, tools):
+    """
+    Écrit un CSV d'outils de façon atomique : fichier temporaire dans le même
+    dossier puis os.replace, pour qu'un autre poste ne lise jamais un fichier
+    à moitié écrit.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(["Name", "Diam", "Z", "Vc", "Fz", "Type", "Material"])
+            for t in tools:
+                writer.writerow([t.name, t.diam, t.z, t.vc, t.fz, t.type, t.material])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# ======================================================================
+#  DÉPÔT PARTAGÉ : UNE BIBLIOTHÈQUE PAR FICHIER, UN PARSE PAR VERSION
+# ======================================================================
+
+_SHARED = {}  # chemin absolu → [empreinte fichier, ToolLibrary]
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _shared_entry(path):
+    path = os.path.abspath(path)
+    entry = _SHARED.get(path)
+    if entry is None:
+        entry = _SHARED[path] = [None, ToolLibrary()]
+    return path, entry
+
+
+def shared_library(path):
+    """Bibliothèque partagée associée à `path` (créée vide, sans lecture)."""
+    return _shared_entry(path)[1][1]
+
+
+def open_library(path, force=False):
+    """
+    Bibliothèque partagée de `path`, relue seulement si le fichier a changé
+    (mtime / taille) ou si force=True. L'objet retourné est toujours le même :
+    les références gardées par les dialogues restent valides.
+    """
+    path, entry = _shared_entry(path)
+    stamp = _file_stamp(path)
+    if stamp is not None and (force or entry[0] != stamp):
+        entry[1].load_csv(path)
+        entry[0] = stamp
+    return entry[1]
+
+
+def library_stale(path):
+    """True si `path` a changé depuis la dernière lecture / écriture de sa bibliothèque."""
+    path, entry = _shared_entry(path)
+    stamp = _file_stamp(path)
+    return stamp is not None and entry[0] != stamp
+
+
+def save_library(path):
+    """Écrit la bibliothèque partagée de `path` et mémorise la nouvelle version."""
+    path, entry = _shared_entry(path)
+    entry[1].save_csv(path)
+    entry[0] = _file_stamp(path)
+
+
+# ======================================================================
+#  IMPORT EN FLUX (tools.csv, catalogues fournisseurs)
+# ======================================================================
+
+def _sniff_delimiter(line):
+    return ";" if line.count(";") >= line.count(",") else ","
+
+
+def _map_columns(fieldnames, columns=None):
+    """Associe les en-têtes du fichier aux champs Tool (insensible à la casse)."""
+    aliases = dict(CATALOG_COLUMNS)
+    if columns:
+        for field, header in columns.items():
+            aliases[field] = (header.lower(),)
+
+    lowered = {(h or "").strip().lower(): h for h in fieldnames or ()}
+    mapping = {}
+    for field, names in aliases.items():
+        for n in names:
+            if n in lowered:
+                mapping[field] = lowered[n]
+                break
+    return mapping
+
+
+def iter_catalog(path, columns=None, delimiter=None):
+    """
+    Générateur de Tool lus ligne par ligne (mémoire constante).
+
+    columns : dict optionnel champ → en-tête, ex {"diam": "DC mm"}
+    delimiter : ";" ou "," ; détecté sur la première ligne si None.
+    Les lignes invalides sont signalées et ignorées.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if delimiter is None:
+            delimiter = _sniff_delimiter(f.readline())
+            f.seek(0)
+
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        mapping = _map_columns(header, columns)
+        if "name" not in mapping or "diam" not in mapping:
+            print(f"[PartCosting] ⚠️ Colonnes Nom/Diam introuvables dans {path}")
+            return
+
+        pos = {field: header.index(h) for field, h in mapping.items()}
+        width = len(header)
+
+        for line_no, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+
+            name = row[pos["name"]].strip()
+            if not name:
+                continue
+            try:
+                yield Tool(
+                    name,
+                    parse_float(row[pos["diam"]]),
+                    int(parse_float(row[pos["z"]], 0)) if "z" in pos else 0,
+                    parse_float(row[pos["vc"]]) if "vc" in pos else 0.0,
+                    parse_float(row[pos["fz"]]) if "fz" in pos else 0.0,
+                    row[pos["type"]].strip() if "type" in pos else "",
+                    row[pos["material"]].strip() if "material" in pos else "",
+                )
+            except Exception as e:
+                print(f"[PartCosting] Erreur dans {os.path.basename(path)} ligne {line_no}: {e}")
+
+
+def import_catalog(library, path, columns=None, delimiter=None):
+    """Importe un catalogue fournisseur dans `library` ; retourne le nombre d'outils lus."""
+    count = 0
+
+    def _counted(tools):
+        nonlocal count
+        for t in tools:
+            count += 1
+            yield t
+
+    library.extend(_counted(iter_catalog(path, columns, delimiter)))
+    return count
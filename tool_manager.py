@@ -1,8 +1,139 @@
-import csv
-import os
+from PySide2 import QtWidgets, QtCore
+from machining_tools import (
+    get_library, load_tools, save_tools, import_tools,
+    add_tool, update_tool, remove_tool, watch_library, has_unsaved_changes,
+)
+from tool_library import Tool, parse_float
 
-from PySide2 import QtWidgets, QtCore, QtGui
-from machining_tools import get_all_tool_names, get_tool, TOOLS, load_tools
+
+# ======================================================================
+# Modèle Qt directement branché sur la bibliothèque d'outils
+# ======================================================================
+class ToolTableModel(QtCore.QAbstractTableModel):
+    """
+    Vue tabulaire de la ToolLibrary (pas de copie des outils).
+
+    Les modifications passent par add_tool / update_tool / remove_tool
+    (machining_tools : base SQLite si active, puis bibliothèque) ; le modèle
+    est enregistré auprès de machining_tools (watch_library), qui émet les
+    signaux de la seule ligne concernée, y compris pour les lignes modifiées
+    par d'autres postes (refresh_tools). Les relectures complètes
+    (tools.csv modifié, base, import) réinitialisent le modèle.
+    """
+
+    COLUMNS = (
+        ("Nom", "name"),
+        ("Diam", "diam"),
+        ("Z", "z"),
+        ("Vc", "vc"),
+        ("Fz", "fz"),
+        ("Type", "type"),
+        ("Matière", "material"),
+    )
+
+    def __init__(self, library, parent=None):
+        super().__init__(parent)
+        self.library = library
+        watch_library(self)
+
+    # ----- Lecture -----
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.library)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        tool = self.library.at(index.row())
+        value = getattr(tool, self.COLUMNS[index.column()][1])
+
+        if role == QtCore.Qt.DisplayRole:
+            return str(value)
+        if role == QtCore.Qt.UserRole:
+            # valeur brute pour le tri numérique
+            return value
+        if role == QtCore.Qt.TextAlignmentRole and not isinstance(value, str):
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def tool_at(self, row):
+        return self.library.at(row)
+
+    # ----- Modifications incrémentales -----
+    # Nom refusé ou écriture en base échouée : exception levée avant toute
+    # modification de la bibliothèque, aucun signal émis
+    def add_tool(self, tool):
+        add_tool(tool)
+
+    def update_tool(self, name, tool):
+        update_tool(name, tool)
+
+    def remove_tool(self, name):
+        if name in self.library:
+            remove_tool(name)
+
+    # ----- Signaux d'une ligne (machining_tools._row_change) -----
+    def begin_row_change(self, kind, row):
+        if kind == "insert":
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        elif kind == "remove":
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+
+    def end_row_change(self, kind, row):
+        if kind == "insert":
+            self.endInsertRows()
+        elif kind == "remove":
+            self.endRemoveRows()
+        else:
+            self.dataChanged.emit(
+                self.index(row, 0), self.index(row, len(self.COLUMNS) - 1)
+            )
+
+
+# ======================================================================
+# Filtre de recherche : nom, type, matière ou diamètre (valeur ou plage "8-12")
+# ======================================================================
+class ToolFilterProxy(QtCore.QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._text = ""
+        self._diam = None
+        self.setSortRole(QtCore.Qt.UserRole)
+
+    def set_search(self, text):
+        text = text.strip().lower()
+        self._text = text
+        self._diam = None
+
+        lo, sep, hi = text.partition("-")
+        if sep and lo and hi:
+            a, b = parse_float(lo, None), parse_float(hi, None)
+            if a is not None and b is not None:
+                self._diam = (min(a, b), max(a, b))
+        elif text:
+            d = parse_float(text, None)
+            if d is not None:
+                self._diam = (d, d)
+
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._text:
+            return True
+        tool = self.sourceModel().tool_at(source_row)
+
+        if self._diam is not None:
+            return self._diam[0] <= tool.diam <= self._diam[1]
+
+        return (self._text in tool.name.lower() or self._text in tool.type.lower()
+                or self._text in tool.material.lower())
 
 
 class ToolManagerDialog(QtWidgets.QDialog):
@@ -16,14 +147,26 @@ class ToolManagerDialog(QtWidgets.QDialog):
         layout = QtWidgets.QVBoxLayout(self)
 
         # ==================================================================
-        # Tableau des outils
+        # Recherche
         # ==================================================================
-        self.table = QtWidgets.QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(
-            ["Nom", "Diam", "Z", "Vc", "Fz", "Type"]
-        )
+        self.edit_search = QtWidgets.QLineEdit()
+        self.edit_search.setPlaceholderText("Rechercher : nom, type, Ø (ex : 10 ou 8-12)")
+        layout.addWidget(self.edit_search)
+
+        # ==================================================================
+        # Tableau des outils (modèle / vue)
+        # ==================================================================
+        self.model = ToolTableModel(get_library(), self)
+        self.proxy = ToolFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(-1, QtCore.Qt.AscendingOrder)
         self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.setSelectionBehavior(QtWidgets.QTableWidget.SelectRows)
+        self.table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
 
         layout.addWidget(self.table)
@@ -37,12 +180,14 @@ class ToolManagerDialog(QtWidgets.QDialog):
         self.btn_edit = QtWidgets.QPushButton("Modifier")
         self.btn_delete = QtWidgets.QPushButton("Supprimer")
         self.btn_reload = QtWidgets.QPushButton("Recharger")
+        self.btn_import = QtWidgets.QPushButton("Importer CSV…")
         self.btn_save = QtWidgets.QPushButton("Enregistrer CSV")
 
         btn_layout.addWidget(self.btn_add)
         btn_layout.addWidget(self.btn_edit)
         btn_layout.addWidget(self.btn_delete)
         btn_layout.addWidget(self.btn_reload)
+        btn_layout.addWidget(self.btn_import)
         btn_layout.addWidget(self.btn_save)
 
         layout.addLayout(btn_layout)
@@ -50,35 +195,46 @@ class ToolManagerDialog(QtWidgets.QDialog):
         # ==================================================================
         # Connexions
         # ==================================================================
+        self.edit_search.textChanged.connect(self.proxy.set_search)
+        self.table.doubleClicked.connect(lambda _index: self.edit_tool())
         self.btn_add.clicked.connect(self.add_tool)
         self.btn_edit.clicked.connect(self.edit_tool)
         self.btn_delete.clicked.connect(self.delete_tool)
-        self.btn_reload.clicked.connect(self.reload_table)
+        self.btn_reload.clicked.connect(self.reload_from_disk)
+        self.btn_import.clicked.connect(self.import_csv)
         self.btn_save.clicked.connect(self.save_csv)
 
-        # ==================================================================
-        # Charger outils
-        # ==================================================================
-        self.reload_table()
-
     # ======================================================================
-    # Chargement du tableau
+    # Rechargement
     # ======================================================================
-    def reload_table(self):
-        self.table.setRowCount(0)
-        load_tools()
-
-        for name in get_all_tool_names():
-            tool = get_tool(name)
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-
-            self.table.setItem(row, 0, QtWidgets.QTableWidgetItem(name))
-            self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(str(tool.get("diam", ""))))
-            self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(str(tool.get("z", ""))))
-            self.table.setItem(row, 3, QtWidgets.QTableWidgetItem(str(tool.get("vc", ""))))
-            self.table.setItem(row, 4, QtWidgets.QTableWidgetItem(str(tool.get("fz", ""))))
-            self.table.setItem(row, 5, QtWidgets.QTableWidgetItem(tool.get("type", "")))
+    def reload_from_disk(self):
+        """Relit tools.csv ou la base (les modifications CSV non enregistrées sont perdues)."""
+        if has_unsaved_changes():
+            confirm = QtWidgets.QMessageBox.question(
+                self, "Recharger",
+                "Des modifications ne sont pas enregistrées dans tools.csv. Les abandonner ?"
+            )
+            if confirm != QtWidgets.QMessageBox.Yes:
+                return
+        load_tools(force=True)
+
+    def import_csv(self):
+        """Importe un CSV d'outils ou un catalogue fournisseur."""
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Importer des outils", "", "CSV (*.csv *.txt)"
+        )
+        if not path:
+            return
+
+        count = import_tools(path)
+        QtWidgets.QMessageBox.information(self, "OK", f"{count} outil(s) importé(s).")
+
+    # ----- Outil sélectionné (ligne source) -----
+    def _current_tool(self):
+        index = self.table.currentIndex()
+        if not index.isValid():
+            return None
+        return self.model.tool_at(self.proxy.mapToSource(index).row())
 
     # ======================================================================
     # Ajouter outil
@@ -88,50 +244,43 @@ class ToolManagerDialog(QtWidgets.QDialog):
         if dlg.exec_() == QtWidgets.QDialog.Accepted:
             data = dlg.get_tool_data()
 
-            name = data["Name"]
-            if name in TOOLS:
+            name = data["name"]
+            if name in self.model.library:
                 QtWidgets.QMessageBox.warning(self, "Erreur", "Un outil avec ce nom existe déjà.")
                 return
 
-            TOOLS[name] = data
-            self.reload_table()
+            self.model.add_tool(Tool(**data))
 
     # ======================================================================
     # Modifier outil
     # ======================================================================
     def edit_tool(self):
-        row = self.table.currentRow()
-        if row < 0:
+        tool = self._current_tool()
+        if tool is None:
             QtWidgets.QMessageBox.warning(self, "Erreur", "Sélectionnez un outil.")
             return
 
-        name = self.table.item(row, 0).text()
-        tool = TOOLS.get(name)
-        if not tool:
-            return
-
+        name = tool.name
         dlg = ToolEditorDialog(initial_data=tool, parent=self)
         if dlg.exec_() == QtWidgets.QDialog.Accepted:
             new_data = dlg.get_tool_data()
 
-            # si nom changé → suppression ancien
-            if new_data["Name"] != name and new_data["Name"] in TOOLS:
+            # si nom changé → le nouveau nom ne doit pas exister
+            if new_data["name"] != name and new_data["name"] in self.model.library:
                 QtWidgets.QMessageBox.warning(self, "Erreur", "Nom déjà existant.")
                 return
 
-            del TOOLS[name]
-            TOOLS[new_data["Name"]] = new_data
-            self.reload_table()
+            self.model.update_tool(name, Tool(**new_data))
 
     # ======================================================================
     # Supprimer outil
     # ======================================================================
     def delete_tool(self):
-        row = self.table.currentRow()
-        if row < 0:
+        tool = self._current_tool()
+        if tool is None:
             return
 
-        name = self.table.item(row, 0).text()
+        name = tool.name
 
         confirm = QtWidgets.QMessageBox.question(
             self, "Supprimer", f"Supprimer l’outil '{name}' ?"
@@ -139,31 +288,14 @@ class ToolManagerDialog(QtWidgets.QDialog):
         if confirm != QtWidgets.QMessageBox.Yes:
             return
 
-        if name in TOOLS:
-            del TOOLS[name]
-
-        self.reload_table()
+        self.model.remove_tool(name)
 
     # ======================================================================
     # Sauvegarde CSV
     # ======================================================================
     def save_csv(self):
         """Écrit tools.csv en UTF-8 propre."""
-        base_dir = os.path.dirname(__file__)
-        csv_path = os.path.join(base_dir, "tools.csv")
-
-        with open(csv_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f, delimiter=";")
-            writer.writerow(["Name", "Diam", "Z", "Vc", "Fz", "Type"])
-            for name, data in TOOLS.items():
-                writer.writerow([
-                    name,
-                    data.get("diam", ""),
-                    data.get("z", ""),
-                    data.get("vc", ""),
-                    data.get("fz", ""),
-                    data.get("type", ""),
-                ])
+        save_tools()
 
         QtWidgets.QMessageBox.information(self, "OK", "tools.csv enregistré.")
 
@@ -184,6 +316,7 @@ class ToolEditorDialog(QtWidgets.QDialog):
         self.edit_vc = QtWidgets.QLineEdit()
         self.edit_fz = QtWidgets.QLineEdit()
         self.edit_type = QtWidgets.QLineEdit()
+        self.edit_material = QtWidgets.QLineEdit()
 
         layout.addRow("Nom :", self.edit_name)
         layout.addRow("Diamètre (mm) :", self.edit_diam)
@@ -191,6 +324,7 @@ class ToolEditorDialog(QtWidgets.QDialog):
         layout.addRow("Vc (m/min) :", self.edit_vc)
         layout.addRow("Fz (mm/dent) :", self.edit_fz)
         layout.addRow("Type :", self.edit_type)
+        layout.addRow("Matière :", self.edit_material)
 
         btns = QtWidgets.QHBoxLayout()
         btn_ok = QtWidgets.QPushButton("Valider")
@@ -205,20 +339,22 @@ class ToolEditorDialog(QtWidgets.QDialog):
         layout.addRow(btns)
 
         if initial_data:
-            self.edit_name.setText(initial_data.get("Name", ""))
+            self.edit_name.setText(initial_data.get("name", ""))
             self.edit_diam.setText(str(initial_data.get("diam", "")))
             self.edit_z.setText(str(initial_data.get("z", "")))
             self.edit_vc.setText(str(initial_data.get("vc", "")))
             self.edit_fz.setText(str(initial_data.get("fz", "")))
             self.edit_type.setText(initial_data.get("type", ""))
+            self.edit_material.setText(initial_data.get("material", ""))
 
     # ------------------------------------------------------------------
     def get_tool_data(self):
         return {
-            "Name": self.edit_name.text().strip(),
+            "name": self.edit_name.text().strip(),
             "diam": float(self.edit_diam.text().replace(",", ".")),
             "z": int(self.edit_z.text()),
             "vc": float(self.edit_vc.text().replace(",", ".")),
             "fz": float(self.edit_fz.text().replace(",", ".")),
             "type": self.edit_type.text().strip(),
+            "material": self.edit_material.text().strip(),
         }
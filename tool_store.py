@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+tool_store.py — Stockage SQLite (optionnel) de la bibliothèque d'outils
+
+Pour plusieurs chiffreurs qui partagent la même bibliothèque :
+- écritures ligne par ligne (upsert), plus de réécriture complète du CSV ;
+- mode WAL : les lectures ne bloquent pas les écritures ;
+- compteur de version global : chaque transaction d'écriture l'incrémente et
+  marque les lignes touchées, ce qui permet à un poste de ne relire que les
+  lignes modifiées depuis sa dernière synchronisation (changes_since) ;
+- suppressions conservées comme "pierres tombales" pour être propagées ;
+- index sur le diamètre et sur (type, diamètre).
+
+Attention : le mode WAL suppose que tous les postes accèdent à la base via
+un système de fichiers qui gère correctement les verrous (disque local,
+serveur de fichiers récent). Pour un partage réseau douteux, ouvrir la
+base avec wal=False (journal classique, plus lent mais sûr).
+"""
+
+import sqlite3
+
+from tool_library import Tool, iter_catalog, save_csv_atomic
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tools (
+    name     TEXT PRIMARY KEY,
+    diam     REAL NOT NULL,
+    z        INTEGER NOT NULL,
+    vc       REAL NOT NULL,
+    fz       REAL NOT NULL,
+    type     TEXT NOT NULL DEFAULT '',
+    material TEXT NOT NULL DEFAULT '',
+    version  INTEGER NOT NULL,
+    deleted  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_tools_diam ON tools(diam);
+CREATE INDEX IF NOT EXISTS idx_tools_type ON tools(type, diam);
+CREATE INDEX IF NOT EXISTS idx_tools_version ON tools(version);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta(key, value) VALUES ('version', 0);
+"""
+
+_COLUMNS = "name, diam, z, vc, fz, type, material"
+
+
+def _row_to_tool(row):
+    return Tool(*row)
+
+
+def _tool_to_row(tool):
+    return (tool.name, tool.diam, tool.z, tool.vc, tool.fz, tool.type, tool.material)
+
+
+class SQLiteToolStore:
+    """Bibliothèque d'outils dans une base SQLite partagée."""
+
+    def __init__(self, path, wal=True, timeout=10.0):
+        self.path = path
+        # isolation_level=None : transactions gérées explicitement (BEGIN IMMEDIATE)
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        if wal:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ----------------------------------------------------------
+    # Transactions d'écriture
+    # ----------------------------------------------------------
+    def _write(self, fn):
+        """
+        Exécute fn(conn, version) dans une transaction IMMEDIATE
+        (verrou d'écriture pris dès le début) avec une nouvelle version.
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+            (version,) = conn.execute(
+                "SELECT value FROM meta WHERE key = 'version'"
+            ).fetchone()
+            fn(conn, version)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return version
+
+    @staticmethod
+    def _upsert_rows(conn, version, tools):
+        conn.executemany(
+            f"INSERT INTO tools({_COLUMNS}, version, deleted) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0) "
+            "ON CONFLICT(name) DO UPDATE SET "
+            "diam=excluded.diam, z=excluded.z, vc=excluded.vc, fz=excluded.fz, "
+            "type=excluded.type, material=excluded.material, "
+            "version=excluded.version, deleted=0",
+            (_tool_to_row(t) + (version,) for t in tools),
+        )
+
+    def upsert(self, tool):
+        return self.upsert_many((tool,))
+
+    def upsert_many(self, tools):
+        return self._write(lambda conn, v: self._upsert_rows(conn, v, tools))
+
+    def delete(self, name):
+        return self._write(
+            lambda conn, v: conn.execute(
+                "UPDATE tools SET deleted = 1, version = ? WHERE name = ?", (v, name)
+            )
+        )
+
+    def rename(self, old_name, tool):
+        """Modification avec changement de nom : suppression + upsert atomiques."""
+        def _fn(conn, v):
+            conn.execute(
+                "UPDATE tools SET deleted = 1, version = ? WHERE name = ?", (v, old_name)
+            )
+            self._upsert_rows(conn, v, (tool,))
+
+        return self._write(_fn)
+
+    # ----------------------------------------------------------
+    # Lecture
+    # ----------------------------------------------------------
+    def version(self):
+        (v,) = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return v
+
+    def load_all(self):
+        """(version, [Tool]) — lecture cohérente de toute la bibliothèque."""
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            version = self.version()
+            rows = conn.execute(
+                f"SELECT {_COLUMNS} FROM tools WHERE deleted = 0 ORDER BY rowid"
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return version, [_row_to_tool(r) for r in rows]
+
+    def changes_since(self, version):
+        """
+        (nouvelle_version, outils modifiés, noms supprimés) depuis `version`.
+        Coût proportionnel au nombre de lignes modifiées (index sur version).
+        """
+        conn = self.conn
+        conn.execute("BEGIN")
+        try:
+            current = self.version()
+            rows = conn.execute(
+                f"SELECT {_COLUMNS}, deleted FROM tools WHERE version > ? ORDER BY version",
+                (version,),
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+
+        changed = [_row_to_tool(r[:-1]) for r in rows if not r[-1]]
+        deleted = [r[0] for r in rows if r[-1]]
+        return current, changed, deleted
+
+    def find(self, diam_min, diam_max, type=None):
+        """Requête par plage de Ø directement en base (index diam / type)."""
+        sql = f"SELECT {_COLUMNS} FROM tools WHERE deleted = 0 AND diam BETWEEN ? AND ?"
+        args = [diam_min, diam_max]
+        if type is not None:
+            sql += " AND type = ?"
+            args.append(type)
+        rows = self.conn.execute(sql + " ORDER BY diam", args).fetchall()
+        return [_row_to_tool(r) for r in rows]
+
+    # ----------------------------------------------------------
+    # Import / export CSV
+    # ----------------------------------------------------------
+    def import_csv(self, path, columns=None, delimiter=None):
+        """Importe un CSV (tools.csv ou catalogue) en une transaction."""
+        tools = list(iter_catalog(path, columns, delimiter))
+        self.upsert_many(tools)
+        return len(tools)
+
+    def export_csv(self, path):
+        _, tools = self.load_all()
+        save_csv_atomic(path, tools)
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+tracing.py — Traces par étape du chiffrage
+
+Instrumentation légère de la chaîne de chiffrage :
+
+    with span("detect_features", "features", faces=len(shape.Faces)):
+        ...
+
+    @traced("stock")
+    def create_intelligent_stock(...):
+        ...
+
+Étapes (cat) : geometry, features, stock, cam, operations, recompute, ui.
+
+Désactivé par défaut : span() / @traced ne coûtent alors qu'un test de
+booléen. Une fois activé (TRACER.start()) chaque span produit un
+événement "complete" (ph = "X") au format Chrome trace-event, exportable
+par export_chrome(path) et lisible dans chrome://tracing ou Perfetto.
+
+Options de start() :
+- profile=True : cProfile pendant toute la capture (profile_report()) ;
+- memory=True  : tracemalloc, chaque span note la variation mémoire (Ko).
+
+breakdown() donne le temps propre de chaque étape (hors spans imbriqués) :
+la somme des étapes est le temps total tracé, sans double compte.
+
+Module indépendant de FreeCAD et de Qt.
+"""
+
+import functools
+import io
+import json
+import os
+import threading
+import time
+
+
+STAGES = ("geometry", "features", "stock", "cam", "operations", "recompute", "ui")
+
+
+class _NullSpan:
+    """Span inactif (traçage désactivé)."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "t0", "mem0", "parent_cats", "children")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        tracer = self.tracer
+        stack = tracer._stack()
+        self.parent_cats = {s.cat for s in stack}
+        self.children = 0.0
+        stack.append(self)
+        self.mem0 = tracer._memory()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        t1 = time.perf_counter()
+        tracer = self.tracer
+        stack = tracer._stack()
+        stack.pop()
+        if stack:
+            stack[-1].children += t1 - self.t0
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        if self.mem0 is not None:
+            mem1 = tracer._memory()  # None si la capture mémoire a été arrêtée entre-temps
+            if mem1 is not None:
+                self.args["mem_kb"] = round((mem1 - self.mem0) / 1024.0, 1)
+        tracer._record(self, t1)
+        return False
+
+
+class Tracer:
+    """Collecte des spans (tous threads) et des totaux par étape."""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.stage_totals = {}   # cat → [secondes, nb]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._profiler = None
+        self._tracemalloc = None
+        self._own_tracemalloc = False   # tracemalloc démarré par start()
+
+    # ----------------------------------------------------------
+    # Capture
+    # ----------------------------------------------------------
+    def start(self, profile=False, memory=False):
+        self.clear()
+        self.enabled = True
+        if profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._own_tracemalloc = True
+            self._tracemalloc = tracemalloc
+
+    def stop(self):
+        self.enabled = False
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._tracemalloc is not None:
+            if self._own_tracemalloc:
+                self._tracemalloc.stop()
+            self._tracemalloc = None
+            self._own_tracemalloc = False
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+            self.stage_totals = {}
+        self._origin = time.perf_counter()
+        self._profiler = None
+
+    # ----------------------------------------------------------
+    # Spans
+    # ----------------------------------------------------------
+    def span(self, name, cat="", **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _memory(self):
+        if self._tracemalloc is None:
+            return None
+        return self._tracemalloc.get_traced_memory()[0]
+
+    def _record(self, sp, t1):
+        event = {
+            "name": sp.name,
+            "cat": sp.cat,
+            "ph": "X",
+            "ts": (sp.t0 - self._origin) * 1e6,
+            "dur": (t1 - sp.t0) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if sp.args:
+            event["args"] = {k: _jsonable(v) for k, v in sp.args.items()}
+        with self._lock:
+            self.events.append(event)
+            # temps propre (hors spans enfants) attribué à l'étape
+            total = self.stage_totals.setdefault(sp.cat, [0.0, 0])
+            total[0] += (t1 - sp.t0) - sp.children
+            if sp.cat not in sp.parent_cats:
+                total[1] += 1
+
+    # ----------------------------------------------------------
+    # Résultats
+    # ----------------------------------------------------------
+    def breakdown(self):
+        """[(étape, secondes propres, nb d'entrées)] triés par temps décroissant."""
+        with self._lock:
+            rows = [(cat or "-", t, n) for cat, (t, n) in self.stage_totals.items()]
+        return sorted(rows, key=lambda r: r[1], reverse=True)
+
+    def breakdown_text(self):
+        rows = self.breakdown()
+        if not rows:
+            return "Aucune étape tracée."
+        total = sum(t for _, t, _ in rows) or 1.0
+        lines = [f"{cat:<12} {t * 1000:10.1f} ms  {100 * t / total:5.1f} %  ({n}×)"
+                 for cat, t, n in rows]
+        slowest = sorted(self.events, key=lambda e: e["dur"], reverse=True)[:5]
+        if slowest:
+            lines += ["", "Spans les plus longs :"]
+            lines += [f"  {e['name']} [{e['cat']}] {e['dur'] / 1000:.1f} ms" for e in slowest]
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        with self._lock:
+            events = list(self.events)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def profile_report(self, limit=30, sort="cumulative"):
+        """Rapport pstats du profil cProfile (start(profile=True)), ou ""."""
+        if self._profiler is None:
+            return ""
+        import pstats
+
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+def _jsonable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+# ======================================================================
+#  TRACEUR PARTAGÉ
+# ======================================================================
+
+TRACER = Tracer()
+
+
+def span(name, cat="", **args):
+    """Context manager : span `name` de l'étape `cat` (sans effet si inactif)."""
+    return TRACER.span(name, cat, **args)
+
+
+def traced(cat="", name=None):
+    """Décorateur : chaque appel de la fonction est un span de l'étape `cat`."""
+
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with _Span(TRACER, label, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate